@@ -0,0 +1,249 @@
+"""Read-only HTTP API over the dashboard tables, for partners who would
+otherwise scrape the pages.
+
+Serves the four downloadable tables (the same rows as Data/*.csv) from the
+app's indexed in-memory copies (data_access.py), filtered by query string:
+
+  GET /v1/tables                                     versions, row counts, filters
+  GET /v1/annual_county?jurisdiction=Cobb&jurisdiction=Fulton&series=All&start=2000
+  GET /v1/annual_city?jurisdiction=Marietta&provisional=false&format=csv
+  GET /v1/monthly_master?jurisdiction=Fulton&level=County&end=2025
+  GET /v1/metro_total_annual
+
+  jurisdiction  county or city name, repeatable (default: all)
+  series        permit series, repeatable (default: all)
+  level         monthly_master only: County or City/Other
+  start, end    first and last year, inclusive
+  provisional   true or false: only rows that are (or aren't) provisional
+  format        json (default) or csv
+
+Responses are gzip-compressed for clients that accept it, and carry an ETag
+made from the table's data version (manifest.json), the query and the encoding
+(gzipped or not), so a repeat request with If-None-Match gets a 304 without
+touching the data. Built bodies are kept in an LRU (lru_cache.py), like the
+app's figures. A data refresh changes the version and with it every ETag and
+cache key.
+
+It runs on Tornado, which Streamlit already brings in, as its own process:
+
+  python api.py --port 8502
+  python benchmarks/bench_api.py          # requests per second on one core
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import argparse
+
+import pandas as pd
+import tornado.web
+import tornado.ioloop
+
+from data_access import load_table, table_version
+from lru_cache import LRUCache
+from utils import region
+
+# the tables the API serves: name column (None for the metro totals) and time column
+API_TABLES = {
+    'annual_county': ('county_name', 'Year'),
+    'annual_city': ('City', 'Year'),
+    'monthly_master': ('Name', 'year_month'),
+    'metro_total_annual': (None, 'Year'),
+}
+
+# how many built responses to keep
+API_CACHE_SIZE = int(os.environ.get('API_CACHE_SIZE', 512))
+
+FORMATS = {'json': 'application/json', 'csv': 'text/csv; charset=utf-8'}
+
+
+class BadQuery(ValueError):
+    pass
+
+
+def parse_query(name, args):
+    """The filters in a request's query arguments (str -> [str]), checked and
+    put in a canonical order, so equivalent requests share an ETag."""
+    def values(arg):
+        return sorted({value for value in args.get(arg, []) if value})
+
+    def one(arg, default=None):
+        given = values(arg)
+        if len(given) > 1:
+            raise BadQuery(f'{arg} can only be given once')
+        return given[0] if given else default
+
+    def year(arg):
+        value = one(arg)
+        if value is None:
+            return None
+        if not value.isdigit():
+            raise BadQuery(f'{arg} must be a year')
+        return int(value)
+
+    unknown = set(args) - {'jurisdiction', 'series', 'level', 'start', 'end', 'provisional', 'format'}
+    if unknown:
+        raise BadQuery(f"unknown parameter(s): {', '.join(sorted(unknown))}")
+    query = {
+        'jurisdiction': values('jurisdiction'),
+        'series': values('series'),
+        'level': one('level'),
+        'start': year('start'),
+        'end': year('end'),
+        'provisional': one('provisional'),
+        'format': one('format', 'json'),
+    }
+    if query['format'] not in FORMATS:
+        raise BadQuery('format must be json or csv')
+    if query['provisional'] not in (None, 'true', 'false'):
+        raise BadQuery('provisional must be true or false')
+    if query['level'] and name != 'monthly_master':
+        raise BadQuery('level only applies to monthly_master')
+    if query['jurisdiction'] and API_TABLES[name][0] is None:
+        raise BadQuery(f'{name} has no jurisdictions')
+    return query
+
+
+def select_rows(name, query):
+    """The table's rows matching `query`, in table order."""
+    name_col, time_col = API_TABLES[name]
+    table = load_table(name)
+    if query['jurisdiction']:
+        # one contiguous block per jurisdiction in the indexed table
+        df = table.select([(j,) for j in query['jurisdiction']])
+    else:
+        df = table.df
+    keep = pd.Series(True, index=df.index)
+    if query['series']:
+        keep &= df['Series'].isin(query['series'])
+    if query['level']:
+        keep &= df['Level'] == query['level']
+    years = df[time_col] // 100 if time_col == 'year_month' else df[time_col]
+    if query['start'] is not None:
+        keep &= years >= query['start']
+    if query['end'] is not None:
+        keep &= years <= query['end']
+    if query['provisional'] is not None and 'provisional' in df.columns:
+        keep &= df['provisional'].astype(bool) == (query['provisional'] == 'true')
+    df = df[keep]
+    # in the CSV's column order
+    return df[[col for col in df.columns if col != 'Cumulative']]
+
+
+def render(name, query, version):
+    df = select_rows(name, query)
+    if query['format'] == 'csv':
+        return df.to_csv(index=False).encode('utf-8')
+    return (f'{{"table":"{name}","version":"{version}","rows":{len(df)},"data":'
+            + df.to_json(orient='records') + '}').encode('utf-8')
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip: listed (or covered by
+    `*`) with a q-value above 0, so `gzip;q=0` turns it off."""
+    weights = {}
+    for coding in accept_encoding.split(','):
+        coding, *params = [part.strip() for part in coding.split(';')]
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding:
+            weights[coding.lower()] = weight
+    return weights.get('gzip', weights.get('x-gzip', weights.get('*', 0.0))) > 0
+
+
+# The gzipped and plain bodies differ byte for byte, so each gets its own strong
+# tag: a cache that stored one must not revalidate it for a client sent the other.
+def etag(name, query, version, encoding=None):
+    digest = hashlib.sha256(json.dumps([name, query], sort_keys=True).encode()).hexdigest()[:16]
+    suffix = '-gz' if encoding == 'gzip' else ''
+    return f'"{version}-{digest}{suffix}"'
+
+
+# built bodies, raw and gzipped, keyed by the plain ETag (which covers table,
+# query and data version)
+responses = LRUCache(API_CACHE_SIZE)
+
+
+class TableHandler(tornado.web.RequestHandler):
+    def compute_etag(self):
+        # set in get(); Tornado's default would hash the whole body first
+        return None
+
+    def get(self, name):
+        if name not in API_TABLES:
+            raise tornado.web.HTTPError(404, reason=f'no table {name}')
+        try:
+            query = parse_query(name, {arg: [v.decode() for v in vs]
+                                       for arg, vs in self.request.query_arguments.items()})
+        except BadQuery as e:
+            self.set_status(400)
+            self.finish({'error': str(e)})
+            return
+        version = table_version(name)
+        encoding = 'gzip' if accepts_gzip(self.request.headers.get('Accept-Encoding', '')) else None
+        # If-None-Match is compared against the tag of the encoding being sent
+        self.set_header('Etag', etag(name, query, version, encoding))
+        self.set_header('Cache-Control', 'public, max-age=300')
+        self.set_header('Vary', 'Accept-Encoding')
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+
+        def build():
+            body = render(name, query, version)
+            return body, gzip.compress(body, compresslevel=6)
+
+        body, zipped = responses.get(etag(name, query, version), build)
+        self.set_header('Content-Type', FORMATS[query['format']])
+        if encoding == 'gzip':
+            self.set_header('Content-Encoding', 'gzip')
+            body = zipped
+        self.finish(body)
+
+
+class TablesHandler(tornado.web.RequestHandler):
+    def get(self):
+        tables = {}
+        for name, (name_col, time_col) in API_TABLES.items():
+            df = load_table(name).df
+            tables[name] = {
+                'version': table_version(name),
+                'rows': len(df),
+                'columns': [col for col in df.columns if col != 'Cumulative'],
+                'jurisdictions': sorted(map(str, df[name_col].unique())) if name_col else [],
+                'series': sorted(map(str, df['Series'].unique())) if 'Series' in df else [],
+            }
+        self.finish({'region': region['title'], 'tables': tables})
+
+
+def make_app():
+    return tornado.web.Application([
+        (r'/v1/tables', TablesHandler),
+        (r'/v1/([a-z_]+)', TableHandler),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=int(os.environ.get('API_PORT', 8502)))
+    parser.add_argument('--address', default='127.0.0.1')
+    args = parser.parse_args()
+
+    # data_dir is relative to the repo; load and index every table before serving
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    for name in API_TABLES:
+        load_table(name)
+    make_app().listen(args.port, args.address)
+    print(f"serving {region['title']} tables on http://{args.address}:{args.port}/v1/tables")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == '__main__':
+    main()
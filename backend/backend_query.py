@@ -1,254 +1,88 @@
 import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import zipfile
+import argparse
 import pandas as pd
 from datetime import datetime
 
-# Note: this script only runs the data filter & export. It reads the two raw
-# master CSVs produced by fetch_permits.py (in Data/raw/) and rebuilds the four
-# dashboard CSVs in Data/. The GitHub Actions workflow (.github/workflows/
-# refresh-data.yml) chains fetch_permits.py -> this script -> git commit/push,
-# which triggers the Heroku redeploy.
+from regions import REGIONS, get_region, county_names, city_names
+from spans import span, timed
+
+# Note: this module only runs the data filter & export. For each metro in
+# regions.py it reads its state's two raw master CSVs produced by
+# fetch_permits.py (in Data/raw/) and rebuilds the four dashboard CSVs in the
+# metro's data_dir (Data/ for Atlanta). The GitHub Actions workflow
+# (.github/workflows/refresh-data.yml) runs the fetch and this build in one
+# process via pipeline.py, then git commit/push, which triggers the Heroku
+# redeploy.
+#
+# The work is done by build_dashboard_tables(), which takes DataFrames and
+# returns DataFrames, so it can be called in-process (and timed stage by stage)
+# without touching disk. Running this file is a thin wrapper that reads the
+# masters and existing tables, calls it, and writes the result.
 
 # Resolve paths relative to this file so the script works from any cwd.
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 RAW_DIR = os.path.join(REPO_ROOT, 'Data', 'raw')
+# fetch_permits.py --backfill writes one BPS_<state>_<year>.csv per year here
+BACKFILL_DIR = os.path.join(RAW_DIR, 'monthly')
 
-county_list = [
-    'Cherokee',
-    'Clayton',
-    'Cobb',
-    'DeKalb',
-    'Douglas',
-    'Fayette',
-    'Forsyth',
-    'Fulton',
-    'Gwinnett',
-    'Henry',
-    'Rockdale'
-]
-
-# FIPS-keyed dictionaries used by the annual pipeline. county_dict covers the 11
-# metro counties; city_dict covers the cities in city_list PLUS the 11
-# unincorporated county balances, which appear only in the annual viz.
-county_dict = {
-    '13057': 'Cherokee',
-    '13063': 'Clayton',
-    '13067': 'Cobb',
-    '13089': 'DeKalb',
-    '13097': 'Douglas',
-    '13113': 'Fayette',
-    '13117': 'Forsyth',
-    '13121': 'Fulton',
-    '13135': 'Gwinnett',
-    '13151': 'Henry',
-    '13247': 'Rockdale',
-}
+ROLLING_WINDOW = 3
 
-city_dict = {
-    '13067003000': 'Acworth',
-    '13121019000': 'Alpharetta',
-    '13121038000': 'Atlanta',
-    '13067043000': 'Austell',
-    '13089047000': 'Avondale Estates',
-    '13057055000': 'Ball Ground',
-    '13135066000': 'Berkeley Lake',
-    '13089098700': 'Brookhaven',
-    '13135108000': 'Buford',
-    '13057126000': 'Canton',
-    '13089139000': 'Chamblee',
-    '13121144900': 'Chattahoochee Hills',
-    '13089152000': 'Clarkston',
-    '13121169000': 'College Park',
-    '13247178000': 'Conyers',
-    '13117192000': 'Cumming',
-    '13135195000': 'Dacula',
-    '13089213000': 'Decatur',
-    '13089225000': 'Doraville',
-    '13097229000': 'Douglasville',
-    '13135233000': 'Duluth',
-    '13089233500': 'Dunwoody',
-    '13121237000': 'East Point',
-    '13121256000': 'Fairburn',
-    '13113260000': 'Fayetteville',
-    '13063268000': 'Forest Park',
-    '13135301000': 'Grayson',
-    '13151315000': 'Hampton',
-    '13121317000': 'Hapeville',
-    '13057341000': 'Holly Springs',
-    '13121369300': 'Johns Creek',
-    '13063371000': 'Jonesboro',
-    '13067373000': 'Kennesaw',
-    '13063381000': 'Lake City',
-    '13135388000': 'Lawrenceville',
-    '13135396000': 'Lilburn',
-    '13089401000': 'Lithonia',
-    '13151402000': 'Locust Grove',
-    '13063409000': 'Lovejoy',
-    '13067430000': 'Marietta',
-    '13151439000': 'McDonough',
-    '13121457300': 'Milton',
-    '13063472000': 'Morrow',
-    '13121480000': 'Mountain Park',
-    '13063057500': 'Mountain View',
-    '13057485000': 'Nelson',
-    '13135494000': 'Norcross',
-    '13121515000': 'Palmetto',
-    '13113523000': 'Peachtree City',
-    '13135523500': 'Peachtree Corners',
-    '13089533000': 'Pine Lake',
-    '13067546000': 'Powder Springs',
-    '13063575000': 'Riverdale',
-    '13121585000': 'Roswell',
-    '13121592700': 'Sandy Springs',
-    '13067613000': 'Smyrna',
-    '13135614000': 'Snellville',
-    '13121617800': 'South Fulton',
-    '13151629000': 'Stockbridge',
-    '13089630000': 'Stone Mountain',
-    '13089629500': 'Stonecrest',
-    '13135631000': 'Sugar Hill',
-    '13135638000': 'Suwanee',
-    '13089677800': 'Tucker',
-    '13113685000': 'Tyrone',
-    '13121687000': 'Union City',
-    '13057742000': 'Woodstock',
-    '13057147000': 'Unincorporated Cherokee County',
-    '13063156000': 'Unincorporated Clayton County',
-    '13067161000': 'Unincorporated Cobb County',
-    '13089210000': 'Unincorporated DeKalb County',
-    '13097228000': 'Unincorporated Douglas County',
-    '13113259000': 'Unincorporated Fayette County',
-    '13117270000': 'Unincorporated Forsyth County',
-    '13121278000': 'Unincorporated Fulton County',
-    '13135309000': 'Unincorporated Gwinnett County',
-    '13151332000': 'Unincorporated Henry County',
-    '13247579000': 'Unincorporated Rockdale County',
+# The four dashboard tables, each written to <data_dir>/<name>.csv and
+# <name>.parquet. The app loads the Parquet copies; the CSVs are the committed
+# history the next build preserves, and what users download.
+TABLES = ['monthly_master', 'annual_county', 'annual_city', 'metro_total_annual']
+
+# Derived tables the app reads but nobody downloads: written as Parquet only.
+AGGREGATES = ['cumulative_totals']
+
+# Monthly rows from before the rolling window, built from the backfilled years:
+# <data_dir>/monthly_history/<year>.parquet, laid out like monthly_master, so
+# the app reads only the years a chart asks for.
+HISTORY = 'monthly_history'
+
+# Written next to the tables: a hash of every file plus row counts, date ranges
+# and provisional years per table. The app keys its caches on these hashes.
+MANIFEST = 'manifest.json'
+
+# Bulk downloads, rebuilt with the tables and served by the app as static files
+# (Streamlit serves static/ at app/static/): every table as one Parquet file,
+# one zip of per-jurisdiction CSVs, and a SHA256SUMS listing for both.
+BUNDLE_ZIP = 'permits_by_jurisdiction.zip'
+BUNDLE_SUMS = 'SHA256SUMS'
+
+# zip folder for each table's jurisdictions: (folder, name column, level column)
+BUNDLE_FOLDERS = {
+    'annual_county': [('annual/county', 'county_name', None)],
+    'annual_city': [('annual/city', 'City', None)],
+    'monthly_master': [('monthly/county', 'Name', 'County'),
+                       ('monthly/city', 'Name', 'City/Other')],
 }
 
-city_list = [
-    'Acworth',
-    'Alpharetta',
-    'Atlanta',
-    'Austell',
-    'Avondale Estates',
-    'Ball Ground',
-    'Berkeley Lake',
-    'Brookhaven',
-    'Buford',
-    'Canton',
-    'Chamblee',
-    'Chattahoochee Hills',
-    'Clarkston',
-    'College Park',
-    'Conyers',
-    'Cumming',
-    'Dacula',
-    'Decatur',
-    'Doraville',
-    'Douglasville',
-    'Duluth',
-    'Dunwoody',
-    'East Point',
-    'Fairburn',
-    'Fayetteville',
-    'Forest Park',
-    'Grayson',
-    'Hampton',
-    'Hapeville',
-    'Holly Springs',
-    'Johns Creek',
-    'Jonesboro',
-    'Kennesaw',
-    'Lake City',
-    'Lawrenceville',
-    'Lilburn',
-    'Lithonia',
-    'Locust Grove',
-    'Lovejoy',
-    'Marietta',
-    'McDonough',
-    'Milton',
-    'Morrow',
-    'Mountain Park',
-    'Mountain View',
-    'Nelson',
-    'Norcross',
-    'Palmetto',
-    'Peachtree City',
-    'Peachtree Corners',
-    'Pine Lake',
-    'Powder Springs',
-    'Riverdale',
-    'Roswell',
-    'Sandy Springs',
-    'Smyrna',
-    'Snellville',
-    'South Fulton',
-    'Stockbridge',
-    'Stone Mountain',
-    'Stonecrest',
-    'Sugar Hill',
-    'Suwanee',
-    'Tucker',
-    'Tyrone',
-    'Union City',
-    'Woodstock',
-]
-
-# step 1: filter dataset, export to Streamlit app
-df_master = pd.read_csv(os.path.join(RAW_DIR, 'BPS_GA.csv'))
-df = df_master[((df_master['Level'] == 'County') & (df_master['Name'].isin(county_list)))
-               | ((df_master['Level'] == 'City/Other') & (df_master['Name'].isin(city_list)))]
-
-# Melt the dataframe to create rows for 'SF_permits' and 'MF_permits'
-df_melted = pd.melt(
-    df,
-    id_vars=['year_month', 'date', 'Level', 'Name'],
-    value_vars=['SF_permits', 'MF_permits'],
-    var_name='Series',
-    value_name='Permits'
-)
-
-# Map the 'Series' values to meaningful names
-df_melted['Series'] = df_melted['Series'].map({
-    'SF_permits': 'Single-Family',
-    'MF_permits': 'Multi-Family'
-})
-
-# create the Metro total
-metro_totals = (
-    df_melted[df_melted['Level'] == 'County']
-    .groupby(['year_month', 'date', 'Series'], as_index=False)['Permits']
-    .sum()
-)
-
-# Add "Metro" as the 'Name' and 'Level'
-metro_totals['Name'] = 'Metro'
-metro_totals['Level'] = 'County'
-
-# Append the Metro totals to the melted dataframe & export
-df_final = pd.concat([df_melted, metro_totals], ignore_index=True)
-df_final.to_csv(os.path.join(REPO_ROOT, 'Data', 'monthly_master.csv'), index=False)
-
-
-# -----------------------------------------------------------------------------
-# Step 2: build the annual dashboard CSVs.
-#
-# Replaces the standalone annual_update.ipynb. Each monthly run:
-#   - pulls benchmarked annual rows for years where the BPS annual file exists
-#     (from BPS_GA_annual.csv, produced by data_pull.py::annual_permits_fetch)
-#   - fills gaps (current year, prior year pre-May-14) with summed monthlies,
-#     marking those rows provisional=True
-#   - preserves pre-window rows from the existing dashboard CSVs
-#     (history before the rolling 3-year window never changes)
-# -----------------------------------------------------------------------------
-
-ROLLING_WINDOW = 3
-ANNUAL_MASTER = os.path.join(RAW_DIR, 'BPS_GA_annual.csv')
-DASHBOARD_DIR = os.path.join(REPO_ROOT, 'Data')
+# Column types for the Parquet copies: the repeated strings are dictionary-
+# encoded (and come back as pandas categoricals), the rest are narrow numbers.
+COLUMNAR_TYPES = {
+    'county_name': 'category',
+    'City': 'category',
+    'Name': 'category',
+    'Level': 'category',
+    'Series': 'category',
+    'date': 'category',
+    'Year': 'int16',
+    'year_month': 'int32',
+    'Permits': 'int32',
+    'provisional': 'bool',
+    'Table': 'category',
+    'Period': 'int32',
+    'Cumulative': 'int64',
+}
 
-current_year = datetime.now().year
-window_years = list(range(current_year - (ROLLING_WINDOW - 1), current_year + 1))
-window_start = window_years[0]
+ANNUAL_MASTER_COLUMNS = ['Year', 'Level', 'Name', 'FIPS', 'SF_permits', 'MF_permits']
 
 
 def reformat_unincorporated(name):
@@ -259,173 +93,219 @@ def reformat_unincorporated(name):
     return name
 
 
-# ---- Prepare the monthly master for provisional roll-ups --------------------
-df_monthly = df_master.copy()
-df_monthly['Year'] = df_monthly['year_month'].astype(str).str[:4].astype(int)
-
-# A provisional year is only emitted once it's fully complete (December monthly
-# data is in hand). Otherwise a partial year — e.g. Jan-only in April — would
-# render as a cliff-edge drop on the annual charts.
-_months_seen = (
-    df_monthly['year_month'].astype(str).str[-2:]
-    .groupby(df_monthly['Year']).apply(set)
-)
-complete_years = {int(y) for y, months in _months_seen.items() if '12' in months}
-
-# ---- Load the annual master (benchmarked), if available ---------------------
-if os.path.exists(ANNUAL_MASTER):
-    df_ann = pd.read_csv(ANNUAL_MASTER, dtype={'FIPS': str})
-    df_ann['Year'] = df_ann['Year'].astype(int)
-else:
-    df_ann = pd.DataFrame(columns=[
-        'Year', 'Level', 'Name', 'FIPS', 'SF_permits', 'MF_permits'
-    ])
-
-
-# ---- Counties: assemble rows for the rolling window -------------------------
-county_frames = []
-
-# benchmarked rows from the annual master
-df_ann_c = df_ann[(df_ann['Level'] == 'County') &
-                  (df_ann['FIPS'].isin(county_dict.keys()))].copy()
-if not df_ann_c.empty:
-    df_ann_c['county_name'] = df_ann_c['FIPS'].map(county_dict)
-    df_ann_c['provisional'] = False
-    county_frames.append(
-        df_ann_c[['county_name', 'Year', 'SF_permits', 'MF_permits', 'provisional']]
-    )
+# ---- Step 1: monthly dashboard table -----------------------------------------
 
-years_with_annual_c = set(df_ann_c['Year'].tolist()) if not df_ann_c.empty else set()
-
-# provisional rows summed from monthlies for window years not yet benchmarked
-df_m_c = df_monthly[(df_monthly['Level'] == 'County') &
-                    (df_monthly['Name'].isin(county_dict.values()))].copy()
-for yr in window_years:
-    if yr in years_with_annual_c:
-        continue
-    if yr not in complete_years:
-        continue
-    df_yr = df_m_c[df_m_c['Year'] == yr]
-    if df_yr.empty:
-        continue
-    agg = df_yr.groupby('Name', as_index=False)[['SF_permits', 'MF_permits']].sum()
-    agg = agg.rename(columns={'Name': 'county_name'})
-    agg['Year'] = yr
-    agg['provisional'] = True
-    county_frames.append(
-        agg[['county_name', 'Year', 'SF_permits', 'MF_permits', 'provisional']]
-    )
+# Keep the metro's counties and incorporated cities from the monthly master
+def filter_monthly(df_master, region):
+    county_list = county_names(region)
+    city_list = city_names(region)
+    return df_master[((df_master['Level'] == 'County') & (df_master['Name'].isin(county_list)))
+                     | ((df_master['Level'] == 'City/Other') & (df_master['Name'].isin(city_list)))]
 
-county_new = pd.concat(county_frames, ignore_index=True) if county_frames else \
-    pd.DataFrame(columns=['county_name', 'Year', 'SF_permits', 'MF_permits', 'provisional'])
 
+# Melt the dataframe to create rows for 'SF_permits' and 'MF_permits'
+def melt_monthly(df):
+    df_melted = pd.melt(
+        df,
+        id_vars=['year_month', 'date', 'Level', 'Name'],
+        value_vars=['SF_permits', 'MF_permits'],
+        var_name='Series',
+        value_name='Permits'
+    )
 
-# ---- Cities/places: same shape ---------------------------------------------
-city_frames = []
+    # Map the 'Series' values to meaningful names
+    df_melted['Series'] = df_melted['Series'].map({
+        'SF_permits': 'Single-Family',
+        'MF_permits': 'Multi-Family'
+    })
+    return df_melted
 
-df_ann_p = df_ann[(df_ann['Level'] == 'City/Other') &
-                  (df_ann['FIPS'].isin(city_dict.keys()))].copy()
-if not df_ann_p.empty:
-    df_ann_p['City'] = df_ann_p['FIPS'].map(city_dict)
-    df_ann_p['provisional'] = False
-    city_frames.append(
-        df_ann_p[['City', 'Year', 'SF_permits', 'MF_permits', 'provisional']]
-    )
 
-years_with_annual_p = set(df_ann_p['Year'].tolist()) if not df_ann_p.empty else set()
-
-df_m_p = df_monthly[df_monthly['Level'] == 'City/Other'].copy()
-df_m_p['Name'] = df_m_p['Name'].apply(reformat_unincorporated)
-df_m_p = df_m_p[df_m_p['Name'].isin(city_dict.values())]
-for yr in window_years:
-    if yr in years_with_annual_p:
-        continue
-    if yr not in complete_years:
-        continue
-    df_yr = df_m_p[df_m_p['Year'] == yr]
-    if df_yr.empty:
-        continue
-    agg = df_yr.groupby('Name', as_index=False)[['SF_permits', 'MF_permits']].sum()
-    agg = agg.rename(columns={'Name': 'City'})
-    agg['Year'] = yr
-    agg['provisional'] = True
-    city_frames.append(
-        agg[['City', 'Year', 'SF_permits', 'MF_permits', 'provisional']]
+# Append the Metro total (sum of the counties) to the melted monthly rows
+def add_monthly_metro(df_melted):
+    metro_totals = (
+        df_melted[df_melted['Level'] == 'County']
+        .groupby(['year_month', 'date', 'Series'], as_index=False)['Permits']
+        .sum()
     )
 
-city_new = pd.concat(city_frames, ignore_index=True) if city_frames else \
-    pd.DataFrame(columns=['City', 'Year', 'SF_permits', 'MF_permits', 'provisional'])
+    # Add "Metro" as the 'Name' and 'Level'
+    metro_totals['Name'] = 'Metro'
+    metro_totals['Level'] = 'County'
+    return pd.concat([df_melted, metro_totals], ignore_index=True)
 
 
-# ---- Build Atlanta / Metro / Fulton-less-Atlanta pseudo-county rows --------
-if not city_new.empty:
-    atl = city_new[city_new['City'] == 'Atlanta'].copy()
-    if not atl.empty:
-        atl = atl.rename(columns={'City': 'county_name'})
-        county_new = pd.concat([county_new, atl], ignore_index=True)
+# The backfilled years as monthly_master rows: filtered, melted and rolled up
+# the same way, minus any month the rolling master already covers (the master
+# is the fresher copy). Returns {year: rows}.
+def monthly_history(partitions, monthly_df, region):
+    window_start = monthly_df['year_month'].min() if len(monthly_df) else None
+    history = {}
+    for year, df_year in sorted(partitions.items()):
+        if window_start is not None:
+            df_year = df_year[df_year['year_month'] < window_start]
+        df_year = filter_monthly(df_year, region)
+        if len(df_year):
+            history[year] = add_monthly_metro(melt_monthly(df_year))
+    return history
 
-if not county_new.empty:
-    real_counties = county_new[county_new['county_name'].isin(county_dict.values())]
-    metro = (
-        real_counties
-        .groupby(['Year', 'provisional'], as_index=False)[['SF_permits', 'MF_permits']]
-        .sum()
-    )
-    metro['county_name'] = 'Metro'
-    county_new = pd.concat([county_new, metro], ignore_index=True)
-
-    fulton = county_new[county_new['county_name'] == 'Fulton'] \
-        .set_index('Year')[['SF_permits', 'MF_permits', 'provisional']]
-    atlanta = county_new[county_new['county_name'] == 'Atlanta'] \
-        .set_index('Year')[['SF_permits', 'MF_permits']]
-    if not fulton.empty and not atlanta.empty:
-        fla = fulton[['SF_permits', 'MF_permits']].subtract(atlanta, fill_value=0)
-        fla['provisional'] = fulton['provisional']
-        fla = fla.reset_index()
-        fla['county_name'] = 'Fulton less Atlanta'
-        county_new = pd.concat([county_new, fla], ignore_index=True)
-
-
-# ---- Compute 'All' series for counties and melt to long form ---------------
-if not county_new.empty:
-    county_new['All'] = county_new['SF_permits'] + county_new['MF_permits']
-    county_long = pd.melt(
-        county_new,
-        id_vars=['county_name', 'Year', 'provisional'],
-        value_vars=['SF_permits', 'MF_permits', 'All'],
-        var_name='Series',
-        value_name='Permits'
-    )
-    county_long['Series'] = county_long['Series'].map({
-        'SF_permits': 'Single-family',
-        'MF_permits': 'Multi-family',
-        'All': 'All',
-    })
-else:
-    county_long = pd.DataFrame(
-        columns=['county_name', 'Year', 'provisional', 'Series', 'Permits']
-    )
 
-if not city_new.empty:
-    city_long = pd.melt(
-        city_new,
-        id_vars=['City', 'Year', 'provisional'],
-        value_vars=['SF_permits', 'MF_permits'],
-        var_name='Series',
-        value_name='Permits'
+# -----------------------------------------------------------------------------
+# Step 2: the annual dashboard tables.
+#
+# Replaces the standalone annual_update.ipynb. Each monthly run:
+#   - pulls benchmarked annual rows for years where the BPS annual file exists
+#     (from BPS_<state>_annual.csv, produced by fetch_permits.py::annual_permits_fetch)
+#   - fills gaps (current year, prior year pre-May-14) with summed monthlies,
+#     marking those rows provisional=True
+#   - preserves pre-window rows from the existing dashboard CSVs
+#     (history before the rolling 3-year window never changes)
+# -----------------------------------------------------------------------------
+
+def window_years(current_year=None):
+    current_year = current_year or datetime.now().year
+    return list(range(current_year - (ROLLING_WINDOW - 1), current_year + 1))
+
+
+# Years for which December monthly data is in hand. A provisional year is only
+# emitted once it's fully complete; otherwise a partial year — e.g. Jan-only in
+# April — would render as a cliff-edge drop on the annual charts.
+def complete_years(df_monthly):
+    months_seen = (
+        df_monthly['year_month'].astype(str).str[-2:]
+        .groupby(df_monthly['Year']).apply(set)
     )
-    city_long['Series'] = city_long['Series'].map({
-        'SF_permits': 'Single-family',
-        'MF_permits': 'Multi-family',
-    })
-else:
-    city_long = pd.DataFrame(columns=['City', 'Year', 'provisional', 'Series', 'Permits'])
+    return {int(y) for y, months in months_seen.items() if '12' in months}
+
+
+# Benchmarked rows for one level, then provisional rows summed from monthlies for
+# window years not yet benchmarked. `names` maps FIPS -> display name.
+def _window_rows(df_ann, df_m, names, key_col, years, complete):
+    frames = []
+
+    df_ann = df_ann[df_ann['FIPS'].isin(names.keys())].copy()
+    if not df_ann.empty:
+        df_ann[key_col] = df_ann['FIPS'].map(names)
+        df_ann['provisional'] = False
+        frames.append(df_ann[[key_col, 'Year', 'SF_permits', 'MF_permits', 'provisional']])
+
+    years_with_annual = set(df_ann['Year'].tolist()) if not df_ann.empty else set()
+
+    df_m = df_m[df_m['Name'].isin(names.values())]
+    for yr in years:
+        if yr in years_with_annual:
+            continue
+        if yr not in complete:
+            continue
+        df_yr = df_m[df_m['Year'] == yr]
+        if df_yr.empty:
+            continue
+        agg = df_yr.groupby('Name', as_index=False)[['SF_permits', 'MF_permits']].sum()
+        agg = agg.rename(columns={'Name': key_col})
+        agg['Year'] = yr
+        agg['provisional'] = True
+        frames.append(agg[[key_col, 'Year', 'SF_permits', 'MF_permits', 'provisional']])
+
+    return pd.concat(frames, ignore_index=True) if frames else \
+        pd.DataFrame(columns=[key_col, 'Year', 'SF_permits', 'MF_permits', 'provisional'])
+
+
+# County and city rows for the rolling window, benchmarked where available
+def fill_annual_window(df_master, df_ann, region, years):
+    df_monthly = df_master.copy()
+    df_monthly['Year'] = df_monthly['year_month'].astype(str).str[:4].astype(int)
+    complete = complete_years(df_monthly)
+
+    county_new = _window_rows(
+        df_ann[df_ann['Level'] == 'County'],
+        df_monthly[df_monthly['Level'] == 'County'],
+        region['counties'], 'county_name', years, complete)
+
+    df_m_p = df_monthly[df_monthly['Level'] == 'City/Other'].copy()
+    df_m_p['Name'] = df_m_p['Name'].apply(reformat_unincorporated)
+    city_new = _window_rows(
+        df_ann[df_ann['Level'] == 'City/Other'], df_m_p,
+        region['cities'], 'City', years, complete)
+    return county_new, city_new
+
+
+# Core-city / Metro / county-less-core-city pseudo-county rows
+# (Atlanta, Metro and Fulton less Atlanta for the Atlanta dashboard)
+def add_pseudo_counties(county_new, city_new, region):
+    core_city, core_county = region.get('core_city') or (None, None)
+    if core_city and not city_new.empty:
+        atl = city_new[city_new['City'] == core_city].copy()
+        if not atl.empty:
+            atl = atl.rename(columns={'City': 'county_name'})
+            county_new = pd.concat([county_new, atl], ignore_index=True)
+
+    if not county_new.empty:
+        real_counties = county_new[county_new['county_name'].isin(region['counties'].values())]
+        metro = (
+            real_counties
+            .groupby(['Year', 'provisional'], as_index=False)[['SF_permits', 'MF_permits']]
+            .sum()
+        )
+        metro['county_name'] = 'Metro'
+        county_new = pd.concat([county_new, metro], ignore_index=True)
+
+        fulton = county_new[county_new['county_name'] == core_county] \
+            .set_index('Year')[['SF_permits', 'MF_permits', 'provisional']]
+        atlanta = county_new[county_new['county_name'] == core_city] \
+            .set_index('Year')[['SF_permits', 'MF_permits']]
+        if core_city and not fulton.empty and not atlanta.empty:
+            fla = fulton[['SF_permits', 'MF_permits']].subtract(atlanta, fill_value=0)
+            fla['provisional'] = fulton['provisional']
+            fla = fla.reset_index()
+            fla['county_name'] = f'{core_county} less {core_city}'
+            county_new = pd.concat([county_new, fla], ignore_index=True)
+    return county_new
+
+
+# Compute the 'All' series for counties and melt both levels to long form
+def melt_annual(county_new, city_new):
+    if not county_new.empty:
+        county_new = county_new.copy()
+        county_new['All'] = county_new['SF_permits'] + county_new['MF_permits']
+        county_long = pd.melt(
+            county_new,
+            id_vars=['county_name', 'Year', 'provisional'],
+            value_vars=['SF_permits', 'MF_permits', 'All'],
+            var_name='Series',
+            value_name='Permits'
+        )
+        county_long['Series'] = county_long['Series'].map({
+            'SF_permits': 'Single-family',
+            'MF_permits': 'Multi-family',
+            'All': 'All',
+        })
+    else:
+        county_long = pd.DataFrame(
+            columns=['county_name', 'Year', 'provisional', 'Series', 'Permits']
+        )
+
+    if not city_new.empty:
+        city_long = pd.melt(
+            city_new,
+            id_vars=['City', 'Year', 'provisional'],
+            value_vars=['SF_permits', 'MF_permits'],
+            var_name='Series',
+            value_name='Permits'
+        )
+        city_long['Series'] = city_long['Series'].map({
+            'SF_permits': 'Single-family',
+            'MF_permits': 'Multi-family',
+        })
+    else:
+        city_long = pd.DataFrame(columns=['City', 'Year', 'provisional', 'Series', 'Permits'])
+    return county_long, city_long
 
 
-# ---- Merge with preserved pre-window history and write ---------------------
-def _merge_preserved(new_df, existing_path, key_col):
-    if os.path.exists(existing_path):
-        old = pd.read_csv(existing_path)
+# Merge the rebuilt window with preserved pre-window history from `old`, the
+# existing dashboard table (None on a first build)
+def merge_preserved(new_df, old, key_col, window_start):
+    if old is not None:
+        old = old.copy()
         if 'provisional' not in old.columns:
             old['provisional'] = False
         old_pre = old[old['Year'] < window_start]
@@ -436,17 +316,345 @@ def _merge_preserved(new_df, existing_path, key_col):
     return combined.sort_values(by=[key_col, 'Year', 'Series']).reset_index(drop=True)
 
 
-county_final = _merge_preserved(
-    county_long, os.path.join(DASHBOARD_DIR, 'annual_county.csv'), 'county_name')
-city_final = _merge_preserved(
-    city_long, os.path.join(DASHBOARD_DIR, 'annual_city.csv'), 'City')
-
-# metro_total_annual is derived from the Metro "All" row in county_final
-metro_src = county_final[(county_final['county_name'] == 'Metro') &
-                         (county_final['Series'] == 'All')]
-metro_final = metro_src[['Year', 'Permits', 'provisional']] \
-    .sort_values('Year').reset_index(drop=True)
-
-county_final.to_csv(os.path.join(DASHBOARD_DIR, 'annual_county.csv'), index=False)
-city_final.to_csv(os.path.join(DASHBOARD_DIR, 'annual_city.csv'), index=False)
-metro_final.to_csv(os.path.join(DASHBOARD_DIR, 'metro_total_annual.csv'), index=False)
+# metro_total_annual is derived from the Metro "All" row in annual_county
+def metro_total_annual(county_final):
+    metro_src = county_final[(county_final['county_name'] == 'Metro') &
+                             (county_final['Series'] == 'All')]
+    return metro_src[['Year', 'Permits', 'provisional']] \
+        .sort_values('Year').reset_index(drop=True)
+
+
+# Running permit totals per (table, jurisdiction, series), in period order, for
+# the views' "total since X" figures: the sum over periods >= X is the last
+# running total minus the one just before X. Monthly rows are split by level
+# ('monthly_county' holds the counties and Metro, 'monthly_city' the rest).
+def cumulative_totals(monthly_master, county_final, city_final):
+    monthly_table = monthly_master['Level'].map({'County': 'monthly_county'}).fillna('monthly_city')
+    parts = [
+        county_final.rename(columns={'county_name': 'Name', 'Year': 'Period'})
+        .assign(Table='annual_county'),
+        city_final.rename(columns={'City': 'Name', 'Year': 'Period'}).assign(Table='annual_city'),
+        monthly_master.rename(columns={'year_month': 'Period'}).assign(Table=monthly_table),
+    ]
+    keys = ['Table', 'Name', 'Series']
+    df = pd.concat([part[keys + ['Period', 'Permits']] for part in parts], ignore_index=True)
+    df = df.sort_values(keys + ['Period'], kind='stable', ignore_index=True)
+    df['Cumulative'] = df.groupby(keys, sort=False)['Permits'].cumsum().astype('int64')
+    return df.drop(columns='Permits')
+
+
+@timed('build dashboard tables')
+def build_dashboard_tables(monthly_df, annual_df, existing_tables=None, region=None,
+                           current_year=None, timings=None, backfill=None):
+    """Build one metro's four dashboard tables, and their aggregates, from its
+    raw masters.
+
+    `monthly_df` and `annual_df` are the state's monthly and annual masters (as
+    written by fetch_permits.py; `annual_df` may be None before the first annual
+    file is published). `existing_tables` maps table name -> the current
+    dashboard table, whose pre-window history is carried over. `backfill` maps
+    year -> that year's backfilled monthly rows (see read_backfill()). Returns a
+    dict keyed by TABLES + AGGREGATES, plus HISTORY: {year: monthly rows}. If
+    `timings` is a dict, each stage's wall time in seconds is added to it.
+    """
+    region = region or get_region()
+    existing_tables = existing_tables or {}
+    timings = {} if timings is None else timings
+
+    def stage(name, fn, *args):
+        start = time.perf_counter()
+        with span(name, region=region['title']):
+            result = fn(*args)
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        return result
+
+    if annual_df is None:
+        annual_df = pd.DataFrame(columns=ANNUAL_MASTER_COLUMNS)
+    else:
+        annual_df = annual_df.copy()
+        annual_df['FIPS'] = annual_df['FIPS'].astype(str)
+        annual_df['Year'] = annual_df['Year'].astype(int)
+
+    df = stage('filter', filter_monthly, monthly_df, region)
+    df_melted = stage('melt monthly', melt_monthly, df)
+    monthly_master = stage('monthly metro roll-up', add_monthly_metro, df_melted)
+    history = stage('monthly history', monthly_history, backfill or {}, monthly_df, region)
+
+    years = window_years(current_year)
+    county_new, city_new = stage('provisional fill', fill_annual_window,
+                                 monthly_df, annual_df, region, years)
+    county_new = stage('pseudo-counties', add_pseudo_counties, county_new, city_new, region)
+    county_long, city_long = stage('melt annual', melt_annual, county_new, city_new)
+
+    county_final = stage('merge preserved counties', merge_preserved, county_long,
+                         existing_tables.get('annual_county'), 'county_name', years[0])
+    city_final = stage('merge preserved cities', merge_preserved, city_long,
+                       existing_tables.get('annual_city'), 'City', years[0])
+    metro_final = stage('annual metro total', metro_total_annual, county_final)
+    totals = stage('cumulative totals', cumulative_totals, monthly_master, county_final, city_final)
+
+    return {
+        'monthly_master': monthly_master,
+        'annual_county': county_final,
+        'annual_city': city_final,
+        'metro_total_annual': metro_final,
+        'cumulative_totals': totals,
+        HISTORY: history,
+    }
+
+
+# ---- Reading and writing -------------------------------------------------------
+
+def dashboard_dir(region):
+    return os.path.join(REPO_ROOT, region['data_dir'])
+
+
+# The state's monthly master and (once published) its annual master
+@timed('read masters')
+def read_masters(region):
+    monthly_df = pd.read_csv(os.path.join(RAW_DIR, f"BPS_{region['state_abbr']}.csv"))
+    annual_path = os.path.join(RAW_DIR, f"BPS_{region['state_abbr']}_annual.csv")
+    annual_df = pd.read_csv(annual_path, dtype={'FIPS': str}) \
+        if os.path.exists(annual_path) else None
+    return monthly_df, annual_df
+
+
+# The state's backfilled years, {year: monthly rows}; {} if it was never backfilled
+@timed('read backfill')
+def read_backfill(region):
+    prefix = f"BPS_{region['state_abbr']}_"
+    if not os.path.isdir(BACKFILL_DIR):
+        return {}
+    partitions = {}
+    for file in sorted(os.listdir(BACKFILL_DIR)):
+        year = file[len(prefix):-len('.csv')]
+        if file.startswith(prefix) and file.endswith('.csv') and year.isdigit():
+            partitions[int(year)] = pd.read_csv(os.path.join(BACKFILL_DIR, file))
+    return partitions
+
+
+# The current annual tables, whose pre-window history the build preserves
+@timed('read existing tables')
+def read_existing_tables(region):
+    tables = {}
+    for name in ('annual_county', 'annual_city'):
+        path = os.path.join(dashboard_dir(region), f'{name}.csv')
+        if os.path.exists(path):
+            tables[name] = pd.read_csv(path)
+    return tables
+
+
+def to_columnar(df):
+    return df.astype({col: kind for col, kind in COLUMNAR_TYPES.items() if col in df.columns})
+
+
+@timed('write tables')
+def write_tables(tables, region):
+    os.makedirs(dashboard_dir(region), exist_ok=True)
+    for name in TABLES:
+        path = os.path.join(dashboard_dir(region), name)
+        tables[name].to_csv(f'{path}.csv', index=False)
+        to_columnar(tables[name]).to_parquet(f'{path}.parquet', index=False)
+    for name in AGGREGATES:
+        path = os.path.join(dashboard_dir(region), f'{name}.parquet')
+        to_columnar(tables[name]).to_parquet(path, index=False)
+    write_history(tables.get(HISTORY, {}), region)
+    bundles = write_bundles(tables, region)
+    write_manifest(tables, region, bundles)
+
+
+def history_dir(region):
+    return os.path.join(dashboard_dir(region), HISTORY)
+
+
+# One Parquet file per year; years no longer in the history are removed
+def write_history(history, region):
+    out_dir = history_dir(region)
+    files = {f'{year}.parquet' for year in history}
+    if os.path.isdir(out_dir):
+        for file in set(os.listdir(out_dir)) - files:
+            os.remove(os.path.join(out_dir, file))
+    if not history:
+        if os.path.isdir(out_dir):
+            os.rmdir(out_dir)
+        return
+    os.makedirs(out_dir, exist_ok=True)
+    for year, df in history.items():
+        to_columnar(df).to_parquet(os.path.join(out_dir, f'{year}.parquet'), index=False)
+
+
+def bundle_dir(region):
+    return os.path.join(REPO_ROOT, 'static', region['data_dir'])
+
+
+def _zip_csv(archive, path, df):
+    # fixed timestamps and permissions, so unchanged data zips to the same bytes
+    info = zipfile.ZipInfo(path, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    archive.writestr(info, df.to_csv(index=False))
+
+
+# One metro's bulk downloads, from the tables write_tables() just wrote.
+# Returns {file name: sha256} for the manifest.
+@timed('write bundles')
+def write_bundles(tables, region):
+    out_dir = bundle_dir(region)
+    os.makedirs(out_dir, exist_ok=True)
+    files = []
+    for name in TABLES:
+        # byte-for-byte the Parquet copy the app reads
+        shutil.copyfile(os.path.join(dashboard_dir(region), f'{name}.parquet'),
+                        os.path.join(out_dir, f'{name}.parquet'))
+        files.append(f'{name}.parquet')
+
+    with zipfile.ZipFile(os.path.join(out_dir, BUNDLE_ZIP), 'w') as archive:
+        _zip_csv(archive, 'metro_total_annual.csv', tables['metro_total_annual'])
+        for name, folders in BUNDLE_FOLDERS.items():
+            df = tables[name]
+            for folder, column, level in folders:
+                rows = df if level is None else df[df['Level'] == level]
+                for jurisdiction, group in sorted(rows.groupby(column), key=lambda item: str(item[0])):
+                    _zip_csv(archive, f'{folder}/{jurisdiction}.csv', group)
+    files.append(BUNDLE_ZIP)
+
+    sums = {file: file_sha256(os.path.join(out_dir, file)) for file in files}
+    with open(os.path.join(out_dir, BUNDLE_SUMS), 'w') as f:
+        f.writelines(f'{sha}  {file}\n' for file, sha in sums.items())
+    return sums
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def table_files(name):
+    return [f'{name}.csv', f'{name}.parquet'] if name in TABLES else [f'{name}.parquet']
+
+
+def describe_table(df):
+    """Row count, date ranges and provisional years of one table."""
+    entry = {'rows': len(df)}
+    for col in ('Year', 'year_month'):
+        if col in df.columns and len(df):
+            entry[col] = [int(df[col].min()), int(df[col].max())]
+    if 'provisional' in df.columns:
+        entry['provisional_years'] = sorted(int(y) for y in df.loc[df['provisional'].astype(bool), 'Year'].unique())
+    return entry
+
+
+# Records what write_tables() just wrote. `version` changes exactly when some
+# file's contents do; `built_at` is only moved forward then, so a refresh that
+# changes nothing leaves the manifest (and the repo) untouched.
+def write_manifest(tables, region, bundles=None):
+    data_dir = dashboard_dir(region)
+    entries = {}
+    for name in TABLES + AGGREGATES:
+        entry = describe_table(tables[name])
+        entry['files'] = {file: file_sha256(os.path.join(data_dir, file)) for file in table_files(name)}
+        # the Parquet copy is what the app reads, so it's the table's version
+        entry['version'] = entry['files'][f'{name}.parquet'][:16]
+        entries[name] = entry
+    history = {}
+    for year, df in sorted(tables.get(HISTORY, {}).items()):
+        entry = describe_table(df)
+        entry['file'] = file_sha256(os.path.join(history_dir(region), f'{year}.parquet'))
+        entry['version'] = entry['file'][:16]
+        history[str(year)] = entry
+    versions = [entries[name]['version'] for name in entries] + [e['version'] for e in history.values()]
+    version = hashlib.sha256(''.join(versions).encode()).hexdigest()[:16]
+
+    path = os.path.join(data_dir, MANIFEST)
+    previous = read_manifest(region)
+    built_at = previous.get('built_at') if previous.get('version') == version else None
+    manifest = {
+        'version': version,
+        'built_at': built_at or datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+        'region': region['title'],
+        'tables': entries,
+        'bundles': bundles or {},
+    }
+    if history:
+        manifest[HISTORY] = history
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    return manifest
+
+
+def read_manifest(region):
+    path = os.path.join(dashboard_dir(region), MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def verify_manifest(region):
+    """Files in the metro's data_dir whose contents don't match its manifest."""
+    manifest = read_manifest(region)
+    if not manifest:
+        return [f"{region['data_dir']}/{MANIFEST} is missing"]
+    problems = []
+    for name, entry in manifest['tables'].items():
+        for file, sha in entry['files'].items():
+            path = os.path.join(dashboard_dir(region), file)
+            if not os.path.exists(path):
+                problems.append(f"{region['data_dir']}/{file} is missing")
+            elif file_sha256(path) != sha:
+                problems.append(f"{region['data_dir']}/{file} does not match {MANIFEST}")
+    for year, entry in manifest.get(HISTORY, {}).items():
+        file = f'{HISTORY}/{year}.parquet'
+        path = os.path.join(dashboard_dir(region), file)
+        if not os.path.exists(path):
+            problems.append(f"{region['data_dir']}/{file} is missing")
+        elif file_sha256(path) != entry['file']:
+            problems.append(f"{region['data_dir']}/{file} does not match {MANIFEST}")
+    for file, sha in manifest.get('bundles', {}).items():
+        path = os.path.join(bundle_dir(region), file)
+        shown = os.path.relpath(path, REPO_ROOT)
+        if not os.path.exists(path):
+            problems.append(f'{shown} is missing')
+        elif file_sha256(path) != sha:
+            problems.append(f'{shown} does not match {MANIFEST}')
+    return problems
+
+
+# Build one metro's four dashboard CSVs from its state's raw masters.
+def build_region(region, timings=None):
+    monthly_df, annual_df = read_masters(region)
+    tables = build_dashboard_tables(monthly_df, annual_df, read_existing_tables(region),
+                                    region, timings=timings, backfill=read_backfill(region))
+    write_tables(tables, region)
+    print(f"built {region['title']} dashboard tables in {region['data_dir']}/")
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the dashboard CSVs from the raw masters.')
+    parser.add_argument('--region', action='append', choices=sorted(REGIONS),
+                        help='only build this metro (repeatable; default: every metro)')
+    parser.add_argument('--timings', action='store_true',
+                        help='print how long each build stage took')
+    parser.add_argument('--verify', action='store_true',
+                        help="don't build; check the tables on disk against each metro's manifest")
+    args = parser.parse_args()
+    if args.verify:
+        problems = [p for key in args.region or REGIONS for p in verify_manifest(get_region(key))]
+        for problem in problems:
+            print(problem)
+        sys.exit(1 if problems else 0)
+    for key in args.region or REGIONS:
+        timings = {}
+        build_region(get_region(key), timings)
+        if args.timings:
+            for name, seconds in timings.items():
+                print(f'  {name:<26}{seconds * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Local stand-in for www2.census.gov/econ/bps, for exercising fetch_permits.py
+without touching the real Census servers.
+
+Serves a directory laid out like the BPS site (County/co2501c.txt,
+Place/South Region/so2501c.txt, ...) with optional per-request latency, so the
+effect of parallel downloads can be measured on a laptop. Like the real site it
+sends ETag/Last-Modified and answers If-None-Match/If-Modified-Since with 304,
+which is what backend/raw_cache.py relies on:
+
+  python backend/census_stub.py path/to/mirror --port 8765 --latency 0.25
+  BPS_BASE_URL=http://127.0.0.1:8765 python backend/fetch_permits.py
+
+It can also misbehave on purpose, to exercise the retry and circuit-breaker
+logic in backend/http_client.py. Each fault rate is a per-request probability:
+
+  --error-rate 0.2      answer 503
+  --reset-rate 0.1      drop the connection without answering
+  --truncate-rate 0.1   send half the body under a full Content-Length
+  --hang-rate 0.05      stall for --hang seconds before answering
+  --fail-first 2        503 the first 2 requests for every path, then behave
+  --fail-as reset       ...or drop or truncate them instead (error|reset|truncate)
+  --down                503 everything, as during a Census outage
+"""
+
+import os
+import time
+import random
+import argparse
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(SimpleHTTPRequestHandler):
+    latency = 0.0
+    faults = {}
+    seen = None         # path -> requests so far, for --fail-first
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self._inject_fault():
+            return
+        super().do_GET()
+
+    # Returns True when the request was answered (or dropped) by a fault.
+    def _inject_fault(self):
+        faults = self.faults
+        with self.lock:
+            self.seen[self.path] = count = self.seen.get(self.path, 0) + 1
+        first = faults.get('fail_as', 'error') if count <= faults.get('fail_first', 0) else None
+        if faults.get('down') or first == 'error' or random.random() < faults.get('error_rate', 0):
+            self.send_error(503, 'injected fault')
+            return True
+        if first == 'reset' or random.random() < faults.get('reset_rate', 0):
+            self.close_connection = True
+            return True
+        if random.random() < faults.get('hang_rate', 0):
+            time.sleep(faults.get('hang', 120))
+        if first == 'truncate' or random.random() < faults.get('truncate_rate', 0):
+            f = self.send_head()
+            if f:
+                with f:
+                    body = f.read()
+                self.wfile.write(body[:len(body) // 2])
+                self.close_connection = True
+            return True
+        return False
+
+    def send_head(self):
+        self._etag = None
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            self._etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            if self.headers.get('If-None-Match') == self._etag:
+                self.send_response(304)
+                self.end_headers()
+                return None
+        # falls through to the stock handler, which covers If-Modified-Since
+        return super().send_head()
+
+    def end_headers(self):
+        if getattr(self, '_etag', None):
+            self.send_header('ETag', self._etag)
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory, port=8765, latency=0.0, **faults):
+    handler = type('Handler', (StubHandler,), {'latency': latency, 'faults': faults,
+                                               'seen': {}, 'lock': threading.Lock()})
+    server = ThreadingHTTPServer(('127.0.0.1', port), partial(handler, directory=directory))
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local BPS mirror.')
+    parser.add_argument('directory', help='root of the mirrored econ/bps tree')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds of delay added to every request')
+    for name in ('error', 'reset', 'truncate', 'hang'):
+        parser.add_argument(f'--{name}-rate', type=float, default=0.0, metavar='P')
+    parser.add_argument('--hang', type=float, default=120.0,
+                        help='seconds a hung request stalls (default 120)')
+    parser.add_argument('--fail-first', type=int, default=0, metavar='N')
+    parser.add_argument('--fail-as', choices=('error', 'reset', 'truncate'), default='error',
+                        help='how the first N requests per path fail (default: 503)')
+    parser.add_argument('--down', action='store_true')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    faults = {k: v for k, v in vars(args).items()
+              if k.endswith('_rate') or k in ('hang', 'fail_first', 'fail_as', 'down')}
+    server = serve(os.path.abspath(args.directory), args.port, args.latency, **faults)
+    print(f'serving {args.directory} on http://127.0.0.1:{args.port} '
+          f'(latency {args.latency:.2f}s)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
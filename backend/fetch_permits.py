@@ -1,28 +1,80 @@
 """Fetch BPS building-permit data from the Census Bureau and write the two
-"master" CSVs the dashboard pipeline consumes.
+"master" CSVs per state that the dashboard pipeline consumes.
 
 This is the in-repo replacement for the building-permit half of the external
 `Monthly Data Pull/data_pull.py`. It pulls from public Census endpoints (no API
 key required), so it runs unattended in GitHub Actions.
 
-Outputs (relative to the repo root):
+Which states are fetched comes from the metros in backend/regions.py. The
+national county file and each Census region's place file are downloaded and
+parsed once, whatever the number of states or metros, and then split by state.
+
+Outputs (relative to the repo root), one set per configured state:
   Data/raw/BPS_GA.csv         - rolling 18-month monthly master
   Data/raw/BPS_GA_annual.csv  - rolling 3-year benchmarked annual master
+  Data/raw/monthly/           - per-year monthly history, from `--backfill`
 
 Run `python backend/fetch_permits.py`, then `python backend/backend_query.py`
-to rebuild the four dashboard CSVs in Data/.
+to rebuild the four dashboard CSVs in Data/ (or `python backend/pipeline.py` to
+do both in one process).
+
+Files are downloaded in parallel (`--workers`, default 8). Set BPS_BASE_URL to
+point the fetch at a local mirror, e.g. backend/census_stub.py. Raw responses are
+kept in the conditional-GET cache in backend/raw_cache.py unless `--no-cache`
+is given, so unchanged months cost a 304 and are never re-parsed.
+
+Downloads go through backend/http_client.py: a 404 means "not yet published",
+while timeouts, resets and 5xx are retried with backoff. If a file still can't
+be fetched, the run stops without writing anything rather than treating the
+file as a missing month.
 """
 
+import io
 import os
+import csv
+import json
+import sys
+import argparse
+from urllib.parse import quote
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
+from raw_cache import RawCache
+from http_client import HttpClient, NotPublished, DownloadError, RETRIES
+from regions import CENSUS_REGION_PREFIXES, configured_states
+from spans import span, timed
 
 # Resolve output paths relative to this file so the script works from any cwd.
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 RAW_DIR = os.path.join(REPO_ROOT, 'Data', 'raw')
-MONTHLY_MASTER = os.path.join(RAW_DIR, 'BPS_GA.csv')
-ANNUAL_MASTER = os.path.join(RAW_DIR, 'BPS_GA_annual.csv')
+# url -> SHA-256 of each source file behind the rows in the monthly masters
+MONTHLY_SOURCES = os.path.join(RAW_DIR, 'BPS_sources.json')
+# full monthly history, one CSV per state and year, plus the finished years
+BACKFILL_DIR = os.path.join(RAW_DIR, 'monthly')
+BACKFILL_CHECKPOINT = os.path.join(BACKFILL_DIR, 'checkpoint.json')
+
+
+def monthly_master_path(state_abbr):
+    return os.path.join(RAW_DIR, f'BPS_{state_abbr}.csv')
+
+
+def annual_master_path(state_abbr):
+    return os.path.join(RAW_DIR, f'BPS_{state_abbr}_annual.csv')
+
+
+# Census BPS root; overridable so the fetch can run against a local stand-in.
+BASE_URL = os.environ.get('BPS_BASE_URL', 'https://www2.census.gov/econ/bps').rstrip('/')
+COUNTY_URL = BASE_URL + '/County/co{code}{kind}.txt'
+PLACE_URL = BASE_URL + '/Place/{region}/{prefix}{code}{kind}.txt'
+
+# Number of files downloaded at once. Census serves each file in well under a
+# second, so a handful of workers hides nearly all of the round-trip latency.
+DEFAULT_WORKERS = int(os.environ.get('BPS_FETCH_WORKERS', '8'))
+
+# Shared by every download in the run, so its circuit breaker sees the whole
+# host and its per-URL stats cover the run; main() sets retries and timeout.
+CLIENT = HttpClient()
 
 
 # Building permits -$-$-$-$-$-$-$-$-$-$-$-$-$-$-$-$-$-$-$-$-$-$-$-$
@@ -63,267 +115,529 @@ def code_to_date(code):
     return datetime(year, month, 1).strftime('%b %Y')
 
 
-# Function to load and process county data
-def load_county_data(url):
-    df = pd.read_csv(url, skiprows=1)
-    df = df.rename(columns={
-        'Date': 'year_month',
-        'Units': 'SF_permits',
-        'Value': 'SF_value',
-        'Units.1': '2U_permits',
-        'Value.1': '2U_value',
-        'Units.2': '3-4U_permits',
-        'Value.2': '3-4U_value',
-        'Units.3': '5+U_permits',
-        'Value.3': '5+U_value',
-    })
-
-    # Create FIPS and county_name columns
-    df['FIPS'] = df['State'].astype(str).str.zfill(
-        2) + df['County'].astype(str).str.zfill(3)
-    df['Name'] = df['Name'].str.replace(' County', '')
-
-    # Apply code_to_date function to year_month and add as date column
-    df['date'] = df['year_month'].apply(code_to_date)
-
-    df['Level'] = 'County'
-    df['MF_permits'] = df['2U_permits'] + \
-        df['3-4U_permits'] + df['5+U_permits']
-    df['MF_value'] = df['2U_value'] + \
-        df['3-4U_value'] + df['5+U_value']
-
-    # Filter and rearrange columns
-    df = df[df['FIPS'].astype(str).str.startswith('13')]
-    df = df[[
-        'year_month',
-        'date',
-        'Level',
-        'Name',
-        'SF_permits',
-        'SF_value',
-        'MF_permits',
-        'MF_value',
-        '2U_permits',
-        '2U_value',
-        '3-4U_permits',
-        '3-4U_value',
-        '5+U_permits',
-        '5+U_value'
-    ]]
-
+# ---- BPS text-file parser ---------------------------------------------------
+# Every BPS file has two header lines (column groups, then column names) and one
+# row per jurisdiction for the whole region (or nation, for counties). Only the
+# configured states are wanted, so the file is streamed in chunks and filtered on
+# the numeric State code before any string work; only the columns below are parsed.
+ALL_STATES = tuple(state['fips'] for state in configured_states())
+CHUNK_ROWS = 20_000
+
+# source column (after pandas-style de-duplication of the names row) -> output
+UNIT_COLUMNS = {
+    'Units': 'SF_permits',
+    'Value': 'SF_value',
+    'Units.1': '2U_permits',
+    'Value.1': '2U_value',
+    'Units.2': '3-4U_permits',
+    'Value.2': '3-4U_value',
+    'Units.3': '5+U_permits',
+    'Value.3': '5+U_value',
+}
+ID_COLUMNS = {
+    'County': {'Date': 'date_code', 'State': 'State', 'County': 'County', 'Name': 'Name'},
+    'City/Other': {'Date': 'date_code', 'Code': 'State', 'Code.1': 'County', 'ID': 'ID', 'Name': 'Name'},
+}
+NAME_SUFFIX = {'County': ' County', 'City/Other': ' town'}
+
+# Loaders also return State, which split_by_state() drops when fanning out.
+MONTHLY_COLUMNS = ['year_month', 'date', 'Level', 'Name',
+                   'SF_permits', 'SF_value', 'MF_permits', 'MF_value',
+                   '2U_permits', '2U_value', '3-4U_permits', '3-4U_value',
+                   '5+U_permits', '5+U_value', 'State']
+ANNUAL_COLUMNS = ['Year', 'Level', 'Name', 'FIPS',
+                  'SF_permits', 'SF_value', 'MF_permits', 'MF_value',
+                  '2U_permits', '2U_value', '3-4U_permits', '3-4U_value',
+                  '5+U_permits', '5+U_value', 'State']
+
+
+def _dedupe_names(names):
+    # match pandas' header mangling: the second 'Units' becomes 'Units.1', etc.
+    seen = {}
+    out = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            out.append(f'{name}.{seen[name]}')
+        else:
+            seen[name] = 0
+            out.append(name)
+    return out
+
+
+def _open_text(source):
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    if isinstance(source, str) and source.startswith(('http://', 'https://')):
+        source = io.BytesIO(CLIENT.get(source).body)
+    if isinstance(source, str):
+        return open(source, encoding='latin-1', newline='')
+    if hasattr(source, 'encoding'):
+        return source
+    return io.TextIOWrapper(source, encoding='latin-1', newline='')
+
+
+def read_bps_file(source, level, states=ALL_STATES):
+    """Parse one BPS county or place file down to a compact frame of rows for
+    the given state FIPS codes.
+
+    Returns date_code, State, County, (ID), Name plus the unit/value columns;
+    counts are int32, values int64 and Name is categorical.
+    """
+    wanted = {**ID_COLUMNS[level], **UNIT_COLUMNS}
+    with _open_text(source) as f:
+        f.readline()
+        names = _dedupe_names(next(csv.reader([f.readline()])))
+        positions = {names.index(col): out for col, out in wanted.items() if col in names}
+        dtypes = {pos: ('int64' if out.endswith('_value') else
+                        'str' if out == 'Name' else 'int32')
+                  for pos, out in positions.items()}
+        state_pos = next(pos for pos, out in positions.items() if out == 'State')
+        reader = pd.read_csv(f, header=None, usecols=list(positions), dtype=dtypes,
+                             chunksize=CHUNK_ROWS)
+        chunks = [chunk[chunk[state_pos].isin(states)] for chunk in reader]
+
+    df = pd.concat(chunks, ignore_index=True).rename(columns=positions)
+    df['Name'] = (df['Name'].str.strip().str.replace(NAME_SUFFIX[level], '')
+                  .astype('category'))
+    df['MF_permits'] = df['2U_permits'] + df['3-4U_permits'] + df['5+U_permits']
+    df['MF_value'] = df['2U_value'] + df['3-4U_value'] + df['5+U_value']
+    df['Level'] = level
     return df
 
 
-# Function to load and process place (i.e., city) data
-def load_place_data(url):
-    df = pd.read_csv(url, skiprows=1)
-    df = df.rename(columns={
-        'Date': 'year_month',
-        'Code': 'State',
-        'Code.1': 'County',
-        'Units': 'SF_permits',
-        'Value': 'SF_value',
-        'Units.1': '2U_permits',
-        'Value.1': '2U_value',
-        'Units.2': '3-4U_permits',
-        'Value.2': '3-4U_value',
-        'Units.3': '5+U_permits',
-        'Value.3': '5+U_value'
-    })
-
-    # Create FIPS column and filter on it
-    df['FIPS'] = df['State'].astype(str).str.zfill(
-        2) + df['County'].astype(str).str.zfill(3)
-    df = df[df['FIPS'].astype(str).str.startswith('13')]
-
-    # Remove instances of "town" if it exists
-    df['Name'] = df['Name'].str.replace(' town', '')
-
-    # Apply code_to_date function to year_month and add as date column
-    df['date'] = df['year_month'].apply(code_to_date)
-
-    df['Level'] = 'City/Other'
-    df['MF_permits'] = df['2U_permits'] + \
-        df['3-4U_permits'] + df['5+U_permits']
-    df['MF_value'] = df['2U_value'] + \
-        df['3-4U_value'] + df['5+U_value']
-
-    # Select and arrange columns
-    df = df[[
-        'year_month',
-        'date',
-        'Level',
-        'Name',
-        'SF_permits',
-        'SF_value',
-        'MF_permits',
-        'MF_value',
-        '2U_permits',
-        '2U_value',
-        '3-4U_permits',
-        '3-4U_value',
-        '5+U_permits',
-        '5+U_value'
-    ]]
+def _fips(df):
+    # 2-digit state + 3-digit county (+ 6-digit place ID), built as one integer
+    if 'ID' in df.columns:
+        fips, width = (df['State'].astype('int64') * 1_000_000_000
+                       + df['County'].astype('int64') * 1_000_000 + df['ID']), 11
+    else:
+        fips, width = df['State'].astype('int64') * 1_000 + df['County'], 5
+    return fips.astype(str).str.zfill(width)
 
-    return df
 
+def _monthly(df):
+    df = df.rename(columns={'date_code': 'year_month'})
+    df['year_month'] = df['year_month'].astype('int64')
+    labels = {code: code_to_date(code) for code in df['year_month'].unique()}
+    df['date'] = df['year_month'].map(labels)
+    return df[MONTHLY_COLUMNS]
 
-# Function to load and process annual county data
-def load_county_annual(url, year):
-    df = pd.read_csv(url, skiprows=1)
-    df = df.rename(columns={
-        'Date': 'Year',
-        'Units': 'SF_permits',
-        'Value': 'SF_value',
-        'Units.1': '2U_permits',
-        'Value.1': '2U_value',
-        'Units.2': '3-4U_permits',
-        'Value.2': '3-4U_value',
-        'Units.3': '5+U_permits',
-        'Value.3': '5+U_value',
-    })
-    df['FIPS'] = df['State'].astype(str).str.zfill(2) + df['County'].astype(str).str.zfill(3)
-    df = df[df['FIPS'].str.startswith('13')]
-    df['Name'] = df['Name'].str.strip().str.replace(' County', '')
-    df['Level'] = 'County'
-    df['MF_permits'] = df['2U_permits'] + df['3-4U_permits'] + df['5+U_permits']
-    df['MF_value'] = df['2U_value'] + df['3-4U_value'] + df['5+U_value']
+
+def _annual(df, year):
+    df['FIPS'] = _fips(df)
     df['Year'] = int(year)
-    return df[['Year', 'Level', 'Name', 'FIPS',
-               'SF_permits', 'SF_value', 'MF_permits', 'MF_value',
-               '2U_permits', '2U_value', '3-4U_permits', '3-4U_value',
-               '5+U_permits', '5+U_value']]
+    return df[ANNUAL_COLUMNS]
+
+
+# Function to load and process county data
+def load_county_data(source, states=ALL_STATES):
+    return _monthly(read_bps_file(source, 'County', states))
+
+
+# Function to load and process place (i.e., city) data
+def load_place_data(source, states=ALL_STATES):
+    return _monthly(read_bps_file(source, 'City/Other', states))
+
+
+# Function to load and process annual county data
+def load_county_annual(source, year, states=ALL_STATES):
+    return _annual(read_bps_file(source, 'County', states), year)
 
 
 # Function to load and process annual place data
-def load_place_annual(url, year):
-    df = pd.read_csv(url, skiprows=1)
-    df = df.rename(columns={
-        'Date': 'Year',
-        'Code': 'State',
-        'Code.1': 'County',
-        'Units': 'SF_permits',
-        'Value': 'SF_value',
-        'Units.1': '2U_permits',
-        'Value.1': '2U_value',
-        'Units.2': '3-4U_permits',
-        'Value.2': '3-4U_value',
-        'Units.3': '5+U_permits',
-        'Value.3': '5+U_value',
-    })
-    df['FIPS'] = (
-        df['State'].astype(str).str.zfill(2)
-        + df['County'].astype(str).str.zfill(3)
-        + df['ID'].astype(str).str.zfill(6)
-    )
-    df = df[df['FIPS'].str.startswith('13')]
-    df['Name'] = df['Name'].str.strip().str.replace(' town', '')
-    df['Level'] = 'City/Other'
-    df['MF_permits'] = df['2U_permits'] + df['3-4U_permits'] + df['5+U_permits']
-    df['MF_value'] = df['2U_value'] + df['3-4U_value'] + df['5+U_value']
-    df['Year'] = int(year)
-    return df[['Year', 'Level', 'Name', 'FIPS',
-               'SF_permits', 'SF_value', 'MF_permits', 'MF_value',
-               '2U_permits', '2U_value', '3-4U_permits', '3-4U_value',
-               '5+U_permits', '5+U_value']]
+def load_place_annual(source, year, states=ALL_STATES):
+    return _annual(read_bps_file(source, 'City/Other', states), year)
+
+
+# The Census files needed to cover `states`: the national county file, then one
+# place file per Census region. Each entry is (label, level, census_region,
+# state FIPS codes); census_region is None for the county file.
+def source_files(states):
+    by_region = {}
+    for state in states:
+        by_region.setdefault(state['census_region'], []).append(state['fips'])
+    files = [('county', 'County', None, tuple(state['fips'] for state in states))]
+    for region, fips in by_region.items():
+        label = 'place' if len(by_region) == 1 else f'{region} place'
+        files.append((label, 'City/Other', region, tuple(fips)))
+    return files
+
+
+def file_url(census_region, code, kind):
+    if census_region is None:
+        return COUNTY_URL.format(code=code, kind=kind)
+    return PLACE_URL.format(region=quote(census_region),
+                            prefix=CENSUS_REGION_PREFIXES[census_region],
+                            code=code, kind=kind)
+
+
+# Fan one state's rows out of frames parsed for several states.
+def split_by_state(frames, state_fips):
+    return [df[df['State'] == state_fips].drop(columns='State')
+            for df in frames if df is not None]
+
+
+# Run every (loader, url, *args) job on a bounded thread pool. Results come back
+# in job order, with None standing in for any file Census hasn't published, so
+# callers can report gaps exactly as the old one-at-a-time loops did. Any other
+# download failure, or a file that arrives but can't be parsed, raises
+# DownloadError, so a partial window is never written.
+# With a cache, `reuse(url, sha256)` may return already-parsed rows for a file.
+def fetch_all(jobs, workers=DEFAULT_WORKERS, cache=None, reuse=None):
+    if not jobs:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        return list(pool.map(lambda job: run_job(job, cache, reuse), jobs))
+
+
+def run_job(job, cache=None, reuse=None):
+    loader, url, *args = job
+    try:
+        if cache is None:
+            with span('download + parse', url=url):
+                return loader(url, *args)
+        with span('download', url=url):
+            response = cache.get(url)
+        if reuse is not None:
+            kept = reuse(url, response.sha256)
+            if kept is not None:
+                return kept
+        with span('parse', url=url):
+            return cache.parse(response, loader, *args)
+    except NotPublished:
+        return None
+    except DownloadError:
+        raise
+    except Exception as e:
+        # The bytes arrived but aren't a readable BPS file (an HTML error page,
+        # a garbled body). That is not a missing month, so stop the run; and
+        # forget the cached copy, or the next run would get a 304 for it.
+        if cache is not None:
+            cache.forget(url)
+        raise DownloadError(f'{url}: could not parse ({type(e).__name__}: {e})') from e
+
+
+# Stack county then place frames and order by jurisdiction and month — the
+# layout shared by the rolling master and every backfill partition. A county
+# and a city can share a name, so Level breaks the tie, and the sort is stable
+# so rows reused by an incremental run land exactly where a full rebuild
+# would put them.
+def assemble_monthly(county_dfs, place_dfs):
+    df_master = pd.concat(county_dfs + place_dfs, ignore_index=True)
+    df_master['Name'] = df_master['Name'].str.strip()
+    return df_master.sort_values(by=['Name', 'year_month', 'Level'], kind='stable')
 
 
-def annual_permits_fetch():
+def annual_permits_fetch(workers=DEFAULT_WORKERS, cache=None, states=None, write=True):
     # rolling 3-year window: current year + 2 previous. Files for the current year
     # and for the prior year (before May 14 of the following year) won't exist —
     # those gaps are filled by summed monthlies in backend_query.py.
+    states = states or configured_states()
     today = datetime.today()
     years = [today.year - 2, today.year - 1, today.year]
-    frames = []
+    files = source_files(states)
+    loaders = {'County': load_county_annual, 'City/Other': load_place_annual}
+    frames = {region: [] for _, _, region, _ in files}
 
     print('gathering annual building permits...')
 
+    jobs = [(loaders[level], file_url(region, year, 'a'), year, fips)
+            for year in years for _, level, region, fips in files]
+    with span('fetch annual files', files=len(jobs)):
+        results = iter(fetch_all(jobs, workers, cache))
+
     for year in years:
-        county_url = f"https://www2.census.gov/econ/bps/County/co{year}a.txt"
-        print(f"Searching for {year} annual county data...")
-        try:
-            frames.append(load_county_annual(county_url, year))
-        except Exception:
-            print(f"  {year} annual county file not yet published; skipping.")
-
-        place_url = f"https://www2.census.gov/econ/bps/Place/South%20Region/so{year}a.txt"
-        print(f"Searching for {year} annual place data...")
-        try:
-            frames.append(load_place_annual(place_url, year))
-        except Exception:
-            print(f"  {year} annual place file not yet published; skipping.")
-
-    if not frames:
+        for label, _, region, _ in files:
+            print(f"Searching for {year} annual {label} data...")
+            df = next(results)
+            if df is None:
+                print(f"  {year} annual {label} file not yet published; skipping.")
+            else:
+                frames[region].append(df)
+
+    if not any(frames.values()):
         # The current year's annual files won't exist until the following May, so
         # an empty window is only expected very early in a calendar year. Raise so
         # a transient Census outage can't silently blank the committed master.
         raise RuntimeError('no annual files available in window; aborting without write.')
 
-    df_annual = pd.concat(frames, ignore_index=True)
-    df_annual['Name'] = df_annual['Name'].str.strip()
-    df_annual = df_annual.sort_values(by=['Name', 'Year']).reset_index(drop=True)
-    os.makedirs(RAW_DIR, exist_ok=True)
-    df_annual.to_csv(ANNUAL_MASTER, index=False)
+    masters = {}
+    with span('assemble annual masters'):
+        for state in states:
+            state_frames = split_by_state(frames[None] + frames[state['census_region']], state['fips'])
+            df_annual = pd.concat(state_frames, ignore_index=True)
+            df_annual['Name'] = df_annual['Name'].str.strip()
+            masters[state['abbr']] = df_annual.sort_values(by=['Name', 'Year', 'Level'],
+                                                           kind='stable').reset_index(drop=True)
+    if write:
+        write_annual_masters(masters)
     print('annual building permit script successful!')
+    return masters
 
 
-def building_permits_fetch():
+@timed('write annual masters')
+def write_annual_masters(masters):
+    os.makedirs(RAW_DIR, exist_ok=True)
+    for abbr, df_annual in masters.items():
+        df_annual.to_csv(annual_master_path(abbr), index=False)
+
+
+# Incremental mode: hand back the rows already in the masters for any month whose
+# source file is byte-identical to the one the masters were built from. Only new
+# or revised months get parsed; months that left the window are simply never
+# asked for, so they drop out of the rewritten masters.
+def _reuse_from_master(states, urls_to_keys):
+    paths = {state['fips']: monthly_master_path(state['abbr']) for state in states}
+    if not os.path.exists(MONTHLY_SOURCES) or not all(map(os.path.exists, paths.values())):
+        return None
+    with open(MONTHLY_SOURCES) as f:
+        sources = json.load(f)
+    partitions = {fips: dict(list(pd.read_csv(path).groupby(['Level', 'year_month'])))
+                  for fips, path in paths.items()}
+
+    def reuse(url, sha):
+        if sources.get(url) != sha:
+            return None
+        key, file_states = urls_to_keys[url]
+        kept = [partitions[fips].get(key) for fips in file_states]
+        if any(df is None for df in kept):
+            return None
+        return pd.concat([df.assign(State=fips) for df, fips in zip(kept, file_states)],
+                         ignore_index=True)
+
+    return reuse
+
+
+# Returns ({state abbr: monthly master}, {url: sha256 of its source file}); the
+# second is None without the cache. With write=False nothing is saved, so a
+# caller can hand both to write_monthly_masters() later.
+def building_permits_fetch(workers=DEFAULT_WORKERS, cache=None, incremental=False, states=None,
+                           write=True):
+    states = states or configured_states()
     months = get_relevant_months()
-    county_dfs = []
-    place_dfs = []
+    files = source_files(states)
+    loaders = {'County': load_county_data, 'City/Other': load_place_data}
 
     print('gathering building permits...')
 
-    # Load and append data for county endpoint
-    for i, month in enumerate(months):
-        month_label = month_code_to_label(month)
-        print(f"Searching for {month_label} county data...")
-        url = f"https://www2.census.gov/econ/bps/County/co{month}c.txt"
-        try:
-            county_dfs.append(load_county_data(url))
-        except Exception:
-            if i + 1 < len(months):
+    # Download every county and place month in one parallel batch
+    jobs = [(loaders[level], file_url(region, month, 'c'), fips)
+            for _, level, region, fips in files for month in months]
+    reuse = None
+    if incremental and cache is not None:
+        keys = [((level, int('20' + month)), fips)
+                for _, level, _, fips in files for month in months]
+        with span('read previous masters'):
+            reuse = _reuse_from_master(states, {job[1]: key for job, key in zip(jobs, keys)})
+        if reuse is None:
+            print('no previous master to update; doing a full rebuild...')
+    with span('fetch monthly files', files=len(jobs)):
+        results = fetch_all(jobs, workers, cache, reuse)
+
+    # Report and collect in month order, county endpoint first
+    frames = {}
+    for n, (label, _, region, _) in enumerate(files):
+        frames[region] = []
+        for i, (month, df) in enumerate(zip(months, results[n * len(months):(n + 1) * len(months)])):
+            month_label = month_code_to_label(month)
+            print(f"Searching for {month_label} {label} data...")
+            if df is not None:
+                frames[region].append(df)
+            elif i + 1 < len(months):
                 next_label = month_code_to_label(months[i + 1])
-                print(f"Unable to find {month_label} county data, looking for {next_label} county data...")
+                print(f"Unable to find {month_label} {label} data, looking for {next_label} {label} data...")
             else:
-                print(f"Unable to find {month_label} county data.")
-
-    # Load and append data for place endpoint
-    for i, month in enumerate(months):
-        month_label = month_code_to_label(month)
-        print(f"Searching for {month_label} place data...")
-        url = f"https://www2.census.gov/econ/bps/Place/South%20Region/so{month}c.txt"
-        try:
-            place_dfs.append(load_place_data(url))
-        except Exception:
-            if i + 1 < len(months):
-                next_label = month_code_to_label(months[i + 1])
-                print(f"Unable to find {month_label} place data, looking for {next_label} place data...")
-            else:
-                print(f"Unable to find {month_label} place data.")
+                print(f"Unable to find {month_label} {label} data.")
 
-    # Guard against a Census outage overwriting the good master with empty data.
-    if not county_dfs or not place_dfs:
+    # Guard against a Census outage overwriting the good masters with empty data.
+    if not all(frames.values()):
         raise RuntimeError(
             'no monthly county/place data fetched; aborting without write.')
 
     # Concatenate all data
     print("Concatenating data...")
-    county_dfs = pd.concat(county_dfs, ignore_index=True)
-    place_dfs = pd.concat(place_dfs, ignore_index=True)
-    df_master = pd.concat([county_dfs, place_dfs], ignore_index=True)
-    df_master['Name'] = df_master['Name'].str.strip()
-    df_master = df_master.sort_values(by=['Name', 'year_month'])
-    os.makedirs(RAW_DIR, exist_ok=True)
-    df_master.to_csv(MONTHLY_MASTER, index=False)
+    masters = {}
+    with span('assemble monthly masters'):
+        for state in states:
+            county_dfs = split_by_state(frames[None], state['fips'])
+            place_dfs = split_by_state(frames[state['census_region']], state['fips'])
+            masters[state['abbr']] = assemble_monthly(county_dfs, place_dfs).reset_index(drop=True)
+
+    sources = None
+    if cache is not None:
+        sources = {job[1]: cache.index[job[1]]['sha256']
+                   for job, df in zip(jobs, results) if df is not None}
+    if write:
+        write_monthly_masters(masters, sources)
     print('building permit script successful!')
+    return masters, sources
+
+
+@timed('write monthly masters')
+def write_monthly_masters(masters, sources=None):
+    os.makedirs(RAW_DIR, exist_ok=True)
+    for abbr, df_master in masters.items():
+        df_master.to_csv(monthly_master_path(abbr), index=False)
+
+    # Record which source bytes the masters came from, for the next incremental run
+    if sources is not None:
+        with open(MONTHLY_SOURCES, 'w') as f:
+            json.dump(sources, f, indent=1, sort_keys=True)
+    elif os.path.exists(MONTHLY_SOURCES):
+        os.remove(MONTHLY_SOURCES)
+
+
+def _read_checkpoint():
+    if os.path.exists(BACKFILL_CHECKPOINT):
+        with open(BACKFILL_CHECKPOINT) as f:
+            return json.load(f)
+    return {}
+
+
+def _write_atomic_csv(df, path):
+    tmp_path = path + '.tmp'
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+# Pull every county and place monthly file for [start_year, end_year] into one
+# CSV per state and year under Data/raw/monthly/. All files are downloaded in a
+# single parallel batch; each year is written and checkpointed as soon as its
+# last file lands, so an interrupted backfill resumes where it stopped. Months
+# Census never published are listed in the checkpoint rather than retried; a
+# year with no files (or no rows) at all is not checkpointed. backend_query.py
+# builds the Monthly Trends page's history from these partitions.
+def backfill_permits(start_year, end_year, workers=DEFAULT_WORKERS, cache=None, force=False,
+                     states=None):
+    states = states or configured_states()
+    os.makedirs(BACKFILL_DIR, exist_ok=True)
+    checkpoint = _read_checkpoint()
+    years = [y for y in range(start_year, end_year + 1)
+             if force or str(y) not in checkpoint]
+    skipped = end_year - start_year + 1 - len(years)
+    if skipped:
+        print(f'{skipped} year(s) already backfilled; use --force to redo them.')
+    if not years:
+        print('backfill complete!')
+        return
+
+    files = source_files(states)
+    loaders = {'County': load_county_data, 'City/Other': load_place_data}
+    jobs = {}
+    for year in years:
+        for n, (label, level, region, fips) in enumerate(files):
+            for month in range(1, 13):
+                code = f'{year % 100:02d}{month:02d}'
+                month_label = f"{datetime(year, month, 1).strftime('%B %Y')} {label}"
+                jobs[(year, n, month)] = ((loaders[level], file_url(region, code, 'c'), fips), month_label)
+
+    files_per_year = 12 * len(files)
+    print(f'backfilling {len(years)} year(s), {len(jobs)} files...')
+    results = {year: {} for year in years}
+    done = 0
+    failed = {year: 0 for year in years}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run_job, job, cache): key for key, (job, _) in jobs.items()}
+        for future in as_completed(futures):
+            year, n, month = key = futures[future]
+            done += 1
+            try:
+                df = future.result()
+                status = 'ok' if df is not None else 'missing'
+            except DownloadError as e:
+                df, status = None, f'failed ({e})'
+                failed[year] += 1
+            print(f"[{done}/{len(jobs)}] {jobs[key][1]}: {status}")
+            results[year][(n, month)] = df
+            if len(results[year]) < files_per_year:
+                continue
+
+            frames = results.pop(year)
+            # A year with failed downloads is neither written nor checkpointed,
+            # so the next run retries it instead of recording months as missing.
+            if failed[year]:
+                print(f'  skipped {year}: {failed[year]} file(s) failed to download')
+                continue
+            missing = [f'{files[n][0]} {m:02d}' for (n, m), df in sorted(frames.items()) if df is None]
+            # Nothing published at all (a year before BPS monthly files begin, or
+            # a wrong mirror): leave it out of the checkpoint so a later run can
+            # still pick it up.
+            if len(missing) == files_per_year:
+                print(f'  skipped {year}: no files found')
+                continue
+            rows = {}
+            for state in states:
+                state_dfs = []
+                for n, (_, _, region, _) in enumerate(files):
+                    if region is None or region == state['census_region']:
+                        state_dfs += split_by_state([frames[(n, m)] for m in range(1, 13)], state['fips'])
+                rows[state['abbr']] = 0
+                if state_dfs:
+                    df_year = assemble_monthly(state_dfs, [])
+                    _write_atomic_csv(df_year, os.path.join(BACKFILL_DIR, f"BPS_{state['abbr']}_{year}.csv"))
+                    rows[state['abbr']] = len(df_year)
+            print(f'  wrote {year} ({len(missing)} of {files_per_year} files missing)')
+
+            # The current year is still being published, so it is rewritten on
+            # every backfill run rather than checkpointed as finished.
+            if year >= datetime.today().year or not any(rows.values()):
+                continue
+            checkpoint[str(year)] = {
+                'rows': rows,
+                'missing': missing,
+                'completed_at': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            with open(BACKFILL_CHECKPOINT, 'w') as f:
+                json.dump(checkpoint, f, indent=1, sort_keys=True)
+
+    incomplete = [year for year, n in failed.items() if n]
+    if incomplete:
+        raise DownloadError(f"backfill incomplete for {', '.join(map(str, incomplete))}; rerun to retry")
+    print('backfill complete!')
 
 
 def main():
-    building_permits_fetch()
-    annual_permits_fetch()
-    print('all permit fetches complete!')
+    parser = argparse.ArgumentParser(description='Fetch BPS permit data from the Census Bureau.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'parallel downloads (default {DEFAULT_WORKERS})')
+    parser.add_argument('--region', action='append',
+                        help='only fetch the states needed by this metro from regions.py '
+                             '(repeatable; default: every metro)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='bypass the raw-file cache and download everything')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-parse months that are new or changed since the last run')
+    parser.add_argument('--backfill', type=int, nargs=2, metavar=('START', 'END'),
+                        help='instead of the rolling window, pull full monthly history '
+                             'for years START..END into Data/raw/monthly/')
+    parser.add_argument('--force', action='store_true',
+                        help='with --backfill, redo years already in the checkpoint')
+    parser.add_argument('--retries', type=int, default=RETRIES,
+                        help=f'retries per file for timeouts and 5xx (default {RETRIES})')
+    parser.add_argument('--timeout', type=float, default=CLIENT.timeout,
+                        help=f'seconds per request before it is retried (default {CLIENT.timeout:g})')
+    args = parser.parse_args()
+    if args.incremental and args.no_cache:
+        parser.error('--incremental needs the raw-file cache; drop --no-cache')
+
+    CLIENT.retries = args.retries
+    CLIENT.timeout = args.timeout
+    cache = None if args.no_cache else RawCache(client=CLIENT)
+    states = configured_states(args.region)
+    try:
+        if args.backfill:
+            backfill_permits(*args.backfill, workers=args.workers, cache=cache, force=args.force,
+                             states=states)
+        else:
+            building_permits_fetch(workers=args.workers, cache=cache,
+                                   incremental=args.incremental, states=states)
+            annual_permits_fetch(workers=args.workers, cache=cache, states=states)
+            print('all permit fetches complete!')
+    except DownloadError as e:
+        print(f'downloads: {CLIENT.summary()}')
+        sys.exit(f'download failed: {e}')
+    print(f'downloads: {CLIENT.summary()}')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,197 @@
+"""HTTP layer for the Census downloads: retries, backoff and a circuit breaker.
+
+Census answers a request for a month it hasn't published with a 404, which is an
+expected outcome and is raised as NotPublished. Everything else that goes wrong
+on the wire (timeouts, resets, 5xx/429, bodies cut short) is retried with
+jittered exponential backoff. Once a host has failed `failure_threshold` times
+in a row, its circuit opens and every further request fails immediately with
+CircuitOpenError, so a Census outage aborts the run in seconds instead of
+stalling every queued file through its full retry schedule. After `reset_after`
+seconds one probe request is let through; success closes the circuit again.
+
+Every request is recorded per URL (attempts, latency of each attempt, final
+outcome) for the end-of-run summary printed by fetch_permits.py.
+"""
+
+import time
+import random
+import threading
+import urllib.request
+from http.client import HTTPException
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+from dataclasses import dataclass, field
+
+REQUEST_TIMEOUT = 60
+RETRIES = 4                 # attempts after the first
+BACKOFF_BASE = 0.5          # seconds; doubles every attempt, full jitter
+BACKOFF_MAX = 8.0
+FAILURE_THRESHOLD = 10      # consecutive failures before a host's circuit opens
+RESET_AFTER = 30.0          # seconds an open circuit waits before a probe
+
+# Status codes worth asking again for; any other 4xx is a permanent answer.
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+NOT_PUBLISHED_STATUSES = {404, 410}
+
+
+class NotPublished(Exception):
+    """The file doesn't exist (yet); Census answered 404."""
+
+
+class DownloadError(Exception):
+    """A file could not be downloaded; retrying later may succeed."""
+
+
+class CircuitOpenError(DownloadError):
+    """The host has been failing, so the request was not attempted."""
+
+
+@dataclass
+class Response:
+    url: str
+    status: int
+    headers: object     # http.client.HTTPMessage; case-insensitive .get()
+    body: bytes
+
+
+@dataclass
+class RequestStats:
+    attempts: int = 0
+    latencies: list = field(default_factory=list)
+    outcome: str = ''
+
+
+class _Circuit:
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+
+class HttpClient:
+    def __init__(self, timeout=REQUEST_TIMEOUT, retries=RETRIES, backoff_base=BACKOFF_BASE,
+                 backoff_max=BACKOFF_MAX, failure_threshold=FAILURE_THRESHOLD,
+                 reset_after=RESET_AFTER):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.stats = {}
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None):
+        """GET `url`, retrying transient failures.
+
+        Returns a Response for 2xx and 304 (conditional GETs), raises
+        NotPublished for 404/410, DownloadError once retries are exhausted or
+        for any other error status, and CircuitOpenError while the host is down.
+        """
+        host = urlsplit(url).netloc
+        stats = RequestStats()
+        with self._lock:
+            self.stats[url] = stats
+
+        for attempt in range(self.retries + 1):
+            self._before_request(host, url, stats)
+            stats.attempts += 1
+            start = time.perf_counter()
+            try:
+                response = self._attempt(url, headers)
+            except HTTPError as e:
+                stats.latencies.append(time.perf_counter() - start)
+                if e.code in NOT_PUBLISHED_STATUSES:
+                    self._record(host, ok=True)
+                    stats.outcome = str(e.code)
+                    raise NotPublished(url) from None
+                if e.code not in RETRY_STATUSES:
+                    self._record(host, ok=True)
+                    stats.outcome = str(e.code)
+                    raise DownloadError(f'{url}: HTTP {e.code}') from None
+                error = e
+                retry_after = e.headers.get('Retry-After') if e.headers else None
+            except (URLError, HTTPException, OSError) as e:
+                # timeouts, refused/reset connections and short reads
+                stats.latencies.append(time.perf_counter() - start)
+                error, retry_after = e, None
+            else:
+                stats.latencies.append(time.perf_counter() - start)
+                self._record(host, ok=True)
+                stats.outcome = str(response.status)
+                return response
+
+            self._record(host, ok=False)
+            stats.outcome = _describe(error)
+            if attempt < self.retries:
+                time.sleep(self._backoff(attempt, retry_after))
+
+        raise DownloadError(f'{url}: {stats.outcome} after {stats.attempts} attempts')
+
+    def _attempt(self, url, headers):
+        request = urllib.request.Request(url, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                # read() raises IncompleteRead if the body falls short of Content-Length
+                body = response.read()
+                return Response(url, response.status, response.headers, body)
+        except HTTPError as e:
+            if e.code == 304:
+                return Response(url, 304, e.headers, b'')
+            raise
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    # ---- circuit breaker ----------------------------------------------------------
+    def _before_request(self, host, url, stats):
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            if circuit.opened_at is None:
+                return
+            if circuit.probing or time.monotonic() - circuit.opened_at < self.reset_after:
+                stats.outcome = 'circuit open'
+                raise CircuitOpenError(f'{url}: {host} is failing; not attempted')
+            # half-open: let this one request through as a probe
+            circuit.probing = True
+
+    def _record(self, host, ok):
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            circuit.probing = False
+            if ok:
+                circuit.failures = 0
+                circuit.opened_at = None
+                return
+            circuit.failures += 1
+            if circuit.opened_at is not None or circuit.failures >= self.failure_threshold:
+                circuit.opened_at = time.monotonic()
+
+    # ---- reporting ----------------------------------------------------------------
+    def summary(self):
+        """A few lines describing this client's requests, for the run log."""
+        with self._lock:
+            stats = dict(self.stats)
+        if not stats:
+            return 'no downloads'
+        latencies = sorted(t for s in stats.values() for t in s.latencies)
+        attempts = sum(s.attempts for s in stats.values())
+        lines = [f'{len(stats)} files, {attempts} requests, '
+                 f'median {latencies[len(latencies) // 2] * 1000:.0f} ms, '
+                 f'slowest {latencies[-1] * 1000:.0f} ms' if latencies else
+                 f'{len(stats)} files, {attempts} requests']
+        for url, s in sorted(stats.items()):
+            if s.attempts > 1 or s.outcome not in ('200', '304', '404'):
+                lines.append(f'  {url}: {s.attempts} attempt(s), {s.outcome}')
+        return '\n'.join(lines)
+
+
+def _describe(error):
+    if isinstance(error, HTTPError):
+        return f'HTTP {error.code}'
+    if isinstance(error, URLError):
+        return _describe(error.reason) if isinstance(error.reason, Exception) else str(error.reason)
+    return type(error).__name__
@@ -0,0 +1,144 @@
+"""Fetch and build in one process: Census -> raw masters -> dashboard tables.
+
+Equivalent to running fetch_permits.py and then backend_query.py, except the
+fetched masters are handed to build_dashboard_tables() as DataFrames instead of
+being written to CSV and parsed straight back. The raw masters are still saved
+(that's what incremental runs and the committed history rely on), but on a
+background thread while the build runs; pass --no-raw to skip them.
+
+  python backend/pipeline.py --incremental
+  python backend/pipeline.py --profile pipeline.prof   # cProfile the whole run
+
+Each stage's wall time is printed at the end, with the build broken down by
+backend_query stage.
+"""
+
+import sys
+import time
+import argparse
+import cProfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from fetch_permits import (DEFAULT_WORKERS, CLIENT, building_permits_fetch, annual_permits_fetch,
+                           write_monthly_masters, write_annual_masters)
+from backend_query import build_dashboard_tables, read_existing_tables, read_backfill, write_tables
+from http_client import DownloadError, RETRIES
+from raw_cache import RawCache
+from regions import REGIONS, get_region, configured_states
+
+
+# The masters as backend_query.py would see them after a CSV round-trip: plain
+# object/int64 columns rather than the parser's categorical and int32 ones, so
+# the build never sums in int32 and the tables match the two-step run exactly.
+def _as_read_back(df):
+    df = df.reset_index(drop=True)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].astype('int64')
+    return df
+
+
+def run_pipeline(workers=DEFAULT_WORKERS, cache=None, incremental=False, region_keys=None,
+                 write_raw=True, timings=None):
+    """Fetch the masters for every state the metros need, then rebuild each
+    metro's dashboard tables from them. Returns {region key: tables}."""
+    timings = {} if timings is None else timings
+    keys = region_keys or list(REGIONS)
+    states = configured_states(keys)
+
+    with ThreadPoolExecutor(max_workers=1) as raw_writer:
+        start = time.perf_counter()
+        monthly, sources = building_permits_fetch(workers, cache, incremental, states, write=False)
+        timings['fetch monthly'] = time.perf_counter() - start
+        pending = [raw_writer.submit(write_monthly_masters, monthly, sources)] if write_raw else []
+
+        start = time.perf_counter()
+        annual = annual_permits_fetch(workers, cache, states, write=False)
+        timings['fetch annual'] = time.perf_counter() - start
+        if write_raw:
+            pending.append(raw_writer.submit(write_annual_masters, annual))
+
+        built = {}
+        for key in keys:
+            region = get_region(key)
+            abbr = region['state_abbr']
+            build_timings = {}
+            start = time.perf_counter()
+            tables = build_dashboard_tables(
+                _as_read_back(monthly[abbr]), _as_read_back(annual[abbr]),
+                read_existing_tables(region), region, timings=build_timings,
+                backfill=read_backfill(region))
+            timings[f'build {key}'] = time.perf_counter() - start
+            for name, seconds in build_timings.items():
+                timings[f'  {name}'] = timings.get(f'  {name}', 0.0) + seconds
+
+            start = time.perf_counter()
+            write_tables(tables, region)
+            timings[f'write {key}'] = time.perf_counter() - start
+            print(f"built {region['title']} dashboard tables in {region['data_dir']}/")
+            built[key] = tables
+
+        # surface any error from the background writes
+        start = time.perf_counter()
+        for future in pending:
+            future.result()
+        timings['wait raw masters'] = time.perf_counter() - start
+    return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch BPS data and rebuild the dashboard tables.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'parallel downloads (default {DEFAULT_WORKERS})')
+    parser.add_argument('--region', action='append', choices=sorted(REGIONS),
+                        help='only fetch and build this metro (repeatable; default: every metro)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='bypass the raw-file cache and download everything')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-parse months that are new or changed since the last run')
+    parser.add_argument('--no-raw', action='store_true',
+                        help="don't save the raw masters in Data/raw/")
+    parser.add_argument('--retries', type=int, default=RETRIES,
+                        help=f'retries per file for timeouts and 5xx (default {RETRIES})')
+    parser.add_argument('--timeout', type=float, default=CLIENT.timeout,
+                        help=f'seconds per request before it is retried (default {CLIENT.timeout:g})')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='write cProfile stats for the whole run to PATH')
+    args = parser.parse_args()
+    if args.incremental and args.no_cache:
+        parser.error('--incremental needs the raw-file cache; drop --no-cache')
+
+    CLIENT.retries = args.retries
+    CLIENT.timeout = args.timeout
+    cache = None if args.no_cache else RawCache(client=CLIENT)
+    timings = {}
+    profiler = cProfile.Profile() if args.profile else None
+
+    start = time.perf_counter()
+    try:
+        if profiler:
+            profiler.enable()
+        run_pipeline(args.workers, cache, args.incremental, args.region,
+                     write_raw=not args.no_raw, timings=timings)
+    except DownloadError as e:
+        print(f'downloads: {CLIENT.summary()}')
+        sys.exit(f'download failed: {e}')
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+    total = time.perf_counter() - start
+
+    print(f'downloads: {CLIENT.summary()}')
+    print('pipeline timings:')
+    for name, seconds in timings.items():
+        print(f'  {name:<28}{seconds * 1000:9.1f} ms')
+    print(f"  {'total':<28}{total * 1000:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""On-disk cache of the raw BPS text files, revalidated with conditional GETs.
+
+Published BPS months almost never change, so each scheduled refresh re-asks
+Census for every file with If-None-Match / If-Modified-Since and normally gets
+a 304 back. Bodies are stored content-addressed (by SHA-256) next to a small
+JSON index keyed by URL:
+
+  .bps_cache/index.json         url -> sha256, etag, last_modified, timestamps
+  .bps_cache/blobs/<sha256>     raw response bytes
+  .bps_cache/parsed/<sha256>.*  pickled loader output, so unchanged bytes are
+                                never re-parsed
+
+Inspect or trim the cache from the command line:
+
+  python backend/raw_cache.py list
+  python backend/raw_cache.py prune --older-than 90
+  python backend/raw_cache.py clear
+"""
+
+import os
+import io
+import json
+import time
+import hashlib
+import argparse
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+from http_client import HttpClient
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.environ.get('BPS_CACHE_DIR', os.path.join(REPO_ROOT, '.bps_cache'))
+
+# Part of every parsed-pickle filename; bump it whenever loader output changes
+# so stale pickles are ignored (and later pruned) instead of reused.
+PARSED_VERSION = 3
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: bytes
+    sha256: str
+    changed: bool       # False when Census answered 304 or sent identical bytes
+    status: int
+
+
+class RawCache:
+    def __init__(self, cache_dir=CACHE_DIR, client=None):
+        self.cache_dir = cache_dir
+        self.client = client or HttpClient()
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.parsed_dir = os.path.join(cache_dir, 'parsed')
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self._lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.parsed_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        else:
+            self.index = {}
+
+    # ---- HTTP -----------------------------------------------------------------
+    def get(self, url):
+        """Return the body of `url`, revalidating any cached copy.
+
+        A 404 (month not yet published) propagates as http_client.NotPublished
+        and a failed download as DownloadError, just like an uncached read.
+        """
+        entry = self.index.get(url)
+        if entry is not None and not os.path.exists(self._blob_path(entry['sha256'])):
+            entry = None
+
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self.client.get(url, headers)
+        if response.status == 304 and entry is not None:
+            with open(self._blob_path(entry['sha256']), 'rb') as f:
+                body = f.read()
+            self._update(url, entry['sha256'], entry.get('etag'), entry.get('last_modified'))
+            return CachedResponse(url, body, entry['sha256'], changed=False, status=304)
+
+        body, status = response.body, response.status
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        sha = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(sha)
+        if not os.path.exists(blob_path):
+            self._write_atomic(blob_path, body)
+        changed = entry is None or entry['sha256'] != sha
+        self._update(url, sha, etag, last_modified, fetched=True)
+        return CachedResponse(url, body, sha, changed=changed, status=status)
+
+    # ---- parsed results ---------------------------------------------------------
+    def load(self, url, loader, *args):
+        """Fetch `url` and run `loader(buffer, *args)` on it, reusing the pickled
+        result from an earlier run whenever the bytes are unchanged."""
+        return self.parse(self.get(url), loader, *args)
+
+    def parse(self, response, loader, *args):
+        """Run `loader` on an already-fetched response, via the pickle cache."""
+        key = '-'.join([loader.__name__] + ['+'.join(map(str, a)) if isinstance(a, tuple) else str(a)
+                                            for a in args])
+        parsed_path = os.path.join(self.parsed_dir,
+                                   f'{response.sha256}.{key}.v{PARSED_VERSION}.pkl')
+        if os.path.exists(parsed_path):
+            return pd.read_pickle(parsed_path)
+        df = loader(io.BytesIO(response.body), *args)
+        tmp_path = f'{parsed_path}.{threading.get_ident()}.tmp'
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, parsed_path)
+        return df
+
+    # ---- bookkeeping ------------------------------------------------------------
+    def _blob_path(self, sha):
+        return os.path.join(self.blob_dir, sha)
+
+    def _write_atomic(self, path, data):
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _update(self, url, sha, etag, last_modified, fetched=False):
+        now = time.strftime('%Y-%m-%dT%H:%M:%S')
+        with self._lock:
+            previous = self.index.get(url, {})
+            self.index[url] = {
+                'sha256': sha,
+                'etag': etag,
+                'last_modified': last_modified,
+                'size': os.path.getsize(self._blob_path(sha)),
+                'fetched_at': now if fetched and previous.get('sha256') != sha
+                else previous.get('fetched_at', now),
+                'checked_at': now,
+                'changed': previous.get('sha256') != sha,
+            }
+            self.save()
+
+    def forget(self, url):
+        """Drop `url` from the index, so the next get() downloads it in full
+        (its blob goes at the next prune)."""
+        with self._lock:
+            if self.index.pop(url, None) is not None:
+                self.save()
+
+    def save(self):
+        self._write_atomic(self.index_path, json.dumps(self.index, indent=1, sort_keys=True).encode())
+
+    def prune(self, older_than_days=None):
+        """Drop index entries not revalidated within `older_than_days`, then
+        delete any blob or parsed pickle no longer referenced by the index, and
+        any pickle written under an older PARSED_VERSION."""
+        removed_urls = 0
+        if older_than_days is not None:
+            cutoff = time.strftime('%Y-%m-%dT%H:%M:%S',
+                                   time.localtime(time.time() - older_than_days * 86400))
+            with self._lock:
+                for url in [u for u, e in self.index.items() if e['checked_at'] < cutoff]:
+                    del self.index[url]
+                    removed_urls += 1
+                self.save()
+
+        live = {e['sha256'] for e in self.index.values()}
+        removed_files = 0
+        current = f'.v{PARSED_VERSION}.pkl'
+        for directory in (self.blob_dir, self.parsed_dir):
+            for name in os.listdir(directory):
+                stale = directory == self.parsed_dir and not name.endswith(current)
+                if stale or name.split('.')[0] not in live:
+                    os.remove(os.path.join(directory, name))
+                    removed_files += 1
+        return removed_urls, removed_files
+
+
+def _format_size(n):
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f'{n:.0f} {unit}'
+        n /= 1024
+    return f'{n:.1f} GB'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or prune the raw BPS file cache.')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='show every cached URL')
+    prune = sub.add_parser('prune', help='drop stale entries and unreferenced files')
+    prune.add_argument('--older-than', type=int, default=None, metavar='DAYS',
+                       help='also forget URLs not revalidated in this many days')
+    sub.add_parser('clear', help='forget everything')
+    args = parser.parse_args()
+
+    cache = RawCache(args.cache_dir)
+    if args.command == 'list':
+        total = 0
+        for url, entry in sorted(cache.index.items()):
+            total += entry['size']
+            print(f"{entry['sha256'][:12]}  {_format_size(entry['size']):>8}  "
+                  f"checked {entry['checked_at']}  {url}")
+        print(f'{len(cache.index)} files, {_format_size(total)}')
+    elif args.command == 'prune':
+        urls, files = cache.prune(args.older_than)
+        print(f'forgot {urls} URLs, deleted {files} files')
+    elif args.command == 'clear':
+        cache.index = {}
+        cache.save()
+        urls, files = cache.prune()
+        print(f'deleted {files} files')
+
+
+if __name__ == '__main__':
+    main()
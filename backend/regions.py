@@ -0,0 +1,193 @@
+"""Declarative configuration for every metro the dashboard can be built for.
+
+Both halves of the pipeline read this file: fetch_permits.py works out which
+states it needs and downloads each Census file once (the national county file,
+plus one place file per Census region), then fans the rows out to a raw master
+per state; backend_query.py builds each metro's dashboard tables from its
+state's master. The app reads the same entry for its jurisdiction lists and
+colors. To add a metro, add an entry below — no extra downloads are needed
+unless it sits in a state not already listed.
+
+Each metro entry holds:
+  title           display name used in page titles
+  region_label    how the whole metro is described on charts ("11-County Region")
+  state_fips      numeric state FIPS code the metro's jurisdictions belong to
+  state_abbr      used to name the raw masters, e.g. Data/raw/BPS_GA.csv
+  census_region   folder of the BPS place files for that state
+  data_dir        where the dashboard tables are written, relative to the repo
+  counties        county FIPS -> display name
+  cities          place FIPS -> display name, including the unincorporated
+                  county balances (which only appear on the annual pages)
+  core_city       optional (city, county) pair; adds the city as a pseudo-county
+                  and a "<county> less <city>" remainder to the annual tables
+  colors          display name -> hex color for counties and pseudo-counties
+  titles          display name -> long title, where "<name> County" is wrong
+"""
+
+import os
+
+# BPS place files are published per Census region, each with its own prefix.
+CENSUS_REGION_PREFIXES = {
+    'Northeast Region': 'ne',
+    'Midwest Region': 'mw',
+    'South Region': 'so',
+    'West Region': 'we',
+}
+
+REGIONS = {
+    'atlanta': {
+        'title': 'Metro Atlanta',
+        'region_label': '11-County Region',
+        'state_fips': 13,
+        'state_abbr': 'GA',
+        'census_region': 'South Region',
+        'data_dir': 'Data',
+        'counties': {
+            '13057': 'Cherokee',
+            '13063': 'Clayton',
+            '13067': 'Cobb',
+            '13089': 'DeKalb',
+            '13097': 'Douglas',
+            '13113': 'Fayette',
+            '13117': 'Forsyth',
+            '13121': 'Fulton',
+            '13135': 'Gwinnett',
+            '13151': 'Henry',
+            '13247': 'Rockdale',
+        },
+        'cities': {
+            '13067003000': 'Acworth',
+            '13121019000': 'Alpharetta',
+            '13121038000': 'Atlanta',
+            '13067043000': 'Austell',
+            '13089047000': 'Avondale Estates',
+            '13057055000': 'Ball Ground',
+            '13135066000': 'Berkeley Lake',
+            '13089098700': 'Brookhaven',
+            '13135108000': 'Buford',
+            '13057126000': 'Canton',
+            '13089139000': 'Chamblee',
+            '13121144900': 'Chattahoochee Hills',
+            '13089152000': 'Clarkston',
+            '13121169000': 'College Park',
+            '13247178000': 'Conyers',
+            '13117192000': 'Cumming',
+            '13135195000': 'Dacula',
+            '13089213000': 'Decatur',
+            '13089225000': 'Doraville',
+            '13097229000': 'Douglasville',
+            '13135233000': 'Duluth',
+            '13089233500': 'Dunwoody',
+            '13121237000': 'East Point',
+            '13121256000': 'Fairburn',
+            '13113260000': 'Fayetteville',
+            '13063268000': 'Forest Park',
+            '13135301000': 'Grayson',
+            '13151315000': 'Hampton',
+            '13121317000': 'Hapeville',
+            '13057341000': 'Holly Springs',
+            '13121369300': 'Johns Creek',
+            '13063371000': 'Jonesboro',
+            '13067373000': 'Kennesaw',
+            '13063381000': 'Lake City',
+            '13135388000': 'Lawrenceville',
+            '13135396000': 'Lilburn',
+            '13089401000': 'Lithonia',
+            '13151402000': 'Locust Grove',
+            '13063409000': 'Lovejoy',
+            '13067430000': 'Marietta',
+            '13151439000': 'McDonough',
+            '13121457300': 'Milton',
+            '13063472000': 'Morrow',
+            '13121480000': 'Mountain Park',
+            '13063057500': 'Mountain View',
+            '13057485000': 'Nelson',
+            '13135494000': 'Norcross',
+            '13121515000': 'Palmetto',
+            '13113523000': 'Peachtree City',
+            '13135523500': 'Peachtree Corners',
+            '13089533000': 'Pine Lake',
+            '13067546000': 'Powder Springs',
+            '13063575000': 'Riverdale',
+            '13121585000': 'Roswell',
+            '13121592700': 'Sandy Springs',
+            '13067613000': 'Smyrna',
+            '13135614000': 'Snellville',
+            '13121617800': 'South Fulton',
+            '13151629000': 'Stockbridge',
+            '13089630000': 'Stone Mountain',
+            '13089629500': 'Stonecrest',
+            '13135631000': 'Sugar Hill',
+            '13135638000': 'Suwanee',
+            '13089677800': 'Tucker',
+            '13113685000': 'Tyrone',
+            '13121687000': 'Union City',
+            '13057742000': 'Woodstock',
+            '13057147000': 'Unincorporated Cherokee County',
+            '13063156000': 'Unincorporated Clayton County',
+            '13067161000': 'Unincorporated Cobb County',
+            '13089210000': 'Unincorporated DeKalb County',
+            '13097228000': 'Unincorporated Douglas County',
+            '13113259000': 'Unincorporated Fayette County',
+            '13117270000': 'Unincorporated Forsyth County',
+            '13121278000': 'Unincorporated Fulton County',
+            '13135309000': 'Unincorporated Gwinnett County',
+            '13151332000': 'Unincorporated Henry County',
+            '13247579000': 'Unincorporated Rockdale County',
+        },
+        'core_city': ('Atlanta', 'Fulton'),
+        'colors': {
+            'Atlanta': '#8A2BE2',
+            'Cherokee': '#FF4500',
+            'Clayton': '#9370DB',
+            'Cobb': '#00BFFF',
+            'DeKalb': '#FFD700',
+            'Douglas': '#008000',
+            'Fayette': '#00FFFF',
+            'Forsyth': '#FF8C00',
+            'Fulton': '#FF6F61',
+            'Fulton less Atlanta': '#FF69B4',
+            'Gwinnett': '#32CD32',
+            'Henry': '#FF1493',
+            'Rockdale': '#87CEEB',
+        },
+        'titles': {
+            'Atlanta': 'City of Atlanta',
+            'Fulton less Atlanta': 'Fulton (less Atlanta)',
+        },
+    },
+}
+
+# The metro the app serves; override with DASHBOARD_REGION.
+DEFAULT_REGION = os.environ.get('DASHBOARD_REGION', 'atlanta')
+
+
+def get_region(key=None):
+    return REGIONS[key or DEFAULT_REGION]
+
+
+def county_names(region):
+    return list(region['counties'].values())
+
+
+# Incorporated places only; the unincorporated balances are annual-only.
+def city_names(region):
+    return [name for name in region['cities'].values()
+            if not name.startswith('Unincorporated ')]
+
+
+def title_for(region, name):
+    return region['titles'].get(name, f'{name} County')
+
+
+# One entry per state needed by `keys` (default: every metro), in FIPS order.
+def configured_states(keys=None):
+    states = {}
+    for key in keys or REGIONS:
+        region = REGIONS[key]
+        states[region['state_fips']] = {
+            'fips': region['state_fips'],
+            'abbr': region['state_abbr'],
+            'census_region': region['census_region'],
+        }
+    return [states[fips] for fips in sorted(states)]
@@ -0,0 +1,153 @@
+"""Opt-in timing spans for the app and the data pipeline.
+
+Off by default. Set SPANS=1 to time the instrumented code paths and print each
+finished span as one JSON line; SPANS=panel also shows the dashboard's debug
+panel with the last SPANS_HISTORY (default 10) reruns. SPANS_LOG=path appends
+the JSON lines to a file instead of stdout.
+
+  with span('filter', page='compare'):
+      ...
+
+  @timed('read masters')
+  def read_masters(region): ...
+
+  with trace('rerun', page='Compare') as record:   # collect, emit once
+      pg.run()
+
+Spans nest. Inside a trace() on the same thread they are collected into the
+trace's record (which is emitted, and kept for the debug panel, when the trace
+ends) rather than printed one by one. When SPANS is off, span() hands back a
+shared no-op context manager and timed() returns the function unchanged, so
+instrumented code pays one function call per span at most.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+_mode = os.environ.get('SPANS', '').strip().lower()
+ENABLED = _mode not in ('', '0', 'off', 'false')
+PANEL = _mode == 'panel'
+HISTORY = int(os.environ.get('SPANS_HISTORY', 10))
+LOG_PATH = os.environ.get('SPANS_LOG')
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def emit(record):
+    """Write one record as a JSON line to SPANS_LOG, or stdout."""
+    line = json.dumps(record, default=str)
+    with _write_lock:
+        if LOG_PATH:
+            with open(LOG_PATH, 'a') as f:
+                f.write(line + '\n')
+        else:
+            print(line, file=sys.stdout, flush=True)
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self.start) * 1000
+        _stack().pop()
+        record = {'span': self.name, 'ms': round(ms, 3), 'depth': self.depth}
+        if self.parent:
+            record['parent'] = self.parent
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        record.update(self.fields)
+        collected = getattr(_local, 'collected', None)
+        if collected is not None:
+            collected.append(record)
+        else:
+            emit(dict(record, ts=time.time(), pid=os.getpid(), thread=threading.current_thread().name))
+        return False
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def span(name, **fields):
+    """Context manager timing the block as `name`; `fields` go into its record."""
+    if not ENABLED:
+        return _NO_SPAN
+    return _Span(name, fields)
+
+
+def timed(name=None, **fields):
+    """Decorator: a span around every call, named `name` or the function's name."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(label, fields):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def trace(name, **fields):
+    """Time the block and collect every span finished inside it on this thread
+    into one record, emitted when the block ends. Yields that record (a dict,
+    filled in on exit), or None when SPANS is off."""
+    if not ENABLED:
+        yield None
+        return
+    record = {'trace': name, **fields}
+    outer = getattr(_local, 'collected', None)
+    _local.collected = record['spans'] = []
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        # st.rerun() and st.stop() end a script run by raising; still a rerun
+        record['ended_by'] = type(e).__name__
+        raise
+    finally:
+        record['ms'] = round((time.perf_counter() - start) * 1000, 3)
+        record['ts'] = time.time()
+        _local.collected = outer
+        emit(dict(record, pid=os.getpid()))
+
+
+def summarize(record):
+    """Total ms per span name in a trace record, in first-seen order."""
+    totals = {}
+    for s in record.get('spans', []):
+        totals[s['span']] = totals.get(s['span'], 0.0) + s['ms']
+    return totals
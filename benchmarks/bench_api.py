@@ -0,0 +1,153 @@
+"""Benchmark: requests per second of the data API (api.py) on one core.
+
+Starts api.py in a subprocess (pinned to one CPU where the OS allows), then
+has --clients client processes send requests over keep-alive connections for
+--seconds: a mix of every table, every jurisdiction, a few series and year
+ranges, in JSON and CSV, with gzip accepted. Prints throughput and the latency
+distribution. --revalidate makes that share of requests conditional
+(If-None-Match with the ETag from an earlier response), as a polling
+partner's would be.
+
+  python benchmarks/bench_api.py
+  python benchmarks/bench_api.py --clients 8 --seconds 20 --revalidate 0.5
+  python benchmarks/bench_api.py --url http://127.0.0.1:8502   # an API already running
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+import http.client
+import statistics
+import multiprocessing
+from urllib.parse import urlencode, urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8599
+
+
+def request_mix(tables, seed=0):
+    """Paths covering every table and jurisdiction with assorted filters."""
+    rng = random.Random(seed)
+    paths = []
+    for name, info in tables.items():
+        jurisdictions = info['jurisdictions'] or [None]
+        for jurisdiction in jurisdictions:
+            for _ in range(4):
+                params = [('format', rng.choice(['json', 'json', 'csv']))]
+                if jurisdiction is not None:
+                    params.append(('jurisdiction', jurisdiction))
+                if info['series'] and rng.random() < 0.5:
+                    params.append(('series', rng.choice(info['series'])))
+                if rng.random() < 0.5:
+                    params.append(('start', rng.choice([1980, 1990, 2000, 2010, 2020, 2025])))
+                paths.append(f'/v1/{name}?{urlencode(params)}')
+    rng.shuffle(paths)
+    return paths
+
+
+def client(url, paths, seconds, revalidate, seed, out):
+    rng = random.Random(seed)
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port)
+    etags = {}
+    latencies, statuses = [], {}
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        path = rng.choice(paths)
+        headers = {'Accept-Encoding': 'gzip'}
+        if path in etags and rng.random() < revalidate:
+            headers['If-None-Match'] = etags[path]
+        start = time.perf_counter()
+        conn.request('GET', path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        if response.getheader('Etag'):
+            etags[path] = response.getheader('Etag')
+    out.put((latencies, statuses))
+
+
+def wait_for(url, timeout=60):
+    parts = urlsplit(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            conn.request('GET', '/v1/tables')
+            response = conn.getresponse()
+            return json.loads(response.read())['tables']
+        except OSError:
+            time.sleep(0.2)
+    sys.exit(f'API did not come up at {url}')
+
+
+def start_server(port):
+    command = [sys.executable, os.path.join(REPO_ROOT, 'api.py'), '--port', str(port)]
+    server = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if hasattr(os, 'sched_setaffinity'):
+        # one core, whichever the OS gives it first
+        os.sched_setaffinity(server.pid, {sorted(os.sched_getaffinity(0))[0]})
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='benchmark an API that is already running')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--revalidate', type=float, default=0.0,
+                        help='share of repeat requests sent with If-None-Match (default 0)')
+    parser.add_argument('--out', help='also write the results as JSON')
+    args = parser.parse_args()
+
+    server = None if args.url else start_server(PORT)
+    url = args.url or f'http://127.0.0.1:{PORT}'
+    try:
+        tables = wait_for(url)
+        paths = request_mix(tables)
+        out = multiprocessing.Queue()
+        clients = [multiprocessing.Process(target=client, args=(url, paths, args.seconds,
+                                                                args.revalidate, seed, out))
+                   for seed in range(args.clients)]
+        for process in clients:
+            process.start()
+        latencies, statuses = [], {}
+        for _ in clients:
+            more, counts = out.get()
+            latencies += more
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+        for process in clients:
+            process.join()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    ms = sorted(t * 1000 for t in latencies)
+    result = {
+        'requests': len(ms),
+        'requests_per_second': len(ms) / args.seconds,
+        'clients': args.clients,
+        'distinct_paths': len(paths),
+        'p50_ms': ms[len(ms) // 2],
+        'p99_ms': ms[min(len(ms) - 1, int(len(ms) * 0.99))],
+        'mean_ms': statistics.fmean(ms),
+        'statuses': statuses,
+    }
+    print(f"{result['requests']} requests from {args.clients} clients in {args.seconds:g} s: "
+          f"{result['requests_per_second']:.0f} req/s, p50 {result['p50_ms']:.2f} ms, "
+          f"p99 {result['p99_ms']:.2f} ms ({len(paths)} distinct paths; statuses {statuses})")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f'wrote {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""Benchmark: per-render figure latency, plotly.express vs. charts.py.
+
+Builds each page's chart the way the views did before charts.py (px plus the
+update_layout / update_traces / per-trace recolor calls) and with the charts.py
+builders, for a spread of jurisdictions, and times:
+
+  build      constructing the figure
+  render     build + what st.plotly_chart then does with it (to_dict, to_json)
+
+Both paths must produce the same spec; the script checks that first.
+
+  python benchmarks/bench_charts.py
+  python benchmarks/bench_charts.py --repeat 50 --data-dir Data
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+import pandas as pd
+import plotly.io as pio
+import plotly.tools
+import plotly.express as px
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+import charts  # noqa: E402
+from data_access import TABLE_INDEXES, IndexedTable  # noqa: E402
+from utils import county_color_map  # noqa: E402
+
+FONT = charts.FONT_COLOR
+AXIS = dict(showline=True, linewidth=1, linecolor=FONT, showgrid=False)
+
+
+# ---- the px code as it stood in the views -----------------------------------------
+def px_overview(df, avg):
+    fig = px.line(df, x='Year', y='Permits', title='Permit history', height=460)
+    fig.update_layout(
+        hovermode='x unified',
+        hoverlabel=dict(font_size=16, bgcolor='#292929', font_color=FONT),
+        title={'font': {'color': FONT, 'weight': 'normal'}},
+        xaxis=dict(title='', tickfont=dict(size=16, color=FONT), gridcolor='#FFFFFF'),
+        yaxis=dict(title='', tickfont=dict(size=16, color=FONT)),
+        plot_bgcolor='#292929', paper_bgcolor='#292929')
+    fig.update_traces(hovertemplate='%{y:,.0f}', mode='lines',
+                      line=dict(color='#FF6F61', width=4, dash='solid'))
+    fig.add_shape(type='line', x0=df['Year'].min(), x1=df['Year'].max(), y0=avg, y1=avg,
+                  line=dict(color='#00BFFF', width=2, dash='dash'))
+    fig.add_annotation(x='2017.5', y=avg, text='Average since 1980', showarrow=False, yshift=10,
+                       font=dict(color='#00BFFF', size=16, weight='bold'))
+    fig.update_xaxes(showline=True, linewidth=1, linecolor=FONT)
+    fig.update_yaxes(showline=True, linewidth=1, linecolor=FONT, showgrid=False)
+    return fig
+
+
+def px_compare(df, title):
+    fig = px.line(df, x='Year', y='Permits', title=title, color='county_name',
+                  labels={'county_name': 'County'}, height=500)
+    fig.update_layout(
+        hovermode='x', margin=dict(t=60),
+        legend=dict(orientation='h', title_text='', yanchor='bottom', y=0.97, xanchor='left',
+                    bgcolor='rgba(41,41,41,0)'),
+        title={'font': {'color': FONT, 'size': 18}},
+        xaxis=dict(title='', tickfont=dict(size=16, color=FONT), gridcolor='#FFFFFF'),
+        yaxis=dict(title='', tickfont=dict(size=16, color=FONT), tickformat=','))
+    fig.update_traces(hovertemplate='<b>%{y}</b>', mode='lines',
+                      line=dict(width=3, dash='solid'), hoverlabel=dict(font_color='#171717'))
+    for trace in fig.data:
+        color = county_color_map.get(trace.name, '#000000')
+        trace.line.color = color
+        trace.hoverlabel.bgcolor = color
+    fig.update_xaxes(tickformat='.0f', **AXIS)
+    fig.update_yaxes(zeroline=False, **AXIS)
+    return fig
+
+
+def px_bars(df_agg):
+    fig = px.bar(df_agg, x='Permits', y='county_name', orientation='h', title=None,
+                 color='county_name', labels={'county_name': 'County'})
+    fig.update_layout(margin=dict(l=20, r=20, t=0, b=20), yaxis={'categoryorder': 'total ascending'},
+                      yaxis_title=None, xaxis_title=None, showlegend=False)
+    fig.update_traces(hovertemplate='<b>%{x:,}</b>', hoverlabel=dict(font_color='#171717'))
+    for trace in fig.data:
+        color = county_color_map.get(trace.name, '#000000')
+        trace.marker.color = color
+        trace.hoverlabel.bgcolor = color
+    return fig
+
+
+def px_area(df, x, title, colors, xaxis, margin):
+    fig = px.area(df, x=x, y='Permits', title=title, line_group='Series', color='Series',
+                  color_discrete_map=colors, height=545)
+    fig.update_layout(
+        hovermode='x', margin=margin,
+        legend=dict(font_size=14, orientation='h', title_text='', yanchor='bottom', y=0.97,
+                    xanchor='left', bgcolor='rgba(41,41,41,0)'),
+        legend_traceorder='reversed',
+        title={'font': {'color': FONT, 'size': 18}},
+        xaxis=dict(title='', tickfont=dict(size=16, color=FONT), gridcolor='#FFFFFF', **xaxis),
+        yaxis=dict(title='', tickfont=dict(size=16, color=FONT), tickformat=','),
+        plot_bgcolor='#292929', paper_bgcolor='#292929')
+    fig.update_traces(hovertemplate='<b>%{y}</b>', mode='lines', line=dict(width=2, dash='solid'),
+                      hoverlabel=dict(font_color='#171717'))
+    for trace in fig.data:
+        trace.hoverlabel.bgcolor = colors[trace.name]
+    fig.update_xaxes(**AXIS)
+    fig.update_yaxes(zeroline=False, **AXIS)
+    return fig
+
+
+# ---- the cases: (label, px builder, charts builder) -------------------------------
+def cases(tables):
+    metro = tables['metro_total_annual'].df
+    avg = metro['Permits'].mean()
+    yield ('overview', lambda: px_overview(metro, avg),
+           lambda: charts.history_line(metro['Year'].to_numpy(), metro['Permits'].to_numpy(),
+                                       'Permit history', avg, 'Average since 1980', '2017.5'))
+
+    county = tables['annual_county']
+    totals = tables['cumulative_totals']
+    for juris in (['Fulton'], ['Cobb', 'DeKalb', 'Gwinnett'], sorted(county_color_map)[:6]):
+        df = county.select([(j, 'All') for j in juris], since=1990)
+        series = [(j, r['Year'].to_numpy(), r['Permits'].to_numpy())
+                  for j in juris for r in [county.rows(j, 'All', since=1990)]]
+        yield (f'compare x{len(juris)}', lambda df=df: px_compare(df, 'title'),
+               lambda series=series: charts.jurisdiction_lines(series, 'title', county_color_map))
+        agg = pd.DataFrame({'county_name': juris,
+                            'Permits': [totals.total('annual_county', j, 'All', since=1990)
+                                        for j in juris]})
+        yield (f'compare bars x{len(juris)}', lambda agg=agg: px_bars(agg),
+               lambda agg=agg: charts.total_bars(list(agg['county_name']), list(agg['Permits']),
+                                                 county_color_map))
+
+    for name, key in (('annual metro', 'Metro'), ('annual county', 'Cobb')):
+        parts = [county.rows(key, s, since=1985) for s in ('Single-family', 'Multi-family')]
+        df = pd.concat(parts, ignore_index=True)
+        series = [(s, p['Year'].to_numpy(), p['Permits'].to_numpy())
+                  for s, p in zip(('Single-family', 'Multi-family'), parts)]
+        yield (name,
+               lambda df=df: px_area(df, 'Year', 'title', charts.SERIES_COLORS,
+                                     dict(tickformat='.0f'), dict(t=60)),
+               lambda series=series: charts.stacked_area(series, 'title'))
+
+    monthly = tables['monthly_master'].rows('Metro')
+    monthly = monthly.sort_values(by=['year_month', 'Series'], ascending=[True, False])
+    tickvals = monthly['date'].unique()[::3]
+    xaxis = dict(tickmode='array', tickvals=tickvals, tickangle=0, tickformat='%b %Y')
+    series = [(s, r['date'].to_numpy(), r['Permits'].to_numpy())
+              for s in ('Single-Family', 'Multi-Family')
+              for r in [monthly[monthly['Series'] == s]]]
+    yield ('monthly', lambda: px_area(monthly, 'date', 'title', charts.SERIES_COLORS, xaxis,
+                                      dict(t=60, r=15)),
+           lambda: charts.stacked_area(series, 'title', xaxis=xaxis, margin=dict(t=60, r=15)))
+
+
+def render(fig):
+    # what st.plotly_chart does with a Figure
+    return pio.to_json(plotly.tools.return_figure_from_figure_or_data(fig, True), validate=False)
+
+
+def spec(fig):
+    out = json.loads(render(fig))
+    out['layout'].pop('template', None)
+    for axis in ('xaxis', 'yaxis'):  # px leaves an empty title object behind
+        if out['layout'].get(axis, {}).get('title') == {}:
+            del out['layout'][axis]['title']
+    return out
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default=os.path.join(REPO_ROOT, 'Data'))
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    tables = {name: IndexedTable(pd.read_parquet(os.path.join(args.data_dir, f'{name}.parquet')),
+                                 *TABLE_INDEXES[name])
+              for name in TABLE_INDEXES}
+    all_cases = list(cases(tables))
+    for label, old, new in all_cases:
+        assert spec(old()) == spec(new()), f'{label}: specs differ'
+
+    print(f'{"chart":<18}{"px build":>10}{"go build":>10}{"px render":>11}{"go render":>11}{"speedup":>9}')
+    totals = [0.0, 0.0]
+    for label, old, new in all_cases:
+        build_old, build_new = timed(old, args.repeat), timed(new, args.repeat)
+        render_old = timed(lambda: render(old()), args.repeat)
+        render_new = timed(lambda: render(new()), args.repeat)
+        totals[0] += render_old
+        totals[1] += render_new
+        print(f'{label:<18}{build_old:>8.1f}ms{build_new:>8.1f}ms{render_old:>9.1f}ms'
+              f'{render_new:>9.1f}ms{render_old / render_new:>8.1f}x')
+    print(f'all charts: {totals[0]:.1f} ms with px, {totals[1]:.1f} ms with charts.py '
+          f'({totals[0] / totals[1]:.1f}x faster per render)')
+
+
+if __name__ == '__main__':
+    main()
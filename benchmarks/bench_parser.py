@@ -0,0 +1,100 @@
+"""Micro-benchmark: streaming BPS parser vs. the original whole-file loader.
+
+Times both on a South-region place file and reports best-of-N wall time and
+peak traced memory (numpy/pandas buffers included):
+
+  python benchmarks/bench_parser.py                      # downloads so2501c.txt
+  python benchmarks/bench_parser.py --file so2501c.txt   # local copy
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+import urllib.request
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+from fetch_permits import load_place_data  # noqa: E402
+
+DEFAULT_URL = 'https://www2.census.gov/econ/bps/Place/South%20Region/so2501c.txt'
+
+
+# The place loader as it stood before the shared parser, kept as the baseline.
+def legacy_load_place_data(url):
+    df = pd.read_csv(url, skiprows=1)
+    df = df.rename(columns={
+        'Date': 'year_month',
+        'Code': 'State',
+        'Code.1': 'County',
+        'Units': 'SF_permits',
+        'Value': 'SF_value',
+        'Units.1': '2U_permits',
+        'Value.1': '2U_value',
+        'Units.2': '3-4U_permits',
+        'Value.2': '3-4U_value',
+        'Units.3': '5+U_permits',
+        'Value.3': '5+U_value'
+    })
+    df['FIPS'] = df['State'].astype(str).str.zfill(
+        2) + df['County'].astype(str).str.zfill(3)
+    df = df[df['FIPS'].astype(str).str.startswith('13')]
+    df['Name'] = df['Name'].str.replace(' town', '')
+    df['date'] = df['year_month'].apply(
+        lambda code: datetime(int(str(code)[:4]), int(str(code)[4:]), 1).strftime('%b %Y'))
+    df['Level'] = 'City/Other'
+    df['MF_permits'] = df['2U_permits'] + \
+        df['3-4U_permits'] + df['5+U_permits']
+    df['MF_value'] = df['2U_value'] + \
+        df['3-4U_value'] + df['5+U_value']
+    return df[['year_month', 'date', 'Level', 'Name', 'SF_permits', 'SF_value',
+               'MF_permits', 'MF_value', '2U_permits', '2U_value', '3-4U_permits',
+               '3-4U_value', '5+U_permits', '5+U_value']]
+
+
+def measure(loader, path, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loader(path)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    df = loader(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--file', help='local BPS place file (default: download so2501c.txt)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    path = args.file
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), 'so2501c.txt')
+        if not os.path.exists(path):
+            urllib.request.urlretrieve(DEFAULT_URL, path)
+
+    old_time, old_peak, old_df = measure(legacy_load_place_data, path, args.repeat)
+    new_time, new_peak, new_df = measure(load_place_data, path, args.repeat)
+    new_df = new_df[new_df['State'] == 13].drop(columns='State')
+
+    same = old_df.assign(Name=old_df['Name'].str.strip()).reset_index(drop=True) \
+        .astype(str).equals(new_df.reset_index(drop=True).astype(str))
+    print(f'{os.path.basename(path)}: {os.path.getsize(path) / 1024:.0f} KB, {len(new_df)} Georgia rows')
+    print(f'{"loader":<10}{"best time":>12}{"peak memory":>14}')
+    print(f'{"legacy":<10}{old_time * 1000:>10.1f}ms{old_peak / 2**20:>12.1f}MB')
+    print(f'{"streaming":<10}{new_time * 1000:>10.1f}ms{new_peak / 2**20:>12.1f}MB')
+    print(f'speedup {old_time / new_time:.1f}x, memory {old_peak / new_peak:.1f}x lower, '
+          f'identical output: {same}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Benchmark: widget interactions against the indexed tables vs. boolean masks.
+
+Replays a few thousand random widget changes across the Jurisdiction Compare,
+Annual Trends and Monthly Trends pages (geography, counties, permit type,
+start year) and times the data step of each rerun three ways:
+
+  cache_data + masks  what the views did before data_access.py: a fresh copy of
+                      the table out of st.cache_data (a pickle round-trip),
+                      then a full-table boolean mask per filter
+  masks               the same filters on a shared table, without the copy
+  index               data_access.IndexedTable slices
+
+  python benchmarks/bench_queries.py
+  python benchmarks/bench_queries.py --interactions 10000 --data-dir Data
+"""
+
+import os
+import sys
+import time
+import pickle
+import random
+import argparse
+import statistics
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from data_access import TABLE_INDEXES, IndexedTable  # noqa: E402
+
+ANNUAL_SERIES = ['Single-family', 'Multi-family']
+
+
+def random_interactions(n, tables, seed):
+    rng = random.Random(seed)
+    counties = sorted(tables['annual_county']['county_name'].unique())
+    cities = sorted(tables['annual_city']['City'].unique())
+    monthly = tables['monthly_master']
+    monthly_cities = sorted(monthly.loc[monthly['Level'] == 'City/Other', 'Name'].unique())
+    monthly_counties = sorted(monthly.loc[monthly['Level'] == 'County', 'Name'].unique())
+    out = []
+    for _ in range(n):
+        page = rng.choice(['compare', 'annual', 'monthly'])
+        if page == 'compare':
+            out.append(('compare', rng.sample(counties, rng.randint(1, 5)),
+                        rng.choice(ANNUAL_SERIES + ['All']), rng.randint(1980, 2025)))
+        elif page == 'annual':
+            level = rng.choice(['Region', 'County', 'City'])
+            name = {'Region': 'Metro', 'County': rng.choice(counties),
+                    'City': rng.choice(cities)}[level]
+            out.append(('annual', level, name, rng.randint(1980, 2025)))
+        else:
+            level = rng.choice(['Region', 'County', 'City'])
+            name = {'Region': 'Metro', 'County': rng.choice(monthly_counties),
+                    'City': rng.choice(monthly_cities)}[level]
+            out.append(('monthly', level, name))
+    return out
+
+
+# ---- the views' filters before the index ------------------------------------------
+def masks(tables, action, copy):
+    def table(name):
+        df = tables[name]
+        return pickle.loads(pickle.dumps(df)) if copy else df
+
+    if action[0] == 'compare':
+        _, juris, series, year = action
+        df = table('annual_county')
+        df = df[df['county_name'].isin(juris)]
+        df = df[df['Year'] >= year]
+        return df[df['Series'] == series]
+    if action[0] == 'annual':
+        _, level, name, year = action
+        if level == 'City':
+            df = table('annual_city').sort_values(by='Series', ascending=False)
+            df = df[df['City'] == name]
+        else:
+            df = table('annual_county')
+            df = df[df['Series'] != 'All'].sort_values(by='Series', ascending=False)
+            df = df[df['county_name'] == name]
+        return df[df['Year'] >= year]
+    _, level, name = action
+    df = table('monthly_master')
+    df = df.sort_values(by='Series', ascending=False)
+    df = df.sort_values(by=['year_month', 'Name'], ascending=True)
+    if level == 'City':
+        df = df[df['Level'] == 'City/Other']
+    elif level == 'County':
+        df = df[df['Level'] == 'County']
+    return df[df['Name'] == name]
+
+
+# ---- the views' filters now -------------------------------------------------------
+def indexed(indexes, action):
+    if action[0] == 'compare':
+        _, juris, series, year = action
+        return indexes['annual_county'].select(
+            [(j, series) for j in sorted(juris)], since=year)
+    if action[0] == 'annual':
+        _, level, name, year = action
+        table = indexes['annual_city' if level == 'City' else 'annual_county']
+        return table.select([(name, s) for s in ANNUAL_SERIES], since=year)
+    _, level, name = action
+    table = indexes['monthly_master']
+    df = table.rows('Metro') if level == 'Region' else \
+        table.rows(name, 'City/Other' if level == 'City' else 'County')
+    return df.sort_values(by=['year_month', 'Series'], ascending=[True, False])
+
+
+def replay(fn, actions):
+    times = []
+    for action in actions:
+        start = time.perf_counter()
+        fn(action)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default=os.path.join(REPO_ROOT, 'Data'))
+    parser.add_argument('--interactions', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    tables = {name: pd.read_parquet(os.path.join(args.data_dir, f'{name}.parquet'))
+              for name in TABLE_INDEXES}
+    start = time.perf_counter()
+    indexes = {name: IndexedTable(df, *TABLE_INDEXES[name]) for name, df in tables.items()}
+    build = time.perf_counter() - start
+    actions = random_interactions(args.interactions, tables, args.seed)
+
+    # both paths must select the same rows
+    for action in actions[:200]:
+        old = masks(tables, action, copy=False)
+        new = indexed(indexes, action)
+        cols = list(old.columns)
+        assert old.sort_values(cols).reset_index(drop=True).equals(
+            new.sort_values(cols).reset_index(drop=True)), action
+
+    results = {
+        'cache_data + masks': replay(lambda a: masks(tables, a, copy=True), actions),
+        'masks': replay(lambda a: masks(tables, a, copy=False), actions),
+        'index': replay(lambda a: indexed(indexes, a), actions),
+    }
+
+    print(f'{args.interactions} interactions; index built once in {build * 1000:.1f} ms')
+    print(f'{"path":<20}{"total":>10}{"median":>10}{"p95":>10}')
+    for name, times in results.items():
+        p95 = sorted(times)[int(len(times) * 0.95)]
+        print(f'{name:<20}{sum(times):>9.2f}s{statistics.median(times) * 1e3:>8.2f}ms'
+              f'{p95 * 1e3:>8.2f}ms')
+    base, new = results['cache_data + masks'], results['index']
+    print(f'index vs cache_data + masks: {statistics.median(base) / statistics.median(new):.0f}x '
+          f'faster per interaction (median)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Benchmark: server-side rerun latency of each page, headless, via AppTest.
+
+Drives main.py and every page in views/ through scripted widget sequences with
+streamlit.testing.v1.AppTest: switch geography level, pick each county and
+city, change the permit type, move the year slider. Every rerun's wall time
+(the script run plus AppTest's handling of its output) and Python allocation
+peak (tracemalloc) is recorded, and the distribution is printed per page.
+
+Each sequence runs once with the desktop layout and once with the mobile one,
+set in session state the way main.py's screen query (layout.py) would.
+
+Times are taken on a pass without tracemalloc, which slows Python down a lot;
+the allocation peaks come from a second pass of the same sequence. The figure
+cache is emptied before each pass, so a pass measures figure builds; --warm
+keeps it, to measure reruns that hit the cache.
+
+  python benchmarks/bench_reruns.py
+  python benchmarks/bench_reruns.py --pages compare annual --screens mobile
+  python benchmarks/bench_reruns.py --out reruns.json --no-memory
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import statistics
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.chdir(REPO_ROOT)  # the pages open assets/ and Data/ relative to the repo
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from figure_cache import figures  # noqa: E402
+
+SCREENS = ['desktop', 'mobile']
+PERMIT_TYPES = ['Single-family', 'Multi-family', 'All']
+YEARS = [1980, 1990, 2000, 2010, 2020, 2025]
+TIMEOUT = 120
+
+
+# ---- widget sequences: each yields (label, action); action(at) sets a widget
+# and returns it (or the AppTest) for the rerun. The generators run lazily, so
+# current() is the AppTest after the previous step's rerun.
+def overview_steps(current):
+    yield 'load', None
+
+
+def compare_steps(current):
+    yield 'load', None
+    options = current().multiselect(key='county_input').options
+    for county in options:
+        yield 'county', lambda at, county=county: at.multiselect(key='county_input').set_value([county])
+    # grow the selection to the desktop limit
+    picks = options[:5]
+    for n in range(2, len(picks) + 1):
+        yield 'add county', lambda at, n=n: at.multiselect(key='county_input').set_value(picks[:n])
+    for permit_type in PERMIT_TYPES:
+        yield 'permit type', lambda at, t=permit_type: at.radio(key='permit_type_input').set_value(t)
+    for year in YEARS:
+        yield 'year', lambda at, year=year: at.slider(key='starting_year_input').set_value(year)
+
+
+def geography_steps(radio, county_key, city_key, slider=False):
+    def steps(current):
+        yield 'load', None
+        if slider:
+            for year in YEARS:
+                yield 'year', lambda at, year=year: at.slider[0].set_value(year)
+        yield 'geo level', lambda at: at.radio(key=radio).set_value('County')
+        for county in current().selectbox(key=county_key).options:
+            yield 'county', lambda at, c=county: at.selectbox(key=county_key).set_value(c)
+        yield 'geo level', lambda at: at.radio(key=radio).set_value('City')
+        for city in current().selectbox(key=city_key).options:
+            yield 'city', lambda at, c=city: at.selectbox(key=city_key).set_value(c)
+        yield 'geo level', lambda at: at.radio(key=radio).set_value('Region')
+    return steps
+
+
+def navigation_steps(current):
+    # main.py: the st.navigation shell, switching through every page. AppTest
+    # (Streamlit 1.38) runs the shell but not the page it navigates to, so this
+    # times what main.py adds to every rerun; the pages are driven directly.
+    yield 'load', None
+    for page in sorted(os.listdir('views')):
+        if page.endswith('.py'):
+            yield 'switch page', lambda at, page=page: at.switch_page(f'views/{page}')
+
+
+PAGES = {
+    'main': ('main.py', navigation_steps),
+    'overview': ('views/1_overview.py', overview_steps),
+    'compare': ('views/2_jurisdiction_compare.py', compare_steps),
+    'annual': ('views/3_annual_trends.py',
+               geography_steps('geography_type_input2', 'county2', 'city2', slider=True)),
+    'monthly': ('views/4_monthly_trends.py',
+                geography_steps('geography_type_input3', 'county', 'city')),
+    'about': ('views/5_about.py', overview_steps),
+}
+
+
+def run_sequence(path, steps, screen, memory):
+    """Run one pass of a page's sequence in a fresh session with the `screen`
+    layout; returns a list of (label, seconds or peak bytes, exception message
+    or None) per rerun."""
+    at = AppTest.from_file(path, default_timeout=TIMEOUT)
+    at.session_state['layout'] = screen
+    out = []
+    for label, action in steps(lambda: at):
+        target = at if action is None else action(at)
+        if memory:
+            tracemalloc.start()
+            at = target.run()
+            _, value = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        else:
+            start = time.perf_counter()
+            at = target.run()
+            value = time.perf_counter() - start
+        out.append((label, value, at.exception[0].value if at.exception else None))
+    return out
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def distribution(ms):
+    return {
+        'reruns': len(ms),
+        'min_ms': min(ms),
+        'p50_ms': percentile(ms, 50),
+        'p90_ms': percentile(ms, 90),
+        'p99_ms': percentile(ms, 99),
+        'max_ms': max(ms),
+        'mean_ms': statistics.fmean(ms),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=list(PAGES))
+    parser.add_argument('--screens', nargs='+', choices=SCREENS, default=SCREENS)
+    parser.add_argument('--warm', action='store_true', help='keep the figure cache between passes')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--out', help='also write the distributions and every rerun as JSON')
+    args = parser.parse_args()
+
+    # load the tables once, so the first measured rerun isn't the process's cold start
+    AppTest.from_file(PAGES['overview'][0], default_timeout=TIMEOUT).run()
+
+    results = {}
+    print(f'{"page":<18}{"reruns":>7}{"p50":>9}{"p90":>9}{"p99":>9}{"max":>9}{"peak alloc p50/max":>22}')
+    for page in args.pages:
+        path, steps = PAGES[page]
+        for screen in args.screens:
+            if not args.warm:
+                figures.clear()
+            reruns = run_sequence(path, steps, screen, memory=False)
+            result = distribution([seconds * 1000 for _, seconds, _ in reruns])
+            result['steps'] = [dict(step=label, ms=seconds * 1000, error=error)
+                               for label, seconds, error in reruns]
+            errors = [step for step in result['steps'] if step['error']]
+            line = (f'{page + " " + screen:<18}{result["reruns"]:>7}{result["p50_ms"]:>7.1f}ms'
+                    f'{result["p90_ms"]:>7.1f}ms{result["p99_ms"]:>7.1f}ms{result["max_ms"]:>7.1f}ms')
+            if not args.no_memory:
+                if not args.warm:
+                    figures.clear()
+                peaks = [peak / 2**20 for _, peak, _ in run_sequence(path, steps, screen, memory=True)]
+                result['peak_mb_p50'] = percentile(peaks, 50)
+                result['peak_mb_max'] = max(peaks)
+                for step, peak in zip(result['steps'], peaks):
+                    step['peak_mb'] = peak
+                line += f'{result["peak_mb_p50"]:>11.1f}/{result["peak_mb_max"]:.1f} MB'
+            results[f'{page}/{screen}'] = result
+            print(line)
+            # a rerun that raised is still timed, but say so
+            for step in errors:
+                print(f'  exception on a {step["step"]} rerun: {step["error"]}')
+
+    print(f'figure cache: {figures.summary()}')
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'wrote {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark: loading the dashboard tables from CSV vs. Parquet.
+
+Each trial runs in a fresh interpreter, so it sees what a cold app start sees:
+pandas is imported first (not timed), then the four tables the views read are
+loaded twice. Reports medians of:
+
+  first load   the cold read, including Arrow's one-time setup for Parquet
+  repeat load  the same read again, i.e. the per-file cost
+  cache hit    a pickle round-trip of the loaded frames, which is what
+               st.cache_data pays every time a view asks for its data
+  RSS growth   process memory added by the first load
+  in memory    deep size of the loaded DataFrames
+
+  python benchmarks/bench_storage.py
+  python benchmarks/bench_storage.py --data-dir Data --trials 9
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TABLES = ['monthly_master', 'annual_county', 'annual_city', 'metro_total_annual']
+
+# Runs in the child interpreter; prints one JSON line.
+TRIAL = r'''
+import sys, json, time, pickle, resource
+import pandas as pd
+
+
+def rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:  # not Linux: fall back to peak RSS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+fmt, paths = sys.argv[1], sys.argv[2:]
+read = pd.read_csv if fmt == 'csv' else pd.read_parquet
+before = rss()
+start = time.perf_counter()
+frames = [read(path) for path in paths]
+first = time.perf_counter() - start
+grown = rss() - before
+
+start = time.perf_counter()
+frames = [read(path) for path in paths]
+repeat = time.perf_counter() - start
+
+start = time.perf_counter()
+for df in frames:
+    pickle.loads(pickle.dumps(df))
+hit = time.perf_counter() - start
+print(json.dumps({
+    'first': first,
+    'repeat': repeat,
+    'hit': hit,
+    'rss': grown,
+    'deep': sum(int(df.memory_usage(deep=True).sum()) for df in frames),
+}))
+'''
+
+
+def trial(fmt, paths):
+    out = subprocess.run([sys.executable, '-c', TRIAL, fmt, *paths],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default=os.path.join(REPO_ROOT, 'Data'))
+    parser.add_argument('--trials', type=int, default=7)
+    args = parser.parse_args()
+
+    results = {}
+    for fmt in ('csv', 'parquet'):
+        paths = [os.path.join(args.data_dir, f'{t}.{fmt}') for t in TABLES]
+        runs = [trial(fmt, paths) for _ in range(args.trials)]
+        results[fmt] = {key: statistics.median(r[key] for r in runs)
+                        for key in ('first', 'repeat', 'hit', 'rss', 'deep')}
+        results[fmt]['bytes'] = sum(os.path.getsize(p) for p in paths)
+
+    print(f'{"format":<10}{"on disk":>10}{"first load":>12}{"repeat load":>13}{"cache hit":>11}'
+          f'{"RSS growth":>12}{"in memory":>11}')
+    for fmt, r in results.items():
+        print(f'{fmt:<10}{r["bytes"] / 1024:>8.0f}KB{r["first"] * 1000:>10.1f}ms'
+              f'{r["repeat"] * 1000:>11.1f}ms{r["hit"] * 1000:>9.1f}ms'
+              f'{r["rss"] / 2**20:>10.1f}MB{r["deep"] / 2**20:>9.2f}MB')
+    csv, pq = results['csv'], results['parquet']
+    print(f'parquet vs csv: repeat load {csv["repeat"] / pq["repeat"]:.1f}x faster, '
+          f'cache hit {csv["hit"] / pq["hit"]:.1f}x faster, '
+          f'{csv["deep"] / pq["deep"]:.1f}x smaller in memory, '
+          f'{csv["bytes"] / pq["bytes"]:.1f}x smaller on disk')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""Benchmark: dashboard throughput against the number of Streamlit workers.
+
+For each --workers count, starts workers.py (N Streamlit processes behind its
+sticky proxy, sharing the memory-mapped tables), then opens --sessions
+websocket sessions, spread over --clients client processes, that each rerun
+the pages in turn, the way a browser's session does when someone clicks
+through the navigation. A rerun is timed from sending it to the script_finished
+message. Prints reruns per second and rerun latency per worker count, and the
+workers' combined proportional memory (PSS, Linux only), which counts the
+shared table pages once.
+
+The sessions speak Streamlit's websocket protocol directly, so nothing is
+rendered in a browser; what is measured is the server: script runs, figure
+serialization, and the proxy.
+
+  python benchmarks/bench_workers.py
+  python benchmarks/bench_workers.py --workers 1 2 4 8 --sessions 16 --seconds 30
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+import subprocess
+import statistics
+import urllib.request
+import multiprocessing
+
+from tornado.httpclient import HTTPRequest
+from tornado.websocket import websocket_connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8590
+BASE_PORT = 8700
+
+# st.navigation url paths of the pages, as main.py registers them
+PAGES = ['', 'jurisdiction_compare', 'annual_trends', 'monthly_trends', 'about']
+
+
+async def rerun(ws, page):
+    msg = BackMsg()
+    msg.rerun_script.query_string = ''
+    msg.rerun_script.page_name = page
+    await ws.write_message(msg.SerializeToString(), binary=True)
+    while True:
+        raw = await ws.read_message()
+        if raw is None:
+            raise ConnectionError('session closed')
+        forward = ForwardMsg()
+        forward.ParseFromString(raw)
+        if forward.WhichOneof('type') == 'script_finished':
+            return
+
+
+async def session(url, seconds, offset, latencies):
+    ws = await websocket_connect(HTTPRequest(url), subprotocols=['streamlit'])
+    await rerun(ws, PAGES[offset % len(PAGES)])   # first run builds the session
+    i = offset
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        i += 1
+        start = time.perf_counter()
+        await rerun(ws, PAGES[i % len(PAGES)])
+        latencies.append(time.perf_counter() - start)
+    ws.close()
+
+
+def client(url, sessions, seconds, first, out):
+    latencies = []
+
+    async def run():
+        await asyncio.gather(*[session(url, seconds, first + i, latencies) for i in range(sessions)])
+    asyncio.run(run())
+    out.put(latencies)
+
+
+def pss_mb(pid):
+    # proportional set size: shared pages split between the processes mapping them
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def worker_pids(parent):
+    try:
+        out = subprocess.run(['pgrep', '-P', str(parent)], capture_output=True, text=True).stdout
+    except OSError:
+        return []
+    return [int(pid) for pid in out.split()]
+
+
+def wait_for(port, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=2):
+                return
+        except OSError:
+            time.sleep(0.5)
+    sys.exit(f'workers.py did not come up on port {port}')
+
+
+def measure(workers, args):
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, 'workers.py'), '--workers', str(workers),
+         '--port', str(PORT), '--address', '127.0.0.1', '--base-port', str(BASE_PORT)],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(PORT)
+        url = f'ws://127.0.0.1:{PORT}/_stcore/stream'
+        out = multiprocessing.Queue()
+        per_client = max(1, args.sessions // args.clients)
+        clients = [multiprocessing.Process(target=client, args=(url, per_client, args.seconds,
+                                                                i * per_client, out))
+                   for i in range(args.clients)]
+        for process in clients:
+            process.start()
+        latencies = []
+        for _ in clients:
+            latencies += out.get()
+        for process in clients:
+            process.join()
+        memory = [pss_mb(pid) for pid in worker_pids(server.pid)]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    ms = sorted(t * 1000 for t in latencies)
+    return {
+        'workers': workers,
+        'sessions': per_client * args.clients,
+        'reruns': len(ms),
+        'reruns_per_second': len(ms) / args.seconds,
+        'p50_ms': ms[len(ms) // 2] if ms else None,
+        'p90_ms': ms[int(len(ms) * 0.9)] if ms else None,
+        'mean_ms': statistics.fmean(ms) if ms else None,
+        'workers_pss_mb': sum(memory) if memory and None not in memory else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--sessions', type=int, default=8, help='concurrent sessions')
+    parser.add_argument('--clients', type=int, default=2, help='client processes driving them')
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--out', help='also write the results as JSON')
+    args = parser.parse_args()
+
+    print(f'{os.cpu_count()} CPUs; {args.sessions} sessions for {args.seconds:g} s per worker count')
+    print(f'{"workers":>8}{"reruns/s":>10}{"p50":>10}{"p90":>10}{"speedup":>9}{"workers PSS":>14}')
+    results = []
+    for workers in args.workers:
+        result = measure(workers, args)
+        results.append(result)
+        speedup = result['reruns_per_second'] / results[0]['reruns_per_second']
+        memory = f'{result["workers_pss_mb"]:.0f} MB' if result['workers_pss_mb'] else 'n/a'
+        print(f'{workers:>8}{result["reruns_per_second"]:>10.1f}{result["p50_ms"]:>8.1f}ms'
+              f'{result["p90_ms"]:>8.1f}ms{speedup:>8.2f}x{memory:>14}')
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'wrote {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Build BPS-format text files from the committed raw masters.
+
+Writes a directory laid out like www2.census.gov/econ/bps (County/co2501c.txt,
+Place/South Region/so2501c.txt, County/co2024a.txt, ...) whose in-state rows
+are the committed Data/raw/ masters, padded with out-of-state filler rows so
+the loaders' state filter does the same work as on a national Census file.
+The benchmark suite parses these, and census_stub.py can serve them:
+
+  python benchmarks/bps_fixtures.py /tmp/bps-mirror
+  python backend/census_stub.py /tmp/bps-mirror --port 8765
+"""
+
+import os
+import sys
+import zlib
+import argparse
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'backend'))
+from fetch_permits import monthly_master_path, annual_master_path  # noqa: E402
+
+# out-of-state rows per file, roughly the size of the real national county
+# file and the South region place file
+COUNTY_FILLER = 3000
+PLACE_FILLER = 8000
+FILLER_STATES = (1, 12, 45, 48)   # AL, FL, SC, TX
+
+KINDS = ['SF', '2U', '3-4U', '5+U']
+VALUES = 'Bldgs,Units,Value'
+UNIT_HEADER = ',1-unit,,,2-units,,,3-4 units,,,5+ units,,,1-unit rep,,,2-units rep,,,3-4 units rep,,,5+ units rep,,'
+COUNTY_HEADER = [
+    'Survey,FIPS,FIPS,Region,Division,County' + UNIT_HEADER,
+    'Date,State,County,Code,Code,Name,' + ','.join([VALUES] * 8),
+]
+PLACE_HEADER = [
+    'Survey,State,6-Digit,County,Census Place,FIPS Place,FIPS MCD,Pop,CSA,CBSA,Footnote,'
+    'Central,Zip,Region,Division,Number of,Place' + UNIT_HEADER,
+    'Date,Code,ID,Code,Code,Code,Code,Pop,CSA,CBSA,Footnote,Central,Zip,Code,Code,Months,Name,'
+    + ','.join([VALUES] * 8),
+]
+
+
+def _units(row):
+    # buildings, units, value for each structure size; the "rep" block repeats them
+    cells = []
+    for kind in KINDS:
+        units = int(row[f'{kind}_permits'])
+        cells += [units, units, int(row[f'{kind}_value'])]
+    return cells + cells
+
+
+def _fips(name, known, state):
+    # the annual master has real FIPS codes; anything else gets a stable made-up one
+    if name in known:
+        return known[name]
+    return f'{state:02d}{zlib.crc32(name.encode()) % 900 + 100:03d}{zlib.crc32(name.encode()[::-1]) % 999999:06d}'
+
+
+def _county_line(date, row, fips, name):
+    return ','.join(map(str, [date, int(fips[:2]), int(fips[2:5]), 3, 5, f'{name} County']
+                        + _units(row)))
+
+
+def _place_line(date, row, fips, name):
+    return ','.join(map(str, [date, int(fips[:2]), int(fips[5:11]), int(fips[2:5]), 0, 0, 0,
+                              1000, '', '', '', '', '', 3, 5, 12, name] + _units(row)))
+
+
+def _filler(date, count, line, zero):
+    for i in range(count):
+        state = FILLER_STATES[i % len(FILLER_STATES)]
+        yield line(date, zero, f'{state:02d}{i % 999 + 1:03d}{i:06d}', f'Filler {i}')
+
+
+def _write(path, header, lines):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='latin-1') as f:
+        f.write('\n'.join(header) + '\n\n' + '\n'.join(lines) + '\n')
+
+
+def write_fixtures(out_dir, state_abbr='GA', state_fips=13, monthly=None, annual=None,
+                   county_filler=COUNTY_FILLER, place_filler=PLACE_FILLER):
+    """Write monthly (c) and annual (a) county and place files for every
+    period in the state's masters. Returns the paths written."""
+    if monthly is None:
+        monthly = pd.read_csv(monthly_master_path(state_abbr))
+    if annual is None:
+        annual = pd.read_csv(annual_master_path(state_abbr), dtype={'FIPS': str})
+    known = {level: dict(zip(rows['Name'], rows['FIPS']))
+             for level, rows in annual.groupby('Level')}
+    zero = {f'{kind}_{col}': 0 for kind in KINDS for col in ('permits', 'value')}
+    paths = []
+
+    def write_period(df, date, code):
+        counties = df[df['Level'] == 'County']
+        places = df[df['Level'] == 'City/Other']
+        county_lines = list(_filler(date, county_filler, _county_line, zero))
+        county_lines += [_county_line(date, row, _fips(row['Name'], known.get('County', {}), state_fips),
+                                      row['Name']) for _, row in counties.iterrows()]
+        place_lines = list(_filler(date, place_filler, _place_line, zero))
+        place_lines += [_place_line(date, row, _fips(row['Name'], known.get('City/Other', {}),
+                                                     state_fips), row['Name'])
+                        for _, row in places.iterrows()]
+        for path, header, lines in (
+                (os.path.join(out_dir, 'County', f'co{code}.txt'), COUNTY_HEADER, county_lines),
+                (os.path.join(out_dir, 'Place', 'South Region', f'so{code}.txt'), PLACE_HEADER,
+                 place_lines)):
+            _write(path, header, lines)
+            paths.append(path)
+
+    for year_month, df in monthly.groupby('year_month'):
+        write_period(df, year_month, f'{str(year_month)[2:]}c')
+    for year, df in annual.groupby('Year'):
+        write_period(df, year, f'{year}a')
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('out_dir')
+    parser.add_argument('--state', default='GA', help='state abbreviation of the masters to use')
+    parser.add_argument('--state-fips', type=int, default=13)
+    args = parser.parse_args()
+    paths = write_fixtures(args.out_dir, args.state, args.state_fips)
+    print(f'wrote {len(paths)} files under {args.out_dir}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""Benchmark suite for the dashboard's hot paths, with JSON results to compare.
+
+Times, on fixtures built from the committed Data/ and Data/raw/ files:
+
+  loader/*    the four BPS loaders on generated Census-format text files
+  build/*     each build_dashboard_tables() stage, from the committed raw masters
+  table/*     reading + indexing each table the app loads (data_access.py)
+  filter/*    every view's data lookups for a typical selection
+  figure/*    building each chart (charts.py) and serializing it as
+              st.plotly_chart does
+
+Each benchmark runs --repeat times after a warm-up; min/median/mean ms are
+written to --out. With --compare, medians are checked against an earlier
+results file and the run exits non-zero if any slowed down by more than
+--threshold, so it can gate a deploy or the scheduled refresh:
+
+  python benchmarks/run_suite.py --out bench-main.json
+  python benchmarks/run_suite.py --out bench-branch.json --compare bench-main.json
+  python benchmarks/run_suite.py --only figure/   # one group
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+import pandas as pd
+import plotly.io as pio
+import plotly.tools
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'backend'))
+import charts  # noqa: E402
+from bps_fixtures import write_fixtures  # noqa: E402
+from data_access import TABLE_INDEXES, IndexedTable  # noqa: E402
+from utils import county_color_map  # noqa: E402
+from fetch_permits import (load_county_data, load_place_data,  # noqa: E402
+                           load_county_annual, load_place_annual)
+from backend_query import build_dashboard_tables, read_masters, read_existing_tables  # noqa: E402
+from regions import get_region  # noqa: E402
+
+
+def measure(fn, repeat):
+    fn()  # warm-up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summarize(times):
+    ms = [t * 1000 for t in times]
+    return {'min_ms': min(ms), 'median_ms': statistics.median(ms),
+            'mean_ms': statistics.fmean(ms), 'runs': len(ms)}
+
+
+# ---- benchmark groups: each yields (name, [seconds, ...]) ----------------------------
+def loader_benchmarks(fixture_dir, repeat):
+    county = sorted(os.listdir(os.path.join(fixture_dir, 'County')))
+    month = next(f for f in reversed(county) if f.endswith('c.txt'))[2:6]
+    year = int(next(f for f in reversed(county) if f.endswith('a.txt'))[2:6])
+    county_path = lambda code: os.path.join(fixture_dir, 'County', f'co{code}.txt')  # noqa: E731
+    place_path = lambda code: os.path.join(fixture_dir, 'Place', 'South Region', f'so{code}.txt')  # noqa: E731
+    yield 'loader/county_monthly', measure(lambda: load_county_data(county_path(f'{month}c')), repeat)
+    yield 'loader/place_monthly', measure(lambda: load_place_data(place_path(f'{month}c')), repeat)
+    yield 'loader/county_annual', measure(lambda: load_county_annual(county_path(f'{year}a'), year), repeat)
+    yield 'loader/place_annual', measure(lambda: load_place_annual(place_path(f'{year}a'), year), repeat)
+
+
+def build_benchmarks(region, repeat):
+    monthly_df, annual_df = read_masters(region)
+    existing = read_existing_tables(region)
+    runs = []
+    build_dashboard_tables(monthly_df, annual_df, existing, region)  # warm-up
+    for _ in range(repeat):
+        timings = {}
+        build_dashboard_tables(monthly_df, annual_df, existing, region, timings=timings)
+        runs.append(timings)
+    for stage in runs[0]:
+        yield f'build/{stage}', [timings[stage] for timings in runs]
+    yield 'build/total', [sum(timings.values()) for timings in runs]
+
+
+def table_benchmarks(data_dir, repeat):
+    for name, (keys, order) in TABLE_INDEXES.items():
+        path = os.path.join(data_dir, f'{name}.parquet')
+        yield f'table/{name}', measure(lambda: IndexedTable(pd.read_parquet(path), keys, order), repeat)
+
+
+def load_tables(data_dir):
+    return {name: IndexedTable(pd.read_parquet(os.path.join(data_dir, f'{name}.parquet')), keys, order)
+            for name, (keys, order) in TABLE_INDEXES.items()}
+
+
+# the selections every filter and figure benchmark uses
+COMPARE = (['Cobb', 'DeKalb', 'Fulton', 'Gwinnett'], 'All', 1990)
+ANNUAL = ('Cobb', 1985)
+MONTHLY = ('Marietta', 'City/Other')
+ANNUAL_SERIES = ['Single-family', 'Multi-family']
+MONTHLY_SERIES = ['Single-Family', 'Multi-Family']
+
+
+def filter_benchmarks(tables, repeat):
+    county, city = tables['annual_county'], tables['annual_city']
+    monthly, totals = tables['monthly_master'], tables['cumulative_totals']
+    juris, series, since = COMPARE
+    name, year = ANNUAL
+    place, level = MONTHLY
+
+    def compare():
+        county.select([(j, series) for j in juris], since=since)
+        [totals.total('annual_county', j, series, since=since) for j in juris]
+
+    def annual():
+        county.select([(name, s) for s in ANNUAL_SERIES], since=year)
+
+    def annual_city():
+        city.select([('Marietta', s) for s in ANNUAL_SERIES], since=year)
+
+    def monthly_trends():
+        df = monthly.rows(place, level)
+        df.sort_values(by=['year_month', 'Series'], ascending=[True, False])
+        [totals.total('monthly_city', place, s) for s in MONTHLY_SERIES]
+
+    yield 'filter/overview', measure(lambda: tables['metro_total_annual'].rows(), repeat)
+    yield 'filter/compare', measure(compare, repeat)
+    yield 'filter/annual_county', measure(annual, repeat)
+    yield 'filter/annual_city', measure(annual_city, repeat)
+    yield 'filter/monthly', measure(monthly_trends, repeat)
+
+
+def figure_builders(tables):
+    metro = tables['metro_total_annual'].df
+    county, monthly, totals = tables['annual_county'], tables['monthly_master'], tables['cumulative_totals']
+    juris, series, since = COMPARE
+    name, year = ANNUAL
+    lines = [(j, r['Year'].to_numpy(), r['Permits'].to_numpy())
+             for j in juris for r in [county.rows(j, series, since=since)]]
+    areas = [(s, r['Year'].to_numpy(), r['Permits'].to_numpy())
+             for s in ANNUAL_SERIES for r in [county.rows(name, s, since=year)]]
+    df = monthly.rows(*MONTHLY).sort_values(by=['year_month', 'Series'], ascending=[True, False])
+    months = [(s, r['date'].to_numpy(), r['Permits'].to_numpy())
+              for s in MONTHLY_SERIES for r in [df[df['Series'] == s]]]
+    ticks = dict(tickmode='array', tickvals=df['date'].unique()[::3], tickangle=0, tickformat='%b %Y')
+    yield 'overview', lambda: charts.history_line(
+        metro['Year'].to_numpy(), metro['Permits'].to_numpy(), 'title',
+        metro['Permits'].mean(), 'Average since 1980', '2017.5')
+    yield 'compare', lambda: charts.jurisdiction_lines(lines, 'title', county_color_map)
+    yield 'compare_bars', lambda: charts.total_bars(
+        juris, [totals.total('annual_county', j, series, since=since) for j in juris], county_color_map)
+    yield 'annual', lambda: charts.stacked_area(areas, 'title')
+    yield 'monthly', lambda: charts.stacked_area(months, 'title', xaxis=ticks, margin=dict(t=60, r=15))
+
+
+def figure_benchmarks(tables, repeat):
+    for name, build in figure_builders(tables):
+        fig = build()
+        yield f'figure/{name}/build', measure(build, repeat)
+        # what st.plotly_chart does with a ready Figure
+        yield f'figure/{name}/serialize', measure(
+            lambda: pio.to_json(plotly.tools.return_figure_from_figure_or_data(fig, True),
+                                validate=False), repeat)
+
+
+# ---- results ---------------------------------------------------------------------
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print each shared benchmark's median against the baseline; return the
+    names that got slower by more than `threshold` (a ratio)."""
+    regressions = []
+    print(f'\n{"benchmark":<36}{"baseline":>10}{"now":>10}{"ratio":>8}')
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratio = now['median_ms'] / before['median_ms'] if before['median_ms'] else 1.0
+        flag = '  SLOWER' if ratio > threshold else ''
+        print(f'{name:<36}{before["median_ms"]:>8.2f}ms{now["median_ms"]:>8.2f}ms{ratio:>7.2f}x{flag}')
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default='bench-results.json', help='results file to write')
+    parser.add_argument('--compare', metavar='BASELINE', help='earlier results file to check against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='median slowdown ratio that counts as a regression (default 1.25)')
+    parser.add_argument('--repeat', type=int, default=15)
+    parser.add_argument('--only', help='run only benchmarks whose name starts with this')
+    parser.add_argument('--region', default=None, help='metro key from backend/regions.py')
+    args = parser.parse_args()
+
+    region = get_region(args.region)
+    data_dir = os.path.join(REPO_ROOT, region['data_dir'])
+    wanted = lambda group: not args.only or group.startswith(args.only) or args.only.startswith(group)  # noqa: E731
+    results = {}
+
+    def record(benchmarks):
+        for name, times in benchmarks:
+            if args.only and not name.startswith(args.only):
+                continue
+            results[name] = summarize(times)
+            print(f'{name:<36}{results[name]["median_ms"]:>9.2f} ms')
+
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        if wanted('loader/'):
+            write_fixtures(fixture_dir, region['state_abbr'], region['state_fips'])
+            record(loader_benchmarks(fixture_dir, args.repeat))
+    if wanted('build/'):
+        record(build_benchmarks(region, args.repeat))
+    if wanted('table/'):
+        record(table_benchmarks(data_dir, args.repeat))
+    if wanted('filter/') or wanted('figure/'):
+        tables = load_tables(data_dir)
+        record(filter_benchmarks(tables, args.repeat * 20))
+        record(figure_benchmarks(tables, args.repeat))
+
+    with open(args.out, 'w') as f:
+        json.dump({
+            'meta': {
+                'revision': git_revision(),
+                'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'machine': platform.machine(),
+                'repeat': args.repeat,
+            },
+            'results': results,
+        }, f, indent=2)
+    print(f'wrote {len(results)} results to {args.out}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            sys.exit(f'{len(regressions)} benchmark(s) slower than {args.threshold:g}x baseline: '
+                     + ', '.join(regressions))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+import plotly.graph_objects as go
+
+from backend.spans import timed
+
+# Figure builders shared by the pages. They build go.Figure objects directly
+# from arrays the views have already sliced, with the dashboard's dark styling
+# set up front, instead of going through plotly.express (which groups the
+# DataFrame, validates and merges a template, only for most of it to be
+# overridden with update_layout / update_traces afterwards). The specs match
+# what the px code produced.
+
+FONT_COLOR = '#d9d9d9'
+BACKGROUND = '#292929'
+HOVER_FONT_COLOR = '#171717'
+GRID_COLOR = '#FFFFFF'
+
+# permit series colors; the annual and monthly tables spell the series differently
+SERIES_COLORS = {
+    'Single-family': '#00BFFF',
+    'Multi-family': '#FF6F61',
+    'Single-Family': '#00BFFF',
+    'Multi-Family': '#FF6F61',
+}
+
+# chart config, same on every page
+CONFIG = {'displayModeBar': False}
+
+_TICK_FONT = dict(size=16, color=FONT_COLOR)
+
+# the horizontal legend sitting on top of the plot area
+_TOP_LEGEND = dict(
+    bgcolor='rgba(41,41,41,0)',
+    orientation='h',
+    title=dict(text=''),
+    tracegroupgap=0,
+    xanchor='left',
+    y=0.97,
+    yanchor='bottom',
+)
+
+
+def _xaxis(**extra):
+    return dict(anchor='y', domain=[0.0, 1.0], gridcolor=GRID_COLOR, linecolor=FONT_COLOR,
+                linewidth=1, showline=True, tickfont=_TICK_FONT, title=dict(text=''), **extra)
+
+
+def _yaxis(**extra):
+    return dict(anchor='x', domain=[0.0, 1.0], linecolor=FONT_COLOR, linewidth=1,
+                showgrid=False, showline=True, tickfont=_TICK_FONT, title=dict(text=''), **extra)
+
+
+def _title(text, **font):
+    return dict(text=text, font=dict(color=FONT_COLOR, **font))
+
+
+def _line_trace(name, x, y, color, width, **extra):
+    return go.Scatter(
+        x=x, y=y, name=name, legendgroup=name, mode='lines', orientation='v',
+        line=dict(color=color, dash='solid', width=width), marker=dict(symbol='circle'),
+        xaxis='x', yaxis='y', **extra)
+
+
+@timed()
+def history_line(x, y, title, average, average_label, label_x, height=460,
+                 color='#FF6F61', average_color='#00BFFF'):
+    """One series over time with a dashed line at its average, labelled at label_x."""
+    trace = _line_trace('', x, y, color, 4, hovertemplate='%{y:,.0f}', showlegend=False)
+    layout = dict(
+        height=height,
+        hovermode='x unified',
+        hoverlabel=dict(bgcolor=BACKGROUND, font=dict(color=FONT_COLOR, size=16)),
+        legend=dict(tracegroupgap=0),
+        title=_title(title, weight='normal'),
+        xaxis=_xaxis(),
+        yaxis=_yaxis(),
+        plot_bgcolor=BACKGROUND,
+        paper_bgcolor=BACKGROUND,
+        shapes=[dict(type='line', x0=x.min(), x1=x.max(), y0=average, y1=average,
+                     line=dict(color=average_color, dash='dash', width=2))],
+        annotations=[dict(text=average_label, x=label_x, y=average, yshift=10,
+                          showarrow=False,
+                          font=dict(color=average_color, size=16, weight='bold'))],
+    )
+    return go.Figure(data=[trace], layout=layout)
+
+
+@timed()
+def jurisdiction_lines(series, title, colors, height=500):
+    """One line per jurisdiction; `series` is [(name, x, y), ...] in legend order."""
+    data = [
+        _line_trace(name, x, y, colors.get(name, '#000000'), 3, showlegend=True,
+                    hovertemplate='<b>%{y}</b>',
+                    hoverlabel=dict(bgcolor=colors.get(name, '#000000'),
+                                    font=dict(color=HOVER_FONT_COLOR)))
+        for name, x, y in series
+    ]
+    layout = dict(
+        height=height,
+        hovermode='x',
+        legend=_TOP_LEGEND,
+        margin=dict(t=60),
+        title=_title(title, size=18),
+        xaxis=_xaxis(showgrid=False, tickformat='.0f'),
+        yaxis=_yaxis(tickformat=',', zeroline=False),
+    )
+    return go.Figure(data=data, layout=layout)
+
+
+@timed()
+def stacked_area(series, title, xaxis=None, margin=None, height=545, colors=SERIES_COLORS):
+    """Permit series stacked over time; `series` is [(name, x, y), ...], bottom
+    layer first. `xaxis` adds to (or overrides) the default year axis."""
+    data = [
+        _line_trace(name, x, y, colors[name], 2, showlegend=True, stackgroup='1',
+                    fillpattern=dict(shape=''), hovertemplate='<b>%{y}</b>',
+                    hoverlabel=dict(bgcolor=colors[name], font=dict(color=HOVER_FONT_COLOR)))
+        for name, x, y in series
+    ]
+    layout = dict(
+        height=height,
+        hovermode='x',
+        legend=dict(_TOP_LEGEND, font=dict(size=14), traceorder='reversed'),
+        margin=margin or dict(t=60),
+        title=_title(title, size=18),
+        xaxis=_xaxis(showgrid=False, **(xaxis or dict(tickformat='.0f'))),
+        yaxis=_yaxis(tickformat=',', zeroline=False),
+        plot_bgcolor=BACKGROUND,
+        paper_bgcolor=BACKGROUND,
+    )
+    return go.Figure(data=data, layout=layout)
+
+
+@timed()
+def total_bars(names, totals, colors, legend_title='County'):
+    """Horizontal bars, one per jurisdiction, longest at the top."""
+    data = [
+        go.Bar(x=[total], y=[name], name=name, legendgroup=name, offsetgroup=name,
+               alignmentgroup='True', orientation='h', showlegend=True, textposition='auto',
+               marker=dict(color=colors.get(name, '#000000'), pattern=dict(shape='')),
+               hovertemplate='<b>%{x:,}</b>',
+               hoverlabel=dict(bgcolor=colors.get(name, '#000000'),
+                               font=dict(color=HOVER_FONT_COLOR)),
+               xaxis='x', yaxis='y')
+        for name, total in zip(names, totals)
+    ]
+    layout = dict(
+        barmode='relative',
+        legend=dict(title=dict(text=legend_title), tracegroupgap=0),
+        margin=dict(l=20, r=20, t=0, b=20),
+        showlegend=False,
+        xaxis=dict(anchor='y', domain=[0.0, 1.0]),
+        yaxis=dict(anchor='x', domain=[0.0, 1.0],
+                   categoryorder='total ascending', categoryarray=list(names)[::-1]),
+    )
+    return go.Figure(data=data, layout=layout)
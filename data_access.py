@@ -0,0 +1,288 @@
+import io
+import os
+import json
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils import data_path
+from backend.spans import span
+
+# Tables are shared by every session, so slices handed to the views must not be
+# able to write through to them. With copy-on-write a slice shares the table's
+# buffers until someone modifies it, and then only that caller's copy changes.
+pd.set_option('mode.copy_on_write', True)
+
+# How each dashboard table is laid out in memory: sorted by its key columns and
+# then by time, so every jurisdiction (and every jurisdiction + series) is one
+# contiguous block of rows. Widgets pick a block instead of scanning the table.
+TABLE_INDEXES = {
+    'annual_county': (['county_name', 'Series'], 'Year'),
+    'annual_city': (['City', 'Series'], 'Year'),
+    'monthly_master': (['Name', 'Level', 'Series'], 'year_month'),
+    'metro_total_annual': ([], 'Year'),
+    'cumulative_totals': (['Table', 'Name', 'Series'], 'Period'),
+}
+
+
+class IndexedTable:
+    """A dashboard table sorted by `keys` then `order`, with the row slice of
+    every key prefix, e.g. () for the whole table, ('Cobb',) and
+    ('Cobb', 'Single-family')."""
+
+    # True when df is memory-mapped from a shared table file (workers.py)
+    mapped = False
+
+    def __init__(self, df, keys, order, version=None, presorted=False):
+        self.keys = list(keys)
+        self.order = order
+        self.version = version
+        if presorted:
+            # already in index order (a shared table file); sorting would copy it
+            self.df = df
+        else:
+            self.df = df.sort_values(self.keys + [order], kind='stable').reset_index(drop=True)
+        self._order_values = self.df[order].to_numpy()
+        self._cumulative = self.df['Cumulative'].to_numpy() if 'Cumulative' in self.df else None
+        self.index = {(): (0, len(self.df))}
+        for depth in range(1, len(self.keys) + 1):
+            cols = self.keys[:depth]
+            # groups are contiguous after the sort, so first and last row bound them
+            for key, rows in self.df.groupby(cols, observed=True, sort=False).indices.items():
+                key = key if isinstance(key, tuple) else (key,)
+                self.index[key] = (int(rows[0]), int(rows[-1]) + 1)
+
+    def rows(self, *key, since=None):
+        """Rows matching a key prefix, optionally only those with `order` >= since.
+
+        Returns a slice that shares the table's memory; modifying it copies."""
+        start, stop = self.index.get(key, (0, 0))
+        if since is None or start == stop:
+            return self.df.iloc[start:stop]
+        if len(key) == len(self.keys):
+            # within a full key the rows are in time order
+            start += int(np.searchsorted(self._order_values[start:stop], since))
+            return self.df.iloc[start:stop]
+        block = self.df.iloc[start:stop]
+        return block[self._order_values[start:stop] >= since]
+
+    def total(self, *key, since=None):
+        """Permits summed over a full key from `since` on (cumulative_totals only):
+        the last running total minus the one just before `since`."""
+        start, stop = self.index.get(key, (0, 0))
+        if start == stop:
+            return 0
+        first = start
+        if since is not None:
+            first += int(np.searchsorted(self._order_values[start:stop], since))
+        before = self._cumulative[first - 1] if first > start else 0
+        return int(self._cumulative[stop - 1] - before)
+
+    def select(self, keys, since=None):
+        """rows() for each key in `keys`, stacked in the order given."""
+        parts = [self.rows(*key, since=since) for key in keys]
+        if not parts:
+            return self.df.iloc[0:0]
+        return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+
+# The file's modification time and size; a refresh that rewrites a file changes it.
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+# One registry per server process, shared by every session. Module state already
+# lives for the whole process; st.cache_resource would too, but its lookup costs
+# more per call (~0.6 ms) than the slice lookups it would guard.
+_tables = {}
+_manifest = {'stamp': None, 'data': {}}
+_lock = threading.Lock()
+
+
+def manifest():
+    """The data_dir's manifest.json, written by backend_query.py with every
+    refresh: a content hash, row count and date range per table. It is read
+    once, and again only when the file changes; {} if there is none."""
+    path = data_path('manifest.json')
+    try:
+        stamp = file_stamp(path)
+    except FileNotFoundError:
+        return {}
+    if _manifest['stamp'] != stamp:
+        with _lock:
+            if _manifest['stamp'] != stamp:
+                with open(path) as f:
+                    _manifest['data'] = json.load(f)
+                _manifest['stamp'] = stamp
+    return _manifest['data']
+
+
+def table_version(name):
+    """The table's content hash from the manifest. Without a manifest, the
+    Parquet file's mtime and size stand in for it, as one token (it ends up in
+    ETags and file names)."""
+    entry = manifest().get('tables', {}).get(name)
+    if entry is not None:
+        return entry['version']
+    mtime_ns, size = file_stamp(data_path(f'{name}.parquet'))
+    return f'{mtime_ns}-{size}'
+
+
+# Multi-worker mode (workers.py): every worker process maps the same sorted copy
+# of each table, as an uncompressed Arrow IPC file, instead of holding its own.
+# The numeric columns become pandas arrays over the mapped pages, which the OS
+# keeps once in its page cache however many workers read them.
+SHARED_TABLES_DIR = os.environ.get('SHARED_TABLES_DIR')
+
+
+def shared_table_path(name, version):
+    return os.path.join(SHARED_TABLES_DIR, f'{name}-{version}.arrow')
+
+
+def write_shared_tables(out_dir):
+    """Write every table, sorted and ready to index, as out_dir/<name>-<version>.arrow.
+    Returns the paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name in TABLE_INDEXES:
+        version = table_version(name)
+        path = os.path.join(out_dir, f'{name}-{version}.arrow')
+        if not os.path.exists(path):
+            arrow = pa.Table.from_pandas(_read_table(name, version).df, preserve_index=False)
+            with pa.OSFile(f'{path}.tmp', 'wb') as sink, pa.ipc.new_file(sink, arrow.schema) as writer:
+                writer.write_table(arrow)
+            os.replace(f'{path}.tmp', path)
+        paths.append(path)
+    return paths
+
+
+def _map_table(name, version):
+    path = shared_table_path(name, version)
+    with pa.memory_map(path) as source:
+        df = pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+    keys, order = TABLE_INDEXES[name]
+    table = IndexedTable(df, keys, order, version, presorted=True)
+    table.mapped = True
+    return table
+
+
+def _read_table(name, version):
+    if SHARED_TABLES_DIR and os.path.exists(shared_table_path(name, version)):
+        return _map_table(name, version)
+    file = f'{name}.parquet'
+    with open(data_path(file), 'rb') as f:
+        raw = f.read()
+    expected = manifest().get('tables', {}).get(name, {}).get('files', {}).get(file)
+    if expected is not None and hashlib.sha256(raw).hexdigest() != expected:
+        # not what the refresh wrote; serve it rather than take the page down
+        print(f'warning: {data_path(file)} does not match manifest.json')
+    keys, order = TABLE_INDEXES[name]
+    return IndexedTable(pd.read_parquet(io.BytesIO(raw)), keys, order, version)
+
+
+# After a refresh a worker can see the new version before workers.py has
+# written its shared file; it reads the Parquet meanwhile, and maps the shared
+# copy once it appears.
+def _unshared(table, name):
+    return (SHARED_TABLES_DIR and not table.mapped
+            and os.path.exists(shared_table_path(name, table.version)))
+
+
+def load_table(name):
+    """The IndexedTable for `name`, shared by every session. It is read and
+    indexed once, and again only when the manifest gives the table a new version
+    (checked with one stat of manifest.json, not by looking at the tables)."""
+    version = table_version(name)
+    table = _tables.get(name)
+    if table is None or table.version != version or _unshared(table, name):
+        with _lock:
+            table = _tables.get(name)
+            if table is None or table.version != version or _unshared(table, name):
+                with span('read table', table=name):
+                    table = _tables[name] = _read_table(name, version)
+    return table
+
+
+# Monthly history (backend_query.py writes it from the backfilled years): one
+# Parquet file per year, laid out like monthly_master, read only when a page
+# asks for that year. Workers don't share these; each reads the years it needs.
+HISTORY_DIR = 'monthly_history'
+
+
+def history_years():
+    """The years with monthly history before the rolling window, oldest first;
+    from the manifest, or the files on disk without one."""
+    data = manifest()
+    if data:
+        return sorted(int(year) for year in data.get('monthly_history', {}))
+    try:
+        files = os.listdir(data_path(HISTORY_DIR))
+    except FileNotFoundError:
+        return []
+    return sorted(int(file[:-len('.parquet')]) for file in files if file.endswith('.parquet'))
+
+
+def history_version(year):
+    entry = manifest().get('monthly_history', {}).get(str(year))
+    if entry is not None:
+        return entry['version']
+    mtime_ns, size = file_stamp(data_path(os.path.join(HISTORY_DIR, f'{year}.parquet')))
+    return f'{mtime_ns}-{size}'
+
+
+def load_history(year):
+    """One year of monthly history as an IndexedTable keyed like
+    monthly_master, loaded once per version like load_table()."""
+    version = history_version(year)
+    key = (HISTORY_DIR, year)
+    table = _tables.get(key)
+    if table is None or table.version != version:
+        with _lock:
+            table = _tables.get(key)
+            if table is None or table.version != version:
+                with span('read table', table=f'{HISTORY_DIR}/{year}'):
+                    keys, order = TABLE_INDEXES['monthly_master']
+                    df = pd.read_parquet(data_path(os.path.join(HISTORY_DIR, f'{year}.parquet')))
+                    table = _tables[key] = IndexedTable(df, keys, order, version)
+    return table
+
+
+def monthly_rows(*key, since=None):
+    """monthly_master rows for a key prefix, preceded by the monthly history
+    from January of `since` on (None: the rolling window only). Only those
+    years' files are read."""
+    window = load_table('monthly_master').rows(*key)
+    if since is None:
+        return window
+    parts = [load_history(year).rows(*key) for year in history_years() if year >= since]
+    return pd.concat(parts + [window], ignore_index=True)
+
+
+def monthly_version(since=None):
+    """Cache-key token for monthly_rows(since=...): changes when the window or
+    any of those history years is rewritten."""
+    versions = data_version('monthly_master')
+    if since is None:
+        return versions
+    return versions + tuple(history_version(year) for year in history_years() if year >= since)
+
+
+def data_version(*names):
+    """The versions of the named tables as currently loaded, for cache keys that
+    must change when a refresh rewrites the data."""
+    return tuple(load_table(name).version for name in names)
+
+
+def freshness():
+    """(latest month in the data, date it was built), from the manifest; None
+    without one."""
+    data = manifest()
+    months = data.get('tables', {}).get('monthly_master', {}).get('year_month')
+    if not months or 'built_at' not in data:
+        return None
+    latest = pd.Timestamp(year=months[1] // 100, month=months[1] % 100, day=1)
+    return latest, pd.Timestamp(data['built_at'])
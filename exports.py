@@ -0,0 +1,119 @@
+import io
+import os
+import streamlit as st
+from lru_cache import LRUCache
+from data_access import manifest
+from utils import region
+from backend.spans import span
+
+# Download files for the pages' filtered data, made only when someone asks.
+#
+# The pages used to serialize their DataFrame to CSV on every rerun to hand it
+# to st.download_button, which needs the bytes up front (Streamlit 1.38 has no
+# lazy `data`, so a file is always built whole, in memory, before the button
+# can offer it). Now a page renders export_button() with a function that
+# returns the rows; the popover it draws only builds a file once a format is
+# chosen, and keeps offering it until the filters change. The popover is a
+# fragment, so choosing a format and clicking Download rerun just the popover,
+# not the page. Built files are shared by every session, keyed by the page's
+# filter state, the format and the data version, like the figure cache.
+
+# how many built files to keep (they are a few KB to a few MB each)
+EXPORT_CACHE_SIZE = int(os.environ.get('EXPORT_CACHE_SIZE', 64))
+
+
+def csv_bytes(df):
+    return df.to_csv(index=False).encode('utf-8')
+
+
+def parquet_bytes(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def xlsx_bytes(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, sheet_name='data', engine='openpyxl')
+    return buffer.getvalue()
+
+
+# label: (file extension, MIME type, writer)
+FORMATS = {
+    'CSV': ('csv', 'text/csv', csv_bytes),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet', parquet_bytes),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', xlsx_bytes),
+}
+
+
+def export_file(df, fmt):
+    """The rows of `df` as a `fmt` file (a FORMATS label)."""
+    return FORMATS[fmt][2](df.reset_index(drop=True))
+
+
+# built files, shared by every session
+payloads = LRUCache(EXPORT_CACHE_SIZE)
+
+
+def export_payload(key, fmt, frame):
+    """The `fmt` file of frame()'s rows, built once per `key`."""
+    def build():
+        with span('export', format=fmt):
+            return export_file(frame(), fmt)
+    return payloads.get((key, fmt), build)
+
+
+# What backend_query.py writes to static/<data_dir>/ for bulk downloads, with a
+# short description; Streamlit serves them itself, so they cost no script run.
+BUNDLE_LABELS = {
+    'permits_by_jurisdiction.zip': 'Every jurisdiction, one CSV each (zip)',
+    'annual_county.parquet': 'Annual permits by county (Parquet)',
+    'annual_city.parquet': 'Annual permits by city (Parquet)',
+    'monthly_master.parquet': 'Monthly permits, trailing 18 months (Parquet)',
+    'metro_total_annual.parquet': 'Annual permits, metro total (Parquet)',
+    'SHA256SUMS': 'Checksums',
+}
+
+
+def bundle_url(file):
+    return f"app/static/{region['data_dir']}/{file}"
+
+
+# Streamlit serves most static file types as text/plain, so the links carry
+# `download` to have the browser save the file rather than show it.
+def bundle_link(file, label=None):
+    return f'<a href="{bundle_url(file)}" download="{file}">{label or BUNDLE_LABELS.get(file, file)}</a>'
+
+
+def bundle_links():
+    """HTML links to the bulk downloads listed in the manifest."""
+    files = set(manifest().get('bundles', {})) | {'SHA256SUMS'}
+    return [bundle_link(file) for file in BUNDLE_LABELS if file in files]
+
+
+@st.fragment
+def export_button(page, key, frame, file_stem):
+    """A download popover for the page's filtered data. `key` is the page's
+    filter state plus the data version; `frame` returns the rows, and is only
+    called when a file has to be built."""
+    widget = f'export_{page}'
+    # a format chosen for other filters doesn't carry over: choosing one is
+    # what builds the file
+    if st.session_state.get(f'{widget}_for') != key:
+        st.session_state[f'{widget}_format'] = None
+    with st.popover(':material/download:', help='Download filtered data'):
+        fmt = st.selectbox('Format', list(FORMATS), index=None, placeholder='Choose a format',
+                           key=f'{widget}_format',
+                           on_change=lambda: st.session_state.update({f'{widget}_for': key}))
+        if fmt is not None:
+            extension, mime, _ = FORMATS[fmt]
+            st.download_button(
+                label=f'Download {fmt}',
+                data=export_payload(key, fmt, frame),
+                file_name=f'{file_stem}.{extension}',
+                mime=mime,
+                key=f'{widget}_download',
+            )
+        if manifest().get('bundles'):
+            st.caption(f"All jurisdictions at once: {bundle_link('permits_by_jurisdiction.zip', 'zip of CSVs')}",
+                       unsafe_allow_html=True)
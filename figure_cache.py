@@ -0,0 +1,19 @@
+import os
+
+from lru_cache import LRUCache
+
+# Built Plotly figures, shared by every session. The filter space is small
+# (a few geographies x ~80 jurisdictions x a year slider x the permit types),
+# so after warm-up most reruns find their figure here and skip building it.
+# Keys are the page's filter state plus the data version of the tables the
+# figure was drawn from, so a data refresh never serves an old chart.
+#
+# The entries are go.Figure objects rather than their JSON: st.plotly_chart
+# re-validates a dict or JSON spec (~10 ms) but serializes a Figure in well
+# under a millisecond. Figures are never modified after they are built.
+FIGURE_CACHE_SIZE = int(os.environ.get('FIGURE_CACHE_SIZE', 256))
+
+# print the hit rate to the server log every this many lookups
+LOG_EVERY = 200
+
+figures = LRUCache(FIGURE_CACHE_SIZE, LOG_EVERY, name='figure cache')
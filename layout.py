@@ -0,0 +1,60 @@
+import os
+import streamlit as st
+from st_screen_stats.WindowScreenQuery import _st_window_query_size
+from backend.spans import span
+
+# Which layout (desktop or mobile) a page renders, without waiting on the browser.
+#
+# The pages used to call ScreenData().st_screen_data() first thing, which blocks
+# the script until the component reports the window size and then reruns the
+# whole page when it does, on every page load and after every resize. Instead,
+# main.py mounts a media-query component once per run, below the page, and the
+# pages read the session's layout from session state: the default (desktop) until
+# the browser has reported, then whatever it reported. The component only sends
+# a value when it mounts and when the window crosses the breakpoint, so a session
+# pays one rerun when it first loads (only visible if it is actually on mobile)
+# and another only when its layout class changes. It stays mounted across page
+# switches, since main.py renders it in the same place on every page.
+#
+# The component is mounted after the page, not before, because the pages call
+# st.set_page_config(), which must come before any element. Its last reported
+# value is already in session state when a run starts, so detect_layout() can
+# read it first.
+
+# pages switch to their mobile layout below this window width (px)
+MOBILE_BREAKPOINT = 500
+
+# layout for a session whose browser hasn't reported yet
+DEFAULT_LAYOUT = os.environ.get('DEFAULT_LAYOUT', 'desktop')
+
+
+# session state key of the media-query component
+QUERY_KEY = 'mobile_query'
+
+
+def detect_layout() -> str:
+    """Record the session's layout from what the breakpoint query last reported;
+    call once per run from main.py, before the page. Returns 'desktop' or 'mobile'."""
+    match = st.session_state.get(QUERY_KEY)
+    if match is not None:
+        st.session_state['layout'] = 'mobile' if match['status'] else 'desktop'
+    return current_layout()
+
+
+def mount_layout_query() -> None:
+    """Render the breakpoint query; call once per run from main.py, after the page."""
+    # the component's public wrappers (WindowQuerySize.mediaQuery and friends)
+    # sleep until the browser answers, default= or not; calling the private
+    # function they wrap returns None until then instead. It isn't part of the
+    # package's API, hence the exact pin in requirements.txt.
+    with span('screen query'):
+        _st_window_query_size(mediaMatchQ=f'(max-width: {MOBILE_BREAKPOINT - 1}px)',
+                              key=QUERY_KEY, default=None)
+
+
+def current_layout() -> str:
+    return st.session_state.get('layout', DEFAULT_LAYOUT)
+
+
+def is_mobile() -> bool:
+    return current_layout() == 'mobile'
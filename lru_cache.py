@@ -0,0 +1,65 @@
+import time
+import threading
+from collections import OrderedDict
+
+# A thread-safe least-recently-used cache shared by every session in the
+# process: the pages' figures (figure_cache.py), the export files (exports.py)
+# and the API's rendered responses (api.py). Values are built on a miss by a
+# callable the caller passes in, and must not be modified once cached.
+
+
+class LRUCache:
+    def __init__(self, maxsize, log_every=0, name='cache'):
+        self.maxsize = maxsize
+        self.log_every = log_every
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.build_seconds = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """The value cached under `key`, or build() it, cache it and return it.
+        The least recently used value is evicted once the cache is full."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if value is None:
+            # built outside the lock; two sessions missing together both build
+            start = time.perf_counter()
+            value = build()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.misses += 1
+                self.build_seconds += elapsed
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        if self.log_every and (self.hits + self.misses) % self.log_every == 0:
+            print(f'{self.name}: {self.summary()}')
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'mean_build_ms': self.build_seconds / self.misses * 1000 if self.misses else 0.0,
+                'size': len(self._entries),
+            }
+
+    def summary(self):
+        s = self.stats()
+        return (f"{s['hits'] + s['misses']} lookups, {s['hit_rate']:.0%} hits, "
+                f"{s['misses']} builds averaging {s['mean_build_ms']:.1f} ms, "
+                f"{s['size']}/{self.maxsize} cached")
@@ -1,5 +1,8 @@
 import streamlit as st
 from utils import *
+from backend import spans
+from layout import detect_layout, mount_layout_query
+from data_access import freshness
 
 
 # - - - PAGE SETUP - - -
@@ -48,8 +51,27 @@ pg = st.navigation(
 # - - - SHARED ON ALL PAGES - - -
 st.logo(image='assets/arc_bw.png')
 
+# - - - LAYOUT - - -
+# desktop or mobile, without holding up the render (see layout.py). Nothing is
+# drawn before the page: its st.set_page_config() has to come first.
+detect_layout()
+
 # - - - RUN NAVIGATION - - -
-pg.run()
+# timed as one rerun when SPANS is set (see backend/spans.py)
+with spans.trace('rerun', page=pg.title) as rerun:
+    pg.run()
+
+# the screen query that detect_layout() reads on the next run
+mount_layout_query()
+
+# how current the data is, from Data/manifest.json
+data_freshness = freshness()
+if data_freshness is not None:
+    latest_month, built_at = data_freshness
+    st.sidebar.caption(f"Data through {latest_month:%B %Y} · updated {built_at:%b %-d, %Y}")
+
+if spans.PANEL:
+    timings_panel(rerun)
 
 # the custom CSS lives here:
 hide_default_format = """
@@ -0,0 +1,119 @@
+"""Start the dashboard with its caches already warm.
+
+`streamlit run main.py` does nothing until the first session connects, so the
+first visitor after a restart or deploy pays for the heavy imports, for reading
+and indexing each table, and for building each page's default figure, page by
+page as they visit them. This launcher does all of that first, in the server
+process itself, then starts Streamlit in the same process, so the warmed
+module state (data_access's tables, figure_cache's figures) is what sessions
+use:
+
+  python serve.py                          # what the Procfile runs
+  python serve.py --server.port 8600       # any `streamlit run` flags pass through
+
+The warm-up runs every page once with its default selections (Metro overview,
+Fulton on the compare page, Region on the annual and monthly pages) through
+Streamlit's AppTest, which builds and caches exactly the figures a first
+visitor would get. It then reports how long each step took as one JSON line,
+on stdout or in SPANS_LOG (see backend/spans.py), tagged with the deployed
+revision, so cold starts can be compared across deploys. WARMUP=0 skips it.
+"""
+
+import time
+
+STARTED = time.perf_counter()
+
+import os  # noqa: E402
+import sys  # noqa: E402
+import logging  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# main.py and the pages, in the order a visitor is likely to open them
+PAGES = ['views/1_overview.py', 'views/2_jurisdiction_compare.py', 'views/3_annual_trends.py',
+         'views/4_monthly_trends.py', 'views/5_about.py']
+
+
+def ms_since(start):
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def warm_up():
+    """Import, load and render everything a first visit needs; returns the timings."""
+    record = {'warmup': 'cold start', 'pid': os.getpid(),
+              'revision': os.environ.get('SOURCE_VERSION') or os.environ.get('HEROKU_SLUG_COMMIT')}
+
+    start = time.perf_counter()
+    import pandas  # noqa: F401
+    import pyarrow  # noqa: F401
+    import plotly.graph_objects  # noqa: F401
+    import plotly.io  # noqa: F401
+    import streamlit  # noqa: F401
+    from streamlit.testing.v1 import AppTest
+    import charts  # noqa: F401
+    from data_access import TABLE_INDEXES, load_table
+    from figure_cache import figures
+    record['imports_ms'] = ms_since(start)
+
+    record['tables_ms'] = {}
+    for name in TABLE_INDEXES:
+        start = time.perf_counter()
+        load_table(name)
+        record['tables_ms'][name] = ms_since(start)
+
+    record['pages_ms'] = {}
+    # AppTest runs the pages on this thread, outside any session, which
+    # Streamlit warns about once per element
+    context_log = logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context')
+    quiet = lambda record: record.levelno >= logging.ERROR  # noqa: E731
+    context_log.addFilter(quiet)
+    for page in PAGES:
+        start = time.perf_counter()
+        at = AppTest.from_file(page, default_timeout=120).run()
+        record['pages_ms'][os.path.basename(page)] = ms_since(start)
+        if at.exception:
+            # warm what we can; a broken page shows up on its own
+            record.setdefault('errors', {})[page] = at.exception[0].value
+    context_log.removeFilter(quiet)
+
+    record['figures_cached'] = figures.stats()['size']
+    record['total_ms'] = ms_since(STARTED)
+    return record
+
+
+def load_config(argv):
+    """Load Streamlit's config with the `streamlit run` flags in `argv`, the way
+    `streamlit run` itself does, so that the warm-up sees the same settings as
+    the server and the server's own config parse finds nothing changed (else it
+    logs that a restart is needed)."""
+    import click
+    from streamlit.web import bootstrap, cli
+    try:
+        params = cli.main_run.make_context('run', ['main.py', *argv]).params
+    except click.ClickException:
+        # bad flags; cli.main() reports them
+        return
+    bootstrap.load_config_options({name: value for name, value in params.items()
+                                   if name not in ('target', 'args')})
+
+
+def main():
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    load_config(sys.argv[1:])
+    if os.environ.get('WARMUP', '1') != '0':
+        from backend.spans import emit
+        record = warm_up()
+        emit(dict(record, ts=time.time()))
+        print(f"warmed up in {record['total_ms'] / 1000:.1f} s (imports {record['imports_ms']:.0f} ms, "
+              f"tables {sum(record['tables_ms'].values()):.0f} ms, "
+              f"pages {sum(record['pages_ms'].values()):.0f} ms, {record['figures_cached']} figures)",
+              flush=True)
+
+    from streamlit.web import cli
+    sys.argv = ['streamlit', 'run', os.path.join(REPO_ROOT, 'main.py'), *sys.argv[1:]]
+    sys.exit(cli.main())
+
+
+if __name__ == '__main__':
+    main()
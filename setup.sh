@@ -8,5 +8,6 @@ font = 'monospace'
 [server]
 headless = true
 enableCORS = false
+enableStaticServing = true
 port = $PORT
 " > ~/.streamlit/config.toml
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the app modules import from the repo root; the backend scripts import each
+# other by bare name, as when run from backend/
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'backend'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+
+import census_stub  # noqa: E402
+import fetch_permits  # noqa: E402
+from http_client import HttpClient  # noqa: E402
+
+
+@pytest.fixture
+def census(tmp_path):
+    """Start census_stub.py on a free port over `tmp_path / 'mirror'`; call it
+    with the stub's fault options and get back the base URL."""
+    mirror = tmp_path / 'mirror'
+    mirror.mkdir()
+    servers = []
+
+    def start(**faults):
+        server = census_stub.serve(str(mirror), port=0, **faults)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}'
+
+    start.mirror = mirror
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def point_fetch(tmp_path, monkeypatch):
+    """Call with a stub's base URL to aim fetch_permits at it, with its outputs
+    under tmp_path/<raw> and a fresh client (short backoff, `client` options);
+    returns that raw directory."""
+    def point(base_url, raw='raw', **client):
+        raw_dir = tmp_path / raw
+        monkeypatch.setattr(fetch_permits, 'COUNTY_URL', base_url + '/County/co{code}{kind}.txt')
+        monkeypatch.setattr(fetch_permits, 'PLACE_URL', base_url + '/Place/{region}/{prefix}{code}{kind}.txt')
+        monkeypatch.setattr(fetch_permits, 'RAW_DIR', str(raw_dir))
+        monkeypatch.setattr(fetch_permits, 'MONTHLY_SOURCES', str(raw_dir / 'BPS_sources.json'))
+        monkeypatch.setattr(fetch_permits, 'BACKFILL_DIR', str(raw_dir / 'monthly'))
+        monkeypatch.setattr(fetch_permits, 'BACKFILL_CHECKPOINT', str(raw_dir / 'monthly' / 'checkpoint.json'))
+        client = dict({'backoff_base': 0.01, 'backoff_max': 0.05}, **client)
+        monkeypatch.setattr(fetch_permits, 'CLIENT', HttpClient(**client))
+        return raw_dir
+
+    return point
+
+
+@pytest.fixture
+def window_mirror(census, monkeypatch):
+    """`census`'s mirror filled with BPS files (bps_fixtures.py) for every month
+    and year in the committed GA masters, and the rolling window pinned to
+    those 18 months, so a fetch from it is independent of today's date."""
+    from bps_fixtures import write_fixtures
+    monthly = pd.read_csv(fetch_permits.monthly_master_path('GA'))
+    annual = pd.read_csv(fetch_permits.annual_master_path('GA'), dtype={'FIPS': str})
+    write_fixtures(str(census.mirror), monthly=monthly, annual=annual, county_filler=50, place_filler=50)
+    months = [str(code)[2:] for code in sorted(monthly['year_month'].unique(), reverse=True)]
+    monkeypatch.setattr(fetch_permits, 'get_relevant_months', lambda: months)
+    return census
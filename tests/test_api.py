@@ -0,0 +1,88 @@
+import gzip
+import json
+import os
+
+import pytest
+from tornado.testing import AsyncHTTPTestCase
+
+import data_access
+from api import accepts_gzip, etag, make_app
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip', True),
+    ('gzip, deflate, br', True),
+    ('br;q=1.0, gzip;q=0.8, *;q=0.1', True),
+    ('GZIP;Q=0.5', True),
+    ('*', True),
+    ('', False),
+    ('identity', False),
+    ('gzip;q=0', False),
+    ('gzip;q=0.0, deflate', False),
+    ('deflate, *;q=0', False),
+    ('*;q=0.5, gzip;q=0', False),
+    ('gzip;q=oops', False),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) == expected
+
+
+def test_version_without_manifest_is_a_token(monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    monkeypatch.setattr(data_access, 'manifest', lambda: {})
+    version = data_access.table_version('annual_county')
+    stat = os.stat(data_access.data_path('annual_county.parquet'))
+    assert version == f'{stat.st_mtime_ns}-{stat.st_size}'
+    tag = etag('annual_county', {'format': 'json'}, version)
+    assert ' ' not in tag and '(' not in tag
+    assert tag.startswith(f'"{version}-') and tag.endswith('"')
+
+
+class TestTableHandler(AsyncHTTPTestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(REPO_ROOT)
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        os.chdir(self.cwd)
+
+    def get_app(self):
+        return make_app()
+
+    def fetch_table(self, encoding, **headers):
+        return self.fetch('/v1/annual_county?jurisdiction=Cobb&series=All', decompress_response=False,
+                          headers=dict({'Accept-Encoding': encoding}, **headers))
+
+    def test_gzip_follows_q_values(self):
+        zipped = self.fetch_table('gzip')
+        assert zipped.headers.get('Content-Encoding') == 'gzip'
+        body = json.loads(gzip.decompress(zipped.body))
+        assert body['rows'] > 0 and body['version'] == data_access.table_version('annual_county')
+
+        plain = self.fetch_table('gzip;q=0, identity')
+        assert 'Content-Encoding' not in plain.headers
+        assert json.loads(plain.body) == body
+
+    def test_etag_revalidates(self):
+        first = self.fetch_table('gzip')
+        tag = first.headers['Etag']
+        assert ' ' not in tag
+        again = self.fetch_table('gzip', **{'If-None-Match': tag})
+        assert again.code == 304 and not again.body
+        assert self.fetch('/v1/annual_county?jurisdiction=Fulton').headers['Etag'] != tag
+
+        # the plain body has its own tag, and each tag only revalidates its encoding
+        plain = self.fetch_table('identity')
+        assert 'Content-Encoding' not in plain.headers
+        assert plain.headers['Etag'] != tag
+        assert self.fetch_table('identity', **{'If-None-Match': tag}).code == 200
+        assert self.fetch_table('gzip', **{'If-None-Match': plain.headers['Etag']}).code == 200
+        assert self.fetch_table('identity', **{'If-None-Match': plain.headers['Etag']}).code == 304
+
+    def test_bad_query_is_400(self):
+        response = self.fetch('/v1/annual_county?start=soon')
+        assert response.code == 400 and 'error' in json.loads(response.body)
@@ -0,0 +1,49 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import fetch_permits
+from bps_fixtures import write_fixtures
+
+
+@pytest.fixture
+def backfill(census, point_fetch):
+    """A stub mirror holding January and February 2025, with fetch_permits
+    pointed at it; returns the backfill directory."""
+    monthly = pd.read_csv(fetch_permits.monthly_master_path('GA'))
+    annual = pd.read_csv(fetch_permits.annual_master_path('GA'), dtype={'FIPS': str})
+    write_fixtures(str(census.mirror), monthly=monthly[monthly['year_month'].isin([202501, 202502])],
+                   annual=annual.iloc[:0], county_filler=10, place_filler=10)
+    return point_fetch(census()) / 'monthly'
+
+
+def test_year_without_files_is_not_checkpointed(backfill):
+    fetch_permits.backfill_permits(2024, 2025, workers=4)
+    with open(backfill / 'checkpoint.json') as f:
+        checkpoint = json.load(f)
+    assert list(checkpoint) == ['2025']
+    assert len(checkpoint['2025']['missing']) == 20
+    assert checkpoint['2025']['rows']['GA'] > 0
+    assert sorted(os.listdir(backfill)) == ['BPS_GA_2025.csv', 'checkpoint.json']
+
+    partition = pd.read_csv(backfill / 'BPS_GA_2025.csv')
+    assert sorted(partition['year_month'].unique()) == [202501, 202502]
+    assert len(partition) == checkpoint['2025']['rows']['GA']
+
+
+def test_unfound_year_is_retried_next_run(backfill, capsys):
+    fetch_permits.backfill_permits(2024, 2024, workers=4)
+    assert not os.path.exists(backfill / 'checkpoint.json')
+    assert 'skipped 2024: no files found' in capsys.readouterr().out
+    fetch_permits.backfill_permits(2024, 2025, workers=4)
+    assert 'already backfilled' not in capsys.readouterr().out
+
+
+def test_unparseable_file_fails_the_year(backfill, census):
+    (census.mirror / 'County' / 'co2502c.txt').write_text('<html><body>Service unavailable</body></html>')
+    with pytest.raises(fetch_permits.DownloadError, match='backfill incomplete for 2025'):
+        fetch_permits.backfill_permits(2025, 2025, workers=4)
+    assert not os.path.exists(backfill / 'BPS_GA_2025.csv')
+    assert not os.path.exists(backfill / 'checkpoint.json')
@@ -0,0 +1,31 @@
+import io
+
+import pandas as pd
+import pytest
+
+from exports import FORMATS, export_file, export_payload
+
+ROWS = pd.DataFrame({'Year': [2023, 2024, 2025], 'Name': ['Cobb', 'Cobb', 'Fulton'],
+                     'Permits': [10, 12, 7]}, index=[5, 6, 9])
+
+
+@pytest.mark.parametrize('fmt, read', [('CSV', pd.read_csv), ('Parquet', pd.read_parquet),
+                                       ('Excel', pd.read_excel)])
+def test_formats_round_trip(fmt, read):
+    assert set(FORMATS) == {'CSV', 'Parquet', 'Excel'}
+    data = export_file(ROWS, fmt)
+    pd.testing.assert_frame_equal(read(io.BytesIO(data)), ROWS.reset_index(drop=True))
+
+
+def test_payload_built_once_per_key():
+    calls = []
+
+    def frame():
+        calls.append(1)
+        return ROWS
+
+    first = export_payload(('test', 1), 'CSV', frame)
+    assert export_payload(('test', 1), 'CSV', frame) is first
+    export_payload(('test', 2), 'CSV', frame)
+    export_payload(('test', 1), 'Parquet', frame)
+    assert len(calls) == 3
@@ -0,0 +1,78 @@
+import sys
+import time
+from functools import partial
+
+import pandas as pd
+
+import fetch_permits
+from bps_fixtures import write_fixtures
+from raw_cache import RawCache
+
+
+def fetch(point_fetch, base_url, raw, workers, capsys):
+    """A full fetch of both masters (no cache) into tmp_path/<raw>; returns the
+    raw directory, the months and years reported missing, and the wall time."""
+    raw_dir = point_fetch(base_url, raw=raw)
+    capsys.readouterr()
+    start = time.perf_counter()
+    fetch_permits.building_permits_fetch(workers=workers)
+    fetch_permits.annual_permits_fetch(workers=workers)
+    elapsed = time.perf_counter() - start
+    missing = [line for line in capsys.readouterr().out.splitlines()
+               if line.startswith('Unable to find') or 'not yet published' in line]
+    return raw_dir, missing, elapsed
+
+
+def test_parallel_fetch_matches_serial(window_mirror, point_fetch, capsys):
+    # two months Census hasn't got, so the gap reporting is compared too
+    (window_mirror.mirror / 'County' / 'co2603c.txt').unlink()
+    (window_mirror.mirror / 'Place' / 'South Region' / 'so2510c.txt').unlink()
+    base_url = window_mirror(latency=0.05)
+
+    serial, serial_missing, serial_time = fetch(point_fetch, base_url, 'serial', 1, capsys)
+    parallel, parallel_missing, parallel_time = fetch(point_fetch, base_url, 'parallel', 8, capsys)
+
+    for name in ('BPS_GA.csv', 'BPS_GA_annual.csv'):
+        assert (parallel / name).read_bytes() == (serial / name).read_bytes()
+    assert parallel_missing == serial_missing
+    assert any('March 2026 county' in line for line in serial_missing)
+    assert any('October 2025 place' in line for line in serial_missing)
+    # ~40 requests at 50 ms each: the pool should hide most of the latency
+    assert parallel_time < serial_time * 0.6
+
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, 'argv', ['fetch_permits.py', *argv])
+    fetch_permits.main()
+
+
+def test_incremental_matches_full_rebuild(window_mirror, point_fetch, monkeypatch, tmp_path):
+    base_url = window_mirror()
+    monkeypatch.setattr(fetch_permits, 'RawCache', partial(RawCache, str(tmp_path / 'cache')))
+    parsed = []
+    parse = RawCache.parse
+    monkeypatch.setattr(RawCache, 'parse',
+                        lambda self, response, *args: parsed.append(response.url) or parse(self, response, *args))
+
+    incremental = point_fetch(base_url, raw='incremental')
+    run_main(monkeypatch, '--incremental')
+
+    # Census revises one county month
+    monthly = pd.read_csv(incremental / 'BPS_GA.csv')
+    revised = monthly[monthly['year_month'] == 202605].copy()
+    revised.loc[revised['Level'] == 'County', 'SF_permits'] += 1
+    annual = pd.read_csv(incremental / 'BPS_GA_annual.csv', dtype={'FIPS': str})
+    write_fixtures(str(window_mirror.mirror), monthly=revised, annual=annual,
+                   county_filler=50, place_filler=50)
+
+    parsed.clear()
+    run_main(monkeypatch, '--incremental')
+    # only the revised month is parsed again; every other month comes from the master
+    assert [url for url in parsed if url.endswith('c.txt')] == [f'{base_url}/County/co2605c.txt']
+
+    full = point_fetch(base_url, raw='full')
+    run_main(monkeypatch, '--no-cache')
+    for name in ('BPS_GA.csv', 'BPS_GA_annual.csv'):
+        assert (incremental / name).read_bytes() == (full / name).read_bytes()
+    after = pd.read_csv(full / 'BPS_GA.csv')
+    assert after['SF_permits'].sum() == monthly['SF_permits'].sum() + (revised['Level'] == 'County').sum()
@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+from functools import partial
+
+import pytest
+
+import fetch_permits
+from raw_cache import RawCache
+from http_client import HttpClient, NotPublished, DownloadError, CircuitOpenError, FAILURE_THRESHOLD
+
+BODY = b'header\n' + b'row\n' * 5000
+
+
+def client(**options):
+    return HttpClient(**dict({'backoff_base': 0.01, 'backoff_max': 0.05, 'timeout': 5}, **options))
+
+
+@pytest.fixture
+def mirror(census):
+    (census.mirror / 'co2501c.txt').write_bytes(BODY)
+    return census
+
+
+@pytest.mark.parametrize('fail_as', ['error', 'reset', 'truncate'])
+def test_transient_failures_are_retried(mirror, fail_as):
+    url = mirror(fail_first=2, fail_as=fail_as) + '/co2501c.txt'
+    http = client()
+    response = http.get(url)
+    assert response.status == 200 and response.body == BODY
+    assert http.stats[url].attempts == 3
+    assert len(http.stats[url].latencies) == 3
+
+
+def test_retries_run_out(mirror):
+    url = mirror(fail_first=5) + '/co2501c.txt'
+    http = client(retries=2)
+    with pytest.raises(DownloadError, match='HTTP 503 after 3 attempts'):
+        http.get(url)
+
+
+def test_404_is_not_published_and_not_retried(mirror):
+    url = mirror() + '/co2612c.txt'
+    http = client()
+    with pytest.raises(NotPublished):
+        http.get(url)
+    assert http.stats[url].attempts == 1
+    assert http.stats[url].outcome == '404'
+
+
+def test_circuit_opens_and_fails_fast(mirror):
+    base_url = mirror(down=True)
+    http = client(retries=FAILURE_THRESHOLD + 5)
+    with pytest.raises(CircuitOpenError):
+        http.get(base_url + '/co2501c.txt')
+    assert http.stats[base_url + '/co2501c.txt'].attempts == FAILURE_THRESHOLD
+
+    # every later request to the host fails without being sent
+    with pytest.raises(CircuitOpenError):
+        http.get(base_url + '/co2502c.txt')
+    assert http.stats[base_url + '/co2502c.txt'].attempts == 0
+    assert http.stats[base_url + '/co2502c.txt'].outcome == 'circuit open'
+
+
+def test_circuit_closes_after_a_good_probe(mirror):
+    base_url = mirror(fail_first=3)
+    http = client(retries=0, failure_threshold=3, reset_after=0.05)
+    for _ in range(3):
+        with pytest.raises(DownloadError):
+            http.get(base_url + '/co2501c.txt')
+    with pytest.raises(CircuitOpenError):
+        http.get(base_url + '/co2501c.txt')
+    time.sleep(0.1)
+    assert http.get(base_url + '/co2501c.txt').status == 200
+    assert http.get(base_url + '/co2501c.txt').status == 200
+
+
+def test_unparseable_body_is_a_download_error(mirror, point_fetch):
+    (mirror.mirror / 'County').mkdir()
+    (mirror.mirror / 'County' / 'co2501c.txt').write_text('<html><body>Service unavailable</body></html>')
+    point_fetch(mirror())
+    job = (fetch_permits.load_county_data, fetch_permits.file_url(None, '2501', 'c'), (13,))
+    with pytest.raises(DownloadError, match='could not parse'):
+        fetch_permits.run_job(job)
+
+
+@pytest.mark.parametrize('argv', [['--no-cache'], ['--incremental']])
+def test_census_down_leaves_masters_untouched(mirror, point_fetch, monkeypatch, tmp_path, argv):
+    previous = {'BPS_GA.csv': open(fetch_permits.monthly_master_path('GA'), 'rb').read(),
+                'BPS_GA_annual.csv': open(fetch_permits.annual_master_path('GA'), 'rb').read(),
+                'BPS_sources.json': b'{}'}
+    raw_dir = point_fetch(mirror(down=True))
+    raw_dir.mkdir()
+    masters = {}
+    for name, data in previous.items():
+        (raw_dir / name).write_bytes(data)
+        masters[name] = (raw_dir / name).stat().st_mtime_ns
+
+    monkeypatch.setattr(fetch_permits, 'RawCache', partial(RawCache, str(tmp_path / 'cache')))
+    monkeypatch.setattr(sys, 'argv', ['fetch_permits.py', '--retries', '1', *argv])
+    with pytest.raises(SystemExit, match='download failed'):
+        fetch_permits.main()
+
+    assert sorted(os.listdir(raw_dir)) == sorted(masters)
+    for name, mtime in masters.items():
+        assert (raw_dir / name).read_bytes() == previous[name]
+        assert (raw_dir / name).stat().st_mtime_ns == mtime
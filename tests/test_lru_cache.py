@@ -0,0 +1,18 @@
+from lru_cache import LRUCache
+
+
+def test_least_recently_used_is_evicted():
+    cache = LRUCache(2)
+    builds = []
+
+    def build(key):
+        return lambda: builds.append(key) or key.upper()
+
+    assert cache.get('a', build('a')) == 'A'
+    cache.get('b', build('b'))
+    cache.get('a', build('a'))          # 'a' is now the most recent
+    cache.get('c', build('c'))          # so 'b' goes
+    assert cache.get('a', build('a')) == 'A'
+    cache.get('b', build('b'))
+    assert builds == ['a', 'b', 'c', 'b']
+    assert cache.stats()['hits'] == 2 and cache.stats()['size'] == 2
@@ -0,0 +1,73 @@
+import os
+
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import backend_query
+import data_access
+from conftest import REPO_ROOT
+from regions import get_region
+
+
+def backfilled_year(monthly, year):
+    # the master's 2025 months, relabelled as an older year
+    df = monthly[monthly['year_month'] // 100 == 2025].copy()
+    df['year_month'] = df['year_month'] % 100 + year * 100
+    df['date'] = df['date'].str.replace('2025', str(year))
+    return df
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    """Dashboard tables built into tmp_path/Data with 2014 and 2015 backfilled,
+    and data_access reading them."""
+    monkeypatch.setattr(backend_query, 'REPO_ROOT', str(tmp_path))
+    region = get_region()
+    monthly, annual = backend_query.read_masters(region)
+    backfill = {year: backfilled_year(monthly, year) for year in (2014, 2015)}
+    tables = backend_query.build_dashboard_tables(monthly, annual, backend_query.read_existing_tables(region),
+                                                  region, backfill=backfill)
+    backend_query.write_tables(tables, region)
+
+    data_dir = tmp_path / region['data_dir']
+    monkeypatch.setattr(data_access, 'data_path', lambda file: os.path.join(data_dir, file))
+    monkeypatch.setattr(data_access, '_tables', {})
+    monkeypatch.setattr(data_access, '_manifest', {'stamp': None, 'data': {}})
+    return region, tables
+
+
+def test_history_is_written_and_verified(history):
+    region, tables = history
+    assert sorted(tables['monthly_history']) == [2014, 2015]
+    assert backend_query.verify_manifest(region) == []
+    manifest = backend_query.read_manifest(region)
+    assert manifest['monthly_history']['2015']['year_month'] == [201501, 201512]
+    # history stops where the rolling window starts
+    assert tables['monthly_history'][2015]['year_month'].max() < tables['monthly_master']['year_month'].min()
+
+
+def test_loader_reads_only_the_years_asked_for(history):
+    assert data_access.history_years() == [2014, 2015]
+    window = data_access.monthly_rows('Metro')
+    assert window['year_month'].min() // 100 > 2015
+
+    rows = data_access.monthly_rows('Metro', since=2015)
+    assert rows['year_month'].min() == 201501
+    assert len(rows) == len(window) + 24      # 12 months x 2 series
+    assert (data_access.HISTORY_DIR, 2015) in data_access._tables
+    assert (data_access.HISTORY_DIR, 2014) not in data_access._tables
+    assert data_access.monthly_version(2015) != data_access.monthly_version(2014)
+
+
+def test_monthly_trends_page_shows_backfilled_years(history):
+    at = AppTest.from_file(os.path.join(REPO_ROOT, 'views', '4_monthly_trends.py'), default_timeout=60).run()
+    assert not at.exception
+    since = at.selectbox(key='monthly_since')
+    assert since.options == ['Last 18 months', '2015', '2014']
+    assert 'Jan 2015' not in at.get('plotly_chart')[0].proto.spec
+
+    at = since.select(2014).run()
+    assert not at.exception
+    spec = at.get('plotly_chart')[0].proto.spec
+    assert 'Jan 2014' in spec and '2014 to Present' in spec
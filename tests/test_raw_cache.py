@@ -0,0 +1,122 @@
+import os
+
+import pandas as pd
+import pytest
+
+import raw_cache
+from http_client import HttpClient
+from raw_cache import RawCache
+
+
+def count_rows(buffer):
+    # stands in for the BPS loaders; records every call so a re-parse shows
+    count_rows.calls += 1
+    return pd.DataFrame({'line': buffer.read().decode().splitlines()})
+
+
+@pytest.fixture
+def month(census):
+    path = census.mirror / 'co2501c.txt'
+    path.write_text('header\nrow 1\nrow 2\n')
+    return path, census() + '/co2501c.txt'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    count_rows.calls = 0
+    return RawCache(str(tmp_path / 'cache'), client=HttpClient(retries=0))
+
+
+def test_first_get_stores_blob_and_validators(cache, month):
+    path, url = month
+    response = cache.get(url)
+    assert response.status == 200 and response.changed
+    assert response.body == path.read_bytes()
+    entry = cache.index[url]
+    assert entry['sha256'] == response.sha256
+    assert entry['etag'] and entry['last_modified']
+    assert os.path.exists(cache._blob_path(response.sha256))
+
+
+def test_304_reuses_blob_and_parse(cache, month):
+    _, url = month
+    first = cache.load(url, count_rows)
+    response = cache.get(url)
+    assert response.status == 304 and not response.changed
+    assert cache.client.stats[url].outcome == '304'
+    again = cache.parse(response, count_rows)
+    assert count_rows.calls == 1
+    pd.testing.assert_frame_equal(first, again)
+
+
+def test_if_modified_since_alone_revalidates(cache, month):
+    _, url = month
+    cache.get(url)
+    cache.index[url]['etag'] = None
+    assert cache.get(url).status == 304
+
+
+def test_index_survives_a_new_process(cache, month, tmp_path):
+    _, url = month
+    cache.load(url, count_rows)
+    reopened = RawCache(cache.cache_dir, client=HttpClient(retries=0))
+    assert reopened.get(url).status == 304
+    reopened.load(url, count_rows)
+    assert count_rows.calls == 1
+
+
+def test_changed_bytes_get_new_sha_and_reparse(cache, month):
+    path, url = month
+    first = cache.get(url)
+    cache.parse(first, count_rows)
+    path.write_text('header\nrow 1\nrow 2 revised\nrow 3\n')
+    second = cache.get(url)
+    assert second.status == 200 and second.changed
+    assert second.sha256 != first.sha256
+    assert cache.index[url]['sha256'] == second.sha256
+    assert len(cache.parse(second, count_rows)) == 4
+    assert count_rows.calls == 2
+
+
+def test_parsed_version_bump_invalidates_parses(cache, month, monkeypatch):
+    _, url = month
+    cache.load(url, count_rows)
+    monkeypatch.setattr(raw_cache, 'PARSED_VERSION', raw_cache.PARSED_VERSION + 1)
+    cache.load(url, count_rows)
+    assert count_rows.calls == 2
+    # the pickle from the old version is dead weight now
+    cache.prune()
+    assert all(name.endswith(f'.v{raw_cache.PARSED_VERSION}.pkl') for name in os.listdir(cache.parsed_dir))
+    cache.load(url, count_rows)
+    assert count_rows.calls == 2
+
+
+def test_prune_removes_unreferenced_blobs(cache, month):
+    path, url = month
+    old = cache.get(url)
+    cache.parse(old, count_rows)
+    path.write_text('header\nrow 1\n')
+    new = cache.get(url)
+    assert sorted(os.listdir(cache.blob_dir)) == sorted([old.sha256, new.sha256])
+
+    urls, files = cache.prune()
+    assert (urls, files) == (0, 2)     # the old blob and its parse
+    assert os.listdir(cache.blob_dir) == [new.sha256]
+    assert os.listdir(cache.parsed_dir) == []
+
+
+def test_prune_older_than_forgets_stale_urls(cache, month):
+    _, url = month
+    response = cache.get(url)
+    cache.index[url]['checked_at'] = '2000-01-01T00:00:00'
+    assert cache.prune(older_than_days=30) == (1, 1)
+    assert url not in cache.index
+    assert not os.path.exists(cache._blob_path(response.sha256))
+
+
+def test_missing_blob_refetches_in_full(cache, month):
+    _, url = month
+    response = cache.get(url)
+    os.remove(cache._blob_path(response.sha256))
+    again = cache.get(url)
+    assert again.status == 200 and again.body == response.body
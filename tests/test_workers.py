@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+import pytest
+
+import data_access
+from workers import SharedTables
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def shared_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    monkeypatch.setattr(data_access, 'SHARED_TABLES_DIR', str(tmp_path))
+    monkeypatch.setattr(data_access, '_tables', {})
+    return tmp_path
+
+
+def test_worker_maps_shared_file_once_written(shared_dir):
+    # the worker got to the new version before the launcher wrote its file
+    private = data_access.load_table('metro_total_annual')
+    assert not private.mapped
+
+    shared = SharedTables(str(shared_dir))
+    assert shared.write()
+    mapped = data_access.load_table('metro_total_annual')
+    assert mapped.mapped and mapped.version == private.version
+    pd.testing.assert_frame_equal(mapped.df, private.df)
+    assert data_access.load_table('metro_total_annual') is mapped
+
+
+def test_new_version_replaces_old_files(shared_dir, monkeypatch):
+    shared = SharedTables(str(shared_dir))
+    shared.write()
+    before = set(os.listdir(shared_dir))
+    assert len(before) == len(data_access.TABLE_INDEXES)
+    assert not shared.write()
+
+    real = data_access.table_version
+    monkeypatch.setattr(data_access, 'table_version',
+                        lambda name: real(name) + ('-next' if name == 'annual_city' else ''))
+    assert shared.write()
+    after = set(os.listdir(shared_dir))
+    assert after - before == {f"annual_city-{real('annual_city')}-next.arrow"}
+    assert before - after == {f"annual_city-{real('annual_city')}.arrow"}
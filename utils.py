@@ -1,100 +1,28 @@
+import os
+from collections import deque
 import streamlit as st
+from backend import spans
+from backend.regions import get_region, county_names, city_names
+
+# The metro this app serves, from backend/regions.py (DASHBOARD_REGION picks one)
+region = get_region()
+region_title = region['title']
+region_label = region['region_label']
+
+
+# Dashboard tables live in the metro's data_dir
+def data_path(filename: str) -> str:
+    return os.path.join(region['data_dir'], filename)
+
 
 # Create a custom color palette to map onto all counties
-county_color_map = {
-    "Cherokee": "#FF4500",
-    "Clayton": "#9370DB",
-    "Cobb": "#00BFFF",
-    "DeKalb": "#FFD700",
-    "Douglas": "#008000",
-    "Fayette": "#00FFFF",
-    "Forsyth": "#FF8C00",
-    "Fulton": "#FF6F61",
-    "Gwinnett": "#32CD32",
-    "Henry": "#FF1493",
-    "Rockdale": "#87CEEB",
-}
-
-city_list = [
-    'Acworth',
-    'Alpharetta',
-    'Atlanta',
-    'Austell',
-    'Avondale Estates',
-    'Ball Ground',
-    'Berkeley Lake',
-    'Brookhaven',
-    'Buford',
-    'Canton',
-    'Chamblee',
-    'Chattahoochee Hills',
-    'Clarkston',
-    'College Park',
-    'Conyers',
-    'Cumming',
-    'Dacula',
-    'Decatur',
-    'Doraville',
-    'Douglasville',
-    'Duluth',
-    'Dunwoody',
-    'East Point',
-    'Fairburn',
-    'Fayetteville',
-    'Forest Park',
-    'Grayson',
-    'Hampton',
-    'Hapeville',
-    'Holly Springs',
-    'Johns Creek',
-    'Jonesboro',
-    'Kennesaw',
-    'Lake City',
-    'Lawrenceville',
-    'Lilburn',
-    'Lithonia',
-    'Locust Grove',
-    'Lovejoy',
-    'Marietta',
-    'McDonough',
-    'Milton',
-    'Morrow',
-    'Mountain Park',
-    'Mountain View',
-    'Nelson',
-    'Norcross',
-    'Palmetto',
-    'Peachtree City',
-    'Peachtree Corners',
-    'Pine Lake',
-    'Powder Springs',
-    'Riverdale',
-    'Roswell',
-    'Sandy Springs',
-    'Smyrna',
-    'Snellville',
-    'South Fulton',
-    'Stockbridge',
-    'Stone Mountain',
-    'Stonecrest',
-    'Sugar Hill',
-    'Suwanee',
-    'Tucker',
-    'Tyrone',
-    'Union City',
-    'Woodstock',
-    # 'Unincorporated Cherokee County',
-    # 'Unincorporated Clayton County',
-    # 'Unincorporated Cobb County',
-    # 'Unincorporated DeKalb County',
-    # 'Unincorporated Douglas County',
-    # 'Unincorporated Fayette County',
-    # 'Unincorporated Forsyth County',
-    # 'Unincorporated Fulton County',
-    # 'Unincorporated Gwinnett County',
-    # 'Unincorporated Henry County',
-    # 'Unincorporated Rockdale County'
-]
+county_color_map = {name: region['colors'][name] for name in county_names(region)}
+
+# Incorporated cities only; the unincorporated balances stay off the selectors
+city_list = city_names(region)
+
+# Geographies selected when a page first loads: the core city and its county
+core_city, core_county = region.get('core_city') or (city_list[0], county_names(region)[0])
 
 
 # Function to apply the text color to selected multiselect options
@@ -155,3 +83,13 @@ def update_county():
 def update_starting_year():
     st.session_state['starting_year'] = st.session_state['starting_year_input']
     st.query_params["starting_year"] = st.session_state['starting_year']
+
+
+# Debug panel (SPANS=panel): this session's last few reruns, one row each, with
+# the total time and the time in each span. `record` is the rerun just traced.
+def timings_panel(record) -> None:
+    history = st.session_state.setdefault('span_history', deque(maxlen=spans.HISTORY))
+    history.append({'page': record.get('page'), 'total ms': record['ms'],
+                    **spans.summarize(record)})
+    with st.sidebar.expander('Rerun timings (ms)'):
+        st.dataframe(list(reversed(history)), hide_index=True, use_container_width=True)
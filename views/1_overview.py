@@ -1,8 +1,10 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from st_screen_stats import ScreenData
-from utils import provisional_caption
+import charts
+from layout import is_mobile
+from utils import provisional_caption, region_title
+from data_access import load_table, data_version
+from figure_cache import figures
+from backend.spans import span
 
 # set page configurations
 st.set_page_config(
@@ -11,21 +13,12 @@ st.set_page_config(
 )
 
 
-# using react component to get screen width
-screenD = ScreenData(setTimeout=200)
-screen_d = screenD.st_screen_data()
-screen_width = screen_d['innerWidth']
+# desktop or mobile layout, as detected by main.py (see layout.py)
+mobile = is_mobile()
 
 
-# cache function to read in CSV data for Overview page
-@st.cache_data
-def read_overview_data():
-    overview_df = pd.read_csv('Data/metro_total_annual.csv')
-    return overview_df
-
-
-# read in CSV
-df = read_overview_data()
+# read in the metro totals (shared across sessions, reloaded after a refresh)
+df = load_table('metro_total_annual').rows()
 permits_avg = df['Permits'].mean()
 # permits_total = df['Permits'].sum()
 
@@ -34,7 +27,7 @@ font_color = "#d9d9d9"
 
 
 # desktop / tablet view
-if screen_width >= 500:
+if not mobile:
 
     # dashboard title variables
     title_font_size = 32
@@ -48,7 +41,7 @@ if screen_width >= 500:
     st.markdown(
         f"""
         <div style='margin-top: {title_margin_top}px; margin-bottom: {title_margin_bottom}px; margin-left: {title_margin_left}px'>
-            <span style='font-size: {title_font_size}px; font-weight: {title_font_weight}; color: {title_font_color}'>Metro Atlanta Building Permit Tracker</span>
+            <span style='font-size: {title_font_size}px; font-weight: {title_font_weight}; color: {title_font_color}'>{region_title} Building Permit Tracker</span>
         </div>
         """,
         unsafe_allow_html=True
@@ -72,109 +65,27 @@ if screen_width >= 500:
         unsafe_allow_html=True
     )
 
-    # create fig object
-    fig = px.line(
-        df,
-        x='Year',
-        y='Permits',
-        title='Historic Residential Building Permits Issued in Atlanta Region (Single- & Multi-Family)',
-        height=460
-    )
-
-    # update fig layout
-    fig.update_layout(
-        hovermode='x unified',
-        hoverlabel=dict(
-            font_size=16,  # this changes the font size of the tooltip
-            bgcolor='#292929',
-            font_color=font_color
-        ),
-        title={
-            'font': {
-                'color': font_color,
-                'weight': 'normal'
-            }
-        },
-        xaxis=dict(
-            title='',
-            tickfont=dict(
-                size=16,
-                color=font_color
-            ),
-            gridcolor='#FFFFFF'
-        ),
-        yaxis=dict(
-            title='',
-            tickfont=dict(
-                size=16,
-                color=font_color
-            )
-        ),
-        plot_bgcolor='#292929',
-        paper_bgcolor='#292929'
-    )
-
-    # customize line trace
-    line_color = '#FF6F61'
-    fig.update_traces(
-        hovertemplate='%{y:,.0f}',
-        mode='lines',
-        line=dict(
-            color=line_color,
-            width=4,
-            dash='solid'
+    # build the figure, or reuse the one drawn for the same filters
+    def build_figure():
+        return charts.history_line(
+            df['Year'].to_numpy(),
+            df['Permits'].to_numpy(),
+            title='Historic Residential Building Permits Issued in Atlanta Region (Single- & Multi-Family)',
+            average=permits_avg,
+            average_label='Average since 1980',
+            label_x='2017.5'  # near the end of the line (latest year)
         )
-    )
 
-    # Add a horizontal line at the average value of 'Permits'
-    annotation_color = '#00BFFF'
-    fig.add_shape(
-        type='line',
-        x0=df['Year'].min(),
-        x1=df['Year'].max(),
-        # Position of the line on the y-axis (average 'Permits')
-        y0=permits_avg,
-        y1=permits_avg,  # Same y0 and y1 to create a horizontal line
-        line=dict(
-            color=annotation_color,
-            width=2,
-            dash='dash'
-        )
-    )
+    with span('figure'):
+        fig = figures.get(('overview', data_version('metro_total_annual')), build_figure)
 
-    # Add label annotation for the horizontal average line
-    fig.add_annotation(
-        x='2017.5',  # Position the text near the end of the line (latest year)
-        y=permits_avg,  # Position the text just above the horizontal line
-        text="Average since 1980",  # Text to display
-        showarrow=False,  # No arrow needed
-        yshift=10,  # Shift text upwards by 10 pixels to avoid overlapping with the line
-        font=dict(
-            color=annotation_color,
-            size=16,
-            weight='bold'
+    with span('plotly_chart'):
+        st.plotly_chart(
+            fig,
+            config=charts.CONFIG,
+            theme='streamlit',
+            use_container_width=True
         )
-    )
-
-    fig.update_xaxes(
-        showline=True,
-        linewidth=1,
-        linecolor=font_color
-    )
-    fig.update_yaxes(
-        showline=True,
-        linewidth=1,
-        linecolor=font_color,
-        showgrid=False
-    )
-
-    config = {'displayModeBar': False}
-    st.plotly_chart(
-        fig,
-        config=config,
-        theme='streamlit',
-        use_container_width=True
-    )
 
     if 'provisional' in df.columns:
         caption = provisional_caption(df.loc[df['provisional'] == True, 'Year'])
@@ -188,7 +99,7 @@ else:
 
     st.markdown(f'''
         <div style="text-align: left; margin-top: -20px; margin-bottom: 50px; padding-left: {side_margin}px; padding-right: {side_margin}px;">
-                <p style="font-weight: 700; font-size: 21px; color: #00BFFF;">Metro Atlanta Building Permit Tracker 📈</p>
+                <p style="font-weight: 700; font-size: 21px; color: #00BFFF;">{region_title} Building Permit Tracker 📈</p>
         </div>''', unsafe_allow_html=True)
 
     # # create fig object
@@ -248,7 +159,7 @@ else:
     # config = {'displayModeBar': False}
     # st.plotly_chart(
     #     fig,
-    #     config=config,
+    #     config=charts.CONFIG,
     #     theme='streamlit',
     #     use_container_width=True
     # )
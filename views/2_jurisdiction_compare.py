@@ -1,8 +1,12 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from utils import update_permit_type, update_county
-from st_screen_stats import ScreenData
+import charts
+from utils import update_permit_type, update_county, region
+from data_access import load_table, data_version
+from figure_cache import figures
+from exports import export_button
+from backend.spans import span
+from backend.regions import title_for
+from layout import is_mobile
 
 # set page configurations
 st.set_page_config(
@@ -10,43 +14,12 @@ st.set_page_config(
     initial_sidebar_state="expanded"  # 'collapsed' or 'expanded'
 )
 
-# using react component to get screen width
-screenD = ScreenData(setTimeout=200)
-screen_d = screenD.st_screen_data()
-screen_width = screen_d['innerWidth']
-
-# set color map
-county_color_map = {
-    "Atlanta": "#8A2BE2",
-    "Cherokee": "#FF4500",
-    "Clayton": "#9370DB",
-    "Cobb": "#00BFFF",
-    "DeKalb": "#FFD700",
-    "Douglas": "#008000",
-    "Fayette": "#00FFFF",
-    "Forsyth": "#FF8C00",
-    "Fulton": "#FF6F61",
-    "Fulton less Atlanta": "#FF69B4",
-    "Gwinnett": "#32CD32",
-    "Henry": "#FF1493",
-    "Rockdale": "#87CEEB",
-}
-
-county_title_map = {
-    "Atlanta": "City of Atlanta",
-    "Cherokee": "Cherokee County",
-    "Clayton": "Clayton County",
-    "Cobb": "Cobb County",
-    "DeKalb": "DeKalb County",
-    "Douglas": "Douglas County",
-    "Fayette": "Fayette County",
-    "Forsyth": "Forsyth County",
-    "Fulton": "Fulton County",
-    "Fulton less Atlanta": "Fulton (less Atlanta)",
-    "Gwinnett": "Gwinnett County",
-    "Henry": "Henry County",
-    "Rockdale": "Rockdale County",
-}
+# desktop or mobile layout, as detected by main.py (see layout.py)
+mobile = is_mobile()
+
+# set color and title maps: every county plus the metro's pseudo-counties
+county_color_map = dict(region['colors'])
+county_title_map = {name: title_for(region, name) for name in county_color_map}
 
 
 # Function to apply the text color to selected multiselect options
@@ -70,7 +43,7 @@ title_font_weight = 700
 title_font_color = font_color
 
 # desktop
-if screen_width >= 500:
+if not mobile:
     title_margin_top = -20
 
 # mobile
@@ -104,7 +77,7 @@ with col1:
     st.query_params["permit_type"] = permit_type
 
 # jurisdiction select - will change depending on desktop / mobile
-if screen_width >= 500:
+if not mobile:
     with col3:
         juris_select = st.multiselect(
             label="Jurisdiction:",
@@ -156,33 +129,20 @@ else:
 st.query_params["year"] = slider
 
 
-# cache function to read in CSV data for Explore page
-@st.cache_data
-def read_drilldown_data():
-    drilldown_df = pd.read_csv('Data/annual_county.csv')
-    return drilldown_df
-
-
-# read in data
-df = read_drilldown_data()
-
+# read in data: annual_county, indexed by county and series (loaded once per
+# process), and the running totals behind the KPI boxes and mobile bar chart
+with span('filter'):
+    table = load_table('annual_county')
+    totals = load_table('cumulative_totals')
 
-# apply filters
-df_chart = df[df['county_name'].isin(juris_select)]
-df_chart = df_chart[df_chart['Year'] >= slider]
-df_chart = df_chart[df_chart['Series'] == permit_type]
-
-# chart config
-config = {'displayModeBar': False}
-
-# set the scrolling behavior based on screen width
-if screen_width < 1375:
-    overflow = 'scroll'
-else:
-    overflow = 'hidden'
+    # apply filters: one block of rows per selected county, in table order as before
+    df_chart = table.select(
+        [(juris, permit_type) for juris in sorted(juris_select)],
+        since=slider
+    )
 
 # desktop / tablet view
-if screen_width >= 500:
+if not mobile:
 
     # set chart title based on multiselect
     if (len(juris_select) == 1):
@@ -190,100 +150,30 @@ if screen_width >= 500:
     else:
         chart_title = f"{permit_type} permits issued for selected jurisdictions since {slider}"
 
-    # create fig object
-    fig = px.line(
-        df_chart,
-        x='Year',
-        y='Permits',
-        title=chart_title,
-        color='county_name',
-        labels={
-            'county_name': 'County'
-        },
-        height=500
-    )
-
-    # update fig layout
-    fig.update_layout(
-        hovermode='x',
-        margin=dict(
-            t=60,
-        ),
-        legend=dict(
-            orientation='h',
-            title_text="",
-            yanchor="bottom",
-            y=0.97,
-            xanchor="left",
-            bgcolor="rgba(41,41,41,0)"
-        ),
-        title={
-            'font': {
-                'color': font_color,
-                'size': 18
-            }
-        },
-        xaxis=dict(
-            title='',
-            tickfont=dict(
-                size=16,
-                color=font_color
-            ),
-            gridcolor='#FFFFFF',
-        ),
-        yaxis=dict(
-            title='',
-            tickfont=dict(
-                size=16,
-                color=font_color
-            ),
-            tickformat=','
-        ),
-    )
+    # build the figure, or reuse the one drawn for the same filters
+    def build_figure():
+        # create fig object: one line per county, in table order as before
+        series = []
+        for juris in sorted(juris_select):
+            rows = table.rows(juris, permit_type, since=slider)
+            if len(rows):
+                series.append((juris, rows['Year'].to_numpy(), rows['Permits'].to_numpy()))
+        return charts.jurisdiction_lines(series, chart_title, county_color_map)
 
-    fig.update_traces(
-        hovertemplate='<b>%{y}</b>',
-        mode='lines',
-        line=dict(
-            width=3,
-            dash='solid'
-        ),
-        hoverlabel=dict(
-            font_color='#171717'
-        )
-    )
-
-    # dynamically set the hoverlabel background color to match line color
-    for trace in fig.data:
-        county_name = trace.name
-        trace_color = county_color_map.get(county_name, "#000000")
-        trace.line.color = trace_color
-        trace.hoverlabel.bgcolor = trace_color
-
-    fig.update_xaxes(
-        showline=True,
-        linewidth=1,
-        linecolor=font_color,
-        showgrid=False,
-        tickformat=".0f"
-    )
-    fig.update_yaxes(
-        showline=True,
-        linewidth=1,
-        linecolor=font_color,
-        showgrid=False,
-        zeroline=False
-    )
+    with span('figure'):
+        fig = figures.get(('compare', tuple(sorted(juris_select)), permit_type, slider,
+                           data_version('annual_county')), build_figure)
 
     # split the data view into 2 columns
     col1, col2 = st.columns([4, 1])
 
-    col1.plotly_chart(
-        fig,
-        config=config,
-        theme='streamlit',
-        use_container_width=True
-    )
+    with span('plotly_chart'):
+        col1.plotly_chart(
+            fig,
+            config=charts.CONFIG,
+            theme='streamlit',
+            use_container_width=True
+        )
 
     # KPI font variables
     heading_margin_top = 0
@@ -302,8 +192,8 @@ if screen_width >= 500:
     col2.write("")
 
     # Create a list of counties and their total permits
-    county_totals = [(county, df_chart[df_chart['county_name'] == county]['Permits'].sum())
-                     for county in df_chart['county_name'].unique()]
+    county_totals = [(county, totals.total('annual_county', county, permit_type, since=slider))
+                     for county in sorted(juris_select)]
 
     # Sort the list by permit_total in descending order
     county_totals_sorted = sorted(
@@ -324,13 +214,12 @@ if screen_width >= 500:
             )
             st.write("")
 
-    # download dataframe as CSV
-    df_download = df_chart.to_csv(index='False').encode('utf-8')
-    st.download_button(
-        label=":material/download:",
-        data=df_download,
-        file_name='jurisdiction_compare.csv',
-        help='Download filtered data to CSV',
+    # download the filtered data; the file is only written when asked for
+    export_button(
+        'compare',
+        ('compare', tuple(sorted(juris_select)), permit_type, slider, data_version('annual_county')),
+        lambda: df_chart,
+        'jurisdiction_compare'
     )
 
     # the custom CSS lives here:
@@ -391,7 +280,13 @@ if screen_width >= 500:
                     bottom: 10px;
                 }}
                 .main {{
-                    overflow: {overflow}
+                    overflow: hidden
+                }}
+                /* let narrower desktop windows scroll */
+                @media (max-width: 1374px) {{
+                    .main {{
+                        overflow: scroll
+                    }}
                 }}
             </style>
         """
@@ -409,53 +304,27 @@ else:
     st.markdown(
         f'<div style="text-align: center; margin-top: 0px; margin-bottom: 0px;"><p style="font-size: 20px;"><b>{permit_type} permits issued since {slider}</b></p></div>', unsafe_allow_html=True)
 
-    # aggregate the filtered data for the horizontal bar chart
-    df_chart_agg = df_chart.groupby('county_name')[
-        'Permits'].sum().reset_index()
-
-    # define figure object
-    fig = px.bar(
-        df_chart_agg,
-        x="Permits",
-        y="county_name",
-        orientation='h',
-        title=None,
-        color='county_name',
-        labels={
-            'county_name': 'County'
-        },
-    )
+    # build the figure, or reuse the one drawn for the same filters
+    def build_figure():
+        # totals for the horizontal bar chart, from the precomputed running totals
+        names = sorted(juris_select)
+        return charts.total_bars(
+            names,
+            [totals.total('annual_county', county, permit_type, since=slider) for county in names],
+            county_color_map
+        )
 
-    # update figure layout
-    fig.update_layout(
-        margin=dict(l=20, r=20, t=0, b=20),
-        yaxis={'categoryorder': 'total ascending'},
-        yaxis_title=None,
-        xaxis_title=None,
-        showlegend=False
-    )
+    with span('figure'):
+        fig = figures.get(('compare mobile', tuple(sorted(juris_select)), permit_type, slider,
+                           data_version('cumulative_totals')), build_figure)
 
-    # update figure traces
-    fig.update_traces(
-        hovertemplate='<b>%{x:,}</b>',
-        hoverlabel=dict(
-            font_color='#171717'
+    with span('plotly_chart'):
+        st.plotly_chart(
+            fig,
+            config=charts.CONFIG,
+            theme='streamlit',
+            use_container_width=True
         )
-    )
-
-    # dynamically set the hoverlabel background color to match line color
-    for trace in fig.data:
-        county_name = trace.name
-        trace_color = county_color_map.get(county_name, "#000000")
-        trace.marker.color = trace_color
-        trace.hoverlabel.bgcolor = trace_color
-
-    st.plotly_chart(
-        fig,
-        config=config,
-        theme='streamlit',
-        use_container_width=True
-    )
 
     # the custom CSS lives here:
     hide_default_format = """
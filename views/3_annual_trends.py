@@ -1,8 +1,11 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from utils import county_color_map, city_list, provisional_caption
-from st_screen_stats import ScreenData
+import charts
+from utils import county_color_map, city_list, provisional_caption, region_label, core_city, core_county
+from data_access import load_table, data_version
+from figure_cache import figures
+from exports import export_button
+from backend.spans import span
+from layout import is_mobile
 
 # set page configurations
 st.set_page_config(
@@ -10,10 +13,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"  # 'collapsed' or 'expanded'
 )
 
-# using react component to get screen width
-screenD = ScreenData(setTimeout=200)
-screen_d = screenD.st_screen_data()
-screen_width = screen_d['innerWidth']
+# desktop or mobile layout, as detected by main.py (see layout.py)
+mobile = is_mobile()
 
 # Initialize session state for the widgets, if not already set
 if 'geography_2' not in st.session_state:
@@ -30,9 +31,9 @@ def update_geography():
     if st.session_state['geo_level_2'] == 'Region':
         st.session_state['geography_2'] = 'Region'
     elif st.session_state['geo_level_2'] == 'County':
-        st.session_state['geography_2'] = list(county_color_map.keys())[7]
+        st.session_state['geography_2'] = core_county
     elif st.session_state['geo_level_2'] == 'City':
-        st.session_state['geography_2'] = city_list[2]
+        st.session_state['geography_2'] = core_city
 
     # update only 'geo' query param to reflect selected geography
     st.query_params['geo'] = st.session_state['geography_2']
@@ -48,7 +49,7 @@ title_font_weight = 700
 title_font_color = font_color
 
 # desktop
-if screen_width >= 500:
+if not mobile:
     title_margin_top = -20
 
 # mobile
@@ -133,170 +134,71 @@ with col5:
 st.query_params["year"] = slider_value
 
 
-# cache function to read in CSV data for Explore page
-@st.cache_data
-def read_county_data():
-    drilldown_df = pd.read_csv('Data/annual_county.csv')
+# annual tables, indexed by jurisdiction and series (loaded once per process)
+with span('filter'):
+    county_table = load_table('annual_county')
+    city_table = load_table('annual_city')
 
-    # don't need the 'All' totals for the annual trends page
-    drilldown_df = drilldown_df[drilldown_df['Series'] != 'All']
+    # no 'All' totals on the annual trends page; single-family first, as before
+    series_order = ['Single-family', 'Multi-family']
 
-    # sort the dataframe
-    drilldown_df = drilldown_df.sort_values(by='Series', ascending=False)
-
-    return drilldown_df
-
-
-@st.cache_data
-def read_city_data():
-    drilldown_df = pd.read_csv('Data/annual_city.csv')
-
-    # sort the dataframe
-    drilldown_df = drilldown_df.sort_values(by='Series', ascending=False)
-
-    return drilldown_df
-
-
-if geo_level == 'Region':
-    df = read_county_data()
-    df = df[df['county_name'] == 'Metro']
-    title = f'Permits Issued in the 11-County Region Since {slider_value}'
-    download_file_name = 'Regional_monthly_trends.csv'
-elif geo_level == 'County':
-    df = read_county_data()
-    df = df[df['county_name'] == selected_county]
-    title = f'Permits Issued in {selected_county} County Since {slider_value}'
-    download_file_name = f'{selected_county}County_annual_trends.csv'
-elif geo_level == 'City':
-    df = read_city_data()
-    df = df[df['City'] == selected_city]
-    title = f'Permits Issued in City of {selected_city} Since {slider_value}'
-    download_file_name = f'{selected_city}County_annual_trends.csv'
-
-df = df[df['Year'] >= slider_value]
-
-# color map
-color_discrete_map = {
-    'Single-family': '#00BFFF',
-    'Multi-family': '#FF6F61'
-}
-
-# chart config, same for desktop and mobile
-config = {'displayModeBar': False}
+    if geo_level == 'Region':
+        geo_table, geography = 'annual_county', 'Metro'
+        df = county_table.select(
+            [('Metro', series) for series in series_order], since=slider_value)
+        title = f'Permits Issued in the {region_label} Since {slider_value}'
+        download_file_name = 'Regional_annual_trends'
+    elif geo_level == 'County':
+        geo_table, geography = 'annual_county', selected_county
+        df = county_table.select(
+            [(selected_county, series) for series in series_order], since=slider_value)
+        title = f'Permits Issued in {selected_county} County Since {slider_value}'
+        download_file_name = f'{selected_county}County_annual_trends'
+    elif geo_level == 'City':
+        geo_table, geography = 'annual_city', selected_city
+        df = city_table.select(
+            [(selected_city, series) for series in series_order], since=slider_value)
+        title = f'Permits Issued in City of {selected_city} Since {slider_value}'
+        download_file_name = f'{selected_city}_annual_trends'
 
 # desktop / tablet view
-if screen_width >= 500:
-
-    # create chart object
-    fig = px.area(
-        df,
-        x='Year',
-        y='Permits',
-        title=title,
-        line_group='Series',
-        color='Series',
-        labels={
-            'county_name': 'County',
-        },
-        color_discrete_map=color_discrete_map,
-        height=545
-    )
-
-    # update fig layout
-    fig.update_layout(
-        hovermode='x',
-        margin=dict(
-            t=60,
-        ),
-        legend=dict(
-            font_size=14,
-            orientation='h',
-            title_text="",
-            yanchor="bottom",
-            y=0.97,
-            xanchor="left",
-            bgcolor="rgba(41,41,41,0)"
-        ),
-        legend_traceorder="reversed",
-        title={
-            'font': {
-                'color': font_color,
-                'size': 18
-            }
-        },
-        xaxis=dict(
-            title='',
-            tickfont=dict(
-                size=16,
-                color=font_color
-            ),
-            gridcolor='#FFFFFF',
-        ),
-        yaxis=dict(
-            title='',
-            tickfont=dict(
-                size=16,
-                color=font_color
-            ),
-            tickformat=','
-        ),
-        plot_bgcolor='#292929',
-        paper_bgcolor='#292929'
-    )
-
-    # configure tooltip
-    fig.update_traces(
-        hovertemplate='<b>%{y}</b>',
-        mode='lines',
-        line=dict(
-            width=2,
-            dash='solid'
-        ),
-        hoverlabel=dict(
-            font_color='#171717'
-        )
-    )
-
-    for trace in fig.data:
-        trace.hoverlabel.bgcolor = color_discrete_map[trace.name]
-
-    fig.update_xaxes(
-        showline=True,
-        linewidth=1,
-        linecolor=font_color,
-        showgrid=False,
-        tickformat=".0f"
-    )
-    fig.update_yaxes(
-        showline=True,
-        linewidth=1,
-        linecolor=font_color,
-        showgrid=False,
-        zeroline=False
-    )
+if not mobile:
+
+    # build the figure, or reuse the one drawn for the same filters
+    def build_figure():
+        # create chart object: single-family stacked under multi-family
+        geo_rows = county_table if geo_table == 'annual_county' else city_table
+        series = []
+        for permit_series in series_order:
+            rows = geo_rows.rows(geography, permit_series, since=slider_value)
+            series.append((permit_series, rows['Year'].to_numpy(), rows['Permits'].to_numpy()))
+        return charts.stacked_area(series, title)
+
+    with span('figure'):
+        fig = figures.get(('annual', geo_level, geography, slider_value, data_version(geo_table)),
+                          build_figure)
 
     st.write("")
 
-    st.plotly_chart(
-        fig,
-        config=config,
-        theme='streamlit',
-        use_container_width=True
-    )
+    with span('plotly_chart'):
+        st.plotly_chart(
+            fig,
+            config=charts.CONFIG,
+            theme='streamlit',
+            use_container_width=True
+        )
 
     if 'provisional' in df.columns:
         caption = provisional_caption(df.loc[df['provisional'] == True, 'Year'])
         if caption:
             st.markdown(caption, unsafe_allow_html=True)
 
-    # download dataframe as CSV
-    df = df.sort_values(by='Year', ascending=True)
-    df_download = df.to_csv(index='False').encode('utf-8')
-    st.download_button(
-        label=":material/download:",
-        data=df_download,
-        file_name=download_file_name,
-        help='Download filtered data to CSV'
+    # download the filtered data; the file is only written when asked for
+    export_button(
+        'annual',
+        ('annual', geo_level, geography, slider_value, data_version(geo_table)),
+        lambda: df.sort_values(by='Year', ascending=True),
+        download_file_name
     )
 
     # the custom CSS lives here:
@@ -452,7 +354,7 @@ else:
 
     # st.plotly_chart(
     #     fig,
-    #     config=config,
+    #     config=charts.CONFIG,
     #     theme='streamlit',
     #     use_container_width=True
     # )
@@ -1,9 +1,12 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from utils import county_color_map, city_list, MONTHLY_UNBENCHMARKED_CAPTION
+import charts
+from utils import county_color_map, city_list, MONTHLY_UNBENCHMARKED_CAPTION, region_label, core_city, core_county
 from pandas.tseries.offsets import DateOffset
-from st_screen_stats import ScreenData
+from data_access import load_table, history_years, monthly_rows, monthly_version
+from figure_cache import figures
+from exports import export_button
+from backend.spans import span
+from layout import is_mobile
 
 # set page configurations
 st.set_page_config(
@@ -11,10 +14,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"  # 'collapsed' or 'expanded'
 )
 
-# using react component to get screen width
-screenD = ScreenData(setTimeout=200)
-screen_d = screenD.st_screen_data()
-screen_width = screen_d['innerWidth']
+# desktop or mobile layout, as detected by main.py (see layout.py)
+mobile = is_mobile()
 
 # Initialize session state for the widgets, if not already set
 if 'geography_3' not in st.session_state:
@@ -34,9 +35,9 @@ def update_geography():
     if st.session_state['geo_level'] == 'Region':
         st.session_state['geography_3'] = 'Region'
     elif st.session_state['geo_level'] == 'County':
-        st.session_state['geography_3'] = list(county_color_map.keys())[7]
+        st.session_state['geography_3'] = core_county
     elif st.session_state['geo_level'] == 'City':
-        st.session_state['geography_3'] = city_list[2]
+        st.session_state['geography_3'] = core_city
 
     # update only 'geo' query param to reflect selected geography
     st.query_params["geo"] = st.session_state['geography_3']
@@ -52,7 +53,7 @@ title_font_weight = 700
 title_font_color = font_color
 
 # desktop
-if screen_width >= 500:
+if not mobile:
     title_margin_top = -20
 
 # mobile
@@ -119,44 +120,66 @@ with col2:
             })
         )
 
+# how far back to chart: the rolling window, or from a backfilled year on
+since = None
+years = history_years()
+if years:
+    _, col3, _ = st.columns([2, 3, 2])
+    with col3:
+        since = st.selectbox(
+            label='Show from:',
+            options=[None] + years[::-1],
+            format_func=lambda year: 'Last 18 months' if year is None else str(year),
+            key='monthly_since'
+        )
+
 st.write('')
 
+period = 'Trailing 18 Months' if since is None else f'{since} to Present'
+total_label = 'Trailing 18-Month Total' if since is None else f'Total since {since}'
+
+# monthly_master (plus any history years asked for), indexed by name and level
+# and loaded once per process, and the running totals behind the 18-month KPIs
+with span('filter'):
+    totals = load_table('cumulative_totals')
+
+    # conditionally read in data based on user input
+    if geo_level == 'City':
+        if isinstance(selected_city, list):
+            selected_city = selected_city[0]
+        df = monthly_rows(selected_city, 'City/Other', since=since)
+        geography = selected_city
+        totals_key = ('monthly_city', selected_city)
+        title = f'Permits Issued in City of {selected_city}, {period}'
+        download_file_name = f'{selected_city}_monthly_trends'
+    elif geo_level == 'Region':
+        df = monthly_rows('Metro', since=since)
+        geography = 'Metro'
+        totals_key = ('monthly_county', 'Metro')
+        title = f'Permits Issued in the {region_label}, {period}'
+        download_file_name = 'Regional_monthly_trends'
+    elif geo_level == 'County':
+        if isinstance(selected_county, list):
+            selected_county = selected_county[0]
+        df = monthly_rows(selected_county, 'County', since=since)
+        geography = selected_county
+        totals_key = ('monthly_county', selected_county)
+        title = title = f'Permits Issued in {selected_county} County, {period}'
+        download_file_name = f'{selected_county}County_monthly_trends'
+
+    if since is not None:
+        download_file_name += f'_since_{since}'
+
+    # month by month, single-family before multi-family within each month
+    df = df.sort_values(by=['year_month', 'Series'], ascending=[True, False])
+
+
+# 18-month totals come precomputed; a longer range is summed from its rows
+def series_total(permit_series):
+    if since is None:
+        return totals.total(*totals_key, permit_series)
+    return int(df.loc[df['Series'] == permit_series, 'Permits'].sum())
 
-@st.cache_data
-def read_master_data():
-    master_data = pd.read_csv('Data/monthly_master.csv')
-    return master_data
-
-
-df = read_master_data()
-df = df.sort_values(by='Series', ascending=False)
-df = df.sort_values(by=['year_month', 'Name'], ascending=True)
-
-# conditionally read in data based on user input
-if geo_level == 'City':
-    df = df[df['Level'] == 'City/Other']
-    if isinstance(selected_city, list):
-        selected_city = selected_city[0]
-    df = df[df['Name'] == selected_city]
-    title = f'Permits Issued in City of {selected_city}, Trailing 18 Months'
-    download_file_name = f'{selected_city}_monthly_trends.csv'
-elif geo_level == 'Region':
-    df = df[df['Name'] == 'Metro']
-    title = 'Permits Issued in the 11-County ARC Region, Trailing 18 Months'
-    download_file_name = 'Regional_monthly_trends.csv'
-elif geo_level == 'County':
-    df = df[df['Level'] == 'County']
-    if isinstance(selected_county, list):
-        selected_county = selected_county[0]
-    df = df[df['Name'] == selected_county]
-    title = title = f'Permits Issued in {selected_county} County, Trailing 18 Months'
-    download_file_name = f'{selected_county}County_monthly_trends.csv'
-
-# color map
-color_discrete_map = {
-    'Single-Family': '#00BFFF',
-    'Multi-Family': '#FF6F61'
-}
 
 # KPI font variables
 heading_font_size = 16
@@ -173,119 +196,52 @@ value_font_color = font_color
 border_thickness = 3
 top_bottom_padding = 28
 
-# Get every nth label from the x values
+# Get every nth label from the x values: quarterly over the window, yearly (or
+# sparser) over longer history
 x_labels = df['date'].unique()
-tickvals = x_labels[::3]
+tick_step = 3 if len(x_labels) <= 24 else 12 * max(1, len(x_labels) // 120)
+tickvals = x_labels[::tick_step]
 
 # desktop / tablet view
-if screen_width >= 500:
-
-    # create chart object
-    fig = px.area(
-        df,
-        x='date',
-        y='Permits',
-        title=title,
-        line_group='Series',
-        color='Series',
-        color_discrete_map=color_discrete_map,
-        height=545
-    )
-
-    # update fig layout
-    fig.update_layout(
-        hovermode='x',
-        margin=dict(
-            t=60,
-            r=15
-        ),
-        legend=dict(
-            font_size=14,
-            orientation='h',
-            title_text="",
-            yanchor="bottom",
-            y=0.97,
-            xanchor="left",
-            bgcolor="rgba(41,41,41,0)",
-            traceorder="reversed"
-        ),
-        title={
-            'font': {
-                'color': font_color,
-                'size': 18
-            }
-        },
-        xaxis=dict(
-            title='',
-            tickmode='array',
-            tickvals=tickvals,
-            tickfont=dict(
-                size=16,
-                color=font_color
+if not mobile:
+
+    # build the figure, or reuse the one drawn for the same filters
+    def build_figure():
+        # create chart object: single-family stacked under multi-family
+        series = []
+        for permit_series in ['Single-Family', 'Multi-Family']:
+            rows = df[df['Series'] == permit_series]
+            series.append((permit_series, rows['date'].to_numpy(), rows['Permits'].to_numpy()))
+        return charts.stacked_area(
+            series,
+            title,
+            xaxis=dict(
+                tickmode='array',
+                tickvals=tickvals,
+                tickangle=0,
+                tickformat="%b %Y"
             ),
-            gridcolor='#FFFFFF',
-            tickangle=0,
-            tickformat="%b %Y"
-        ),
-        yaxis=dict(
-            title='',
-            tickfont=dict(
-                size=16,
-                color=font_color
-            ),
-            tickformat=','
-        ),
-        plot_bgcolor='#292929',
-        paper_bgcolor='#292929'
-    )
-
-    # configure tooltip
-    fig.update_traces(
-        hovertemplate='<b>%{y}</b>',
-        mode='lines',
-        line=dict(
-            width=2,
-            dash='solid'
-        ),
-        hoverlabel=dict(
-            font_color='#171717'
+            margin=dict(t=60, r=15)
         )
-    )
 
-    for trace in fig.data:
-        trace.hoverlabel.bgcolor = color_discrete_map[trace.name]
-
-    fig.update_xaxes(
-        showline=True,
-        linewidth=1,
-        linecolor=font_color,
-        showgrid=False,
-    )
-    fig.update_yaxes(
-        showline=True,
-        linewidth=1,
-        linecolor=font_color,
-        showgrid=False,
-        zeroline=False
-    )
+    with span('figure'):
+        fig = figures.get(('monthly', geo_level, geography, since, monthly_version(since)), build_figure)
 
     col1, col2 = st.columns([5, 1])
 
-    config = {'displayModeBar': False}
-    col1.plotly_chart(
-        fig,
-        config=config,
-        theme='streamlit',
-        use_container_width=True
-    )
+    with span('plotly_chart'):
+        col1.plotly_chart(
+            fig,
+            config=charts.CONFIG,
+            theme='streamlit',
+            use_container_width=True
+        )
 
     col1.markdown(MONTHLY_UNBENCHMARKED_CAPTION, unsafe_allow_html=True)
 
     # KPI section
-    singleFamily_total = df[df['Series'] ==
-                            'Single-Family']['Permits'].sum()
-    multiFamily_total = df[df['Series'] ==
-                           'Multi-Family']['Permits'].sum()
+    singleFamily_total = series_total('Single-Family')
+    multiFamily_total = series_total('Multi-Family')
 
     mf_kpi_title = "Multi-Family Permits:"
     sf_kpi_title = "Single-Family Permits:"
@@ -324,22 +280,17 @@ if screen_width >= 500:
         unsafe_allow_html=True
     )
 
-    # download dataframe as CSV
-    df = df.sort_values(by='date', ascending=True)
-    df = df[[
-        'year_month',
-        'Name',
-        'Series',
-        'Permits'
-    ]]
-
-    df_download = df.to_csv(index='False').encode('utf-8')
-
-    st.download_button(
-        label=":material/download:",
-        data=df_download,
-        file_name=download_file_name,
-        help='Download filtered data to CSV'
+    # download the filtered data; the file is only written when asked for
+    export_button(
+        'monthly',
+        ('monthly', geo_level, geography, since, monthly_version(since)),
+        lambda: df.sort_values(by='date', ascending=True)[[
+            'year_month',
+            'Name',
+            'Series',
+            'Permits'
+        ]],
+        download_file_name
     )
 
     # the custom CSS lives here:
@@ -365,8 +316,8 @@ else:
     df_sf = df[df['Series'] == 'Single-Family']
     df_mf = df[df['Series'] == 'Multi-Family']
 
-    total_mf_permits = df_mf['Permits'].sum()
-    total_sf_permits = df_sf['Permits'].sum()
+    total_mf_permits = series_total('Multi-Family')
+    total_sf_permits = series_total('Single-Family')
 
     # get data for most recent month
     max_date = df['year_month'].max()
@@ -408,10 +359,10 @@ else:
         </p>
     ''', unsafe_allow_html=True)
 
-    # 18-month total
+    # total over the chosen range
     st.markdown(f'''
         <p style="font-size: 16px; font-weight: 100; text-align: center;">
-            Trailing 18-Month Total: {total_mf_permits:,.0f}
+            {total_label}: {total_mf_permits:,.0f}
         </p>
     ''', unsafe_allow_html=True)
 
@@ -444,10 +395,10 @@ else:
         </p>
     ''', unsafe_allow_html=True)
 
-    # 18-month total
+    # total over the chosen range
     st.markdown(f'''
         <p style="font-size: 16px; font-weight: 100; text-align: center;">
-            Trailing 18-Month Total: {total_sf_permits:,.0f}
+            {total_label}: {total_sf_permits:,.0f}
         </p>
     ''', unsafe_allow_html=True)
 
@@ -1,10 +1,9 @@
 import streamlit as st
-from st_screen_stats import ScreenData
+from layout import is_mobile
+from exports import bundle_links
 
-# using react component
-screenD = ScreenData(setTimeout=200)
-screen_d = screenD.st_screen_data()
-screen_width = screen_d['innerWidth']
+# desktop or mobile layout, as detected by main.py (see layout.py)
+mobile = is_mobile()
 
 
 # text variables that are NOT screensize specific
@@ -17,7 +16,7 @@ heading_font_color = '#00BFFF'
 paragraph_font_color = '#d9d9d9'
 
 # desktop / tablet view
-if screen_width >= 500:
+if not mobile:
     heading_margin_top = 0
     margin_side = 20
     text_alignment = 'left'
@@ -55,3 +54,19 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+st.write("")
+st.write("")
+
+# "Bulk downloads" text block: static files, rebuilt with every data refresh
+st.markdown(
+    f"""
+    <div style='margin-top: {heading_margin_top}px; margin-bottom: {heading_margin_bottom}px; text-align: {text_alignment}; padding-left: {margin_side}px; padding-right: {margin_side}px;'>
+        <span style='font-size: {heading_font_size}px; font-weight: {heading_font_weight}; color: {heading_font_color}'>Bulk downloads</span><br/>
+        <span style='font-size: {paragraph_font_size}px; font-weight: {paragraph_font_weight}; color: {paragraph_font_color}'>All of the data behind this dashboard, for every jurisdiction at once:<br/>
+        {'<br/>'.join(bundle_links())}
+        </span>
+    </div>
+    """,
+    unsafe_allow_html=True
+)
@@ -0,0 +1,299 @@
+"""Run the dashboard as several Streamlit processes behind one port.
+
+One `streamlit run` process serves every session with one interpreter, so
+pandas filtering and figure serialization for all of them share one GIL. This
+launcher starts --workers Streamlit processes on local ports and puts a small
+reverse proxy (Tornado, which Streamlit already depends on) in front of them
+on --port:
+
+  python workers.py --workers 4 --port 8501
+
+Sessions are sticky: the first response sets a cookie naming a worker
+(assigned round-robin), and the page, its websocket and its media and upload
+requests all go to that worker, which holds the session's state. A worker that
+exits is restarted; its sessions reconnect and start over on the same one.
+Each worker is started with serve.py, so it warms its caches before serving.
+
+The dashboard tables are written, sorted and ready to index, as Arrow IPC
+files under --shared-dir (data_access.write_shared_tables), and every worker
+memory-maps them (SHARED_TABLES_DIR) instead of reading its own copy, so the
+data is in RAM once however many workers there are. The launcher checks the
+data version every few seconds and writes the files again after a refresh
+(deleting the old version's, which stay readable to any worker still mapping
+them), so the workers move to the new data without each reading its own.
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import itertools
+import subprocess
+import tempfile
+
+import http.client
+
+import tornado.web
+import tornado.ioloop
+import tornado.websocket
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest, HTTPClientError
+from tornado.httputil import HTTPHeaders
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# cookie naming the session's worker
+STICKY_COOKIE = 'bps_worker'
+
+# headers that describe one hop, not the request or response
+HOP_HEADERS = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te',
+               'trailers', 'transfer-encoding', 'upgrade', 'content-length'}
+
+# Streamlit's own limit (server.maxMessageSize) for websocket messages
+MAX_MESSAGE_SIZE = 200 * 2**20
+
+# how often to look for a data refresh that needs new shared table files
+SHARED_CHECK_MS = 5000
+
+# what reaching a worker raises while it is down, starting or restarting
+UNREACHABLE = (OSError, HTTPClientError, tornado.websocket.WebSocketClosedError)
+
+
+class Workers:
+    """The Streamlit processes and which one a request belongs to."""
+
+    def __init__(self, count, base_port, env):
+        self.ports = [base_port + i for i in range(count)]
+        self.env = env
+        self.processes = [None] * count
+        self._next = itertools.cycle(range(count))
+
+    def start(self, i):
+        self.processes[i] = subprocess.Popen(
+            [sys.executable, 'serve.py',
+             '--server.port', str(self.ports[i]), '--server.address', '127.0.0.1',
+             '--server.headless', 'true'],
+            cwd=REPO_ROOT, env=self.env)
+
+    def start_all(self):
+        for i in range(len(self.ports)):
+            self.start(i)
+
+    def restart_exited(self):
+        for i, process in enumerate(self.processes):
+            if process.poll() is not None:
+                print(f'worker {i} (port {self.ports[i]}) exited with {process.returncode}; restarting')
+                self.start(i)
+
+    def stop_all(self):
+        for process in self.processes:
+            if process is not None and process.poll() is None:
+                process.terminate()
+        for process in self.processes:
+            if process is not None:
+                process.wait()
+
+    def pick(self, handler):
+        """The worker for this request: the one in its cookie, else the next in turn
+        (and the cookie is set to it)."""
+        cookie = handler.get_cookie(STICKY_COOKIE)
+        if cookie is not None and cookie.isdigit() and int(cookie) < len(self.ports):
+            return int(cookie)
+        i = next(self._next)
+        handler.set_cookie(STICKY_COOKIE, str(i), httponly=True, samesite='Lax')
+        return i
+
+
+def wait_until_healthy(ports, timeout=120):
+    import urllib.request
+    deadline = time.time() + timeout
+    for port in ports:
+        while True:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=2):
+                    break
+            except (OSError, http.client.HTTPException):
+                if time.time() > deadline:
+                    sys.exit(f'worker on port {port} did not start')
+                time.sleep(0.2)
+
+
+class ProxyHandler(tornado.web.RequestHandler):
+    SUPPORTED_METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH')
+
+    def initialize(self, workers):
+        self.workers = workers
+
+    def compute_etag(self):
+        # pass the worker's caching headers through untouched
+        return None
+
+    async def proxy(self, *args):
+        port = self.workers.ports[self.workers.pick(self)]
+        headers = HTTPHeaders({k: v for k, v in self.request.headers.get_all()
+                               if k.lower() not in HOP_HEADERS})
+        try:
+            # raise_error=False only covers error statuses; a worker that isn't
+            # listening or times out still raises
+            response = await AsyncHTTPClient().fetch(HTTPRequest(
+                f'http://127.0.0.1:{port}{self.request.uri}',
+                method=self.request.method,
+                headers=headers,
+                body=self.request.body if self.request.method in ('POST', 'PUT', 'PATCH') else None,
+                follow_redirects=False,
+                decompress_response=False,
+                allow_nonstandard_methods=True,
+                request_timeout=300,
+            ), raise_error=False)
+        except UNREACHABLE:
+            raise tornado.web.HTTPError(502, reason='worker unavailable')
+        self.set_status(response.code, response.reason)
+        copied = set()
+        for name, value in response.headers.get_all():
+            if name.lower() in HOP_HEADERS or name.lower() in ('server', 'date'):
+                continue
+            # replace Tornado's defaults (Content-Type), keep repeats (Set-Cookie)
+            (self.add_header if name.lower() in copied else self.set_header)(name, value)
+            copied.add(name.lower())
+        if response.body and response.code != 304:
+            self.write(response.body)
+
+    get = head = post = put = delete = options = patch = proxy
+
+
+class StreamProxy(tornado.websocket.WebSocketHandler):
+    """The session's websocket (/_stcore/stream), relayed to its worker."""
+
+    def initialize(self, workers):
+        self.workers = workers
+        self.upstream = None
+
+    def prepare(self):
+        # before the handshake, so a new cookie goes out with the 101 response
+        self.port = self.workers.ports[self.workers.pick(self)]
+
+    def check_origin(self, origin):
+        # the worker checks it; the proxy forwards Origin and Host unchanged
+        return True
+
+    def select_subprotocol(self, subprotocols):
+        return subprotocols[0] if subprotocols else None
+
+    async def open(self, *args):
+        protocols = [p.strip() for p in self.request.headers.get('Sec-Websocket-Protocol', '').split(',')
+                     if p.strip()]
+        headers = {k: v for k, v in self.request.headers.get_all()
+                   if k.lower() in ('cookie', 'origin', 'host', 'user-agent', 'x-streamlit-user')}
+        try:
+            self.upstream = await tornado.websocket.websocket_connect(
+                HTTPRequest(f'ws://127.0.0.1:{self.port}{self.request.uri}', headers=headers),
+                subprotocols=protocols or None, max_message_size=MAX_MESSAGE_SIZE)
+        except UNREACHABLE:
+            # down, or restarting and answering without the 101; the browser
+            # reconnects on its own
+            self.close(1011, 'worker unavailable')
+            return
+        tornado.ioloop.IOLoop.current().spawn_callback(self.relay)
+
+    async def relay(self):
+        while True:
+            message = await self.upstream.read_message()
+            if message is None:
+                self.close()
+                return
+            try:
+                await self.write_message(message, binary=isinstance(message, bytes))
+            except tornado.websocket.WebSocketClosedError:
+                return
+
+    async def on_message(self, message):
+        if self.upstream is not None:
+            try:
+                await self.upstream.write_message(message, binary=isinstance(message, bytes))
+            except tornado.websocket.WebSocketClosedError:
+                self.close(1011, 'worker unavailable')
+
+    def on_close(self):
+        if self.upstream is not None:
+            self.upstream.close()
+
+
+class SharedTables:
+    """The shared table files, rewritten whenever the data version changes."""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.paths = set()
+        self.busy = False
+
+    def write(self):
+        from data_access import write_shared_tables
+        paths = set(write_shared_tables(self.out_dir))
+        if paths != self.paths:
+            # a worker still mapping an old file keeps its pages until it remaps
+            for name in os.listdir(self.out_dir):
+                path = os.path.join(self.out_dir, name)
+                if name.endswith('.arrow') and path not in paths:
+                    os.remove(path)
+            self.paths = paths
+            return True
+        return False
+
+    async def refresh(self):
+        # off the IO loop, so proxying carries on while a new version is written
+        if self.busy:
+            return
+        self.busy = True
+        try:
+            if await tornado.ioloop.IOLoop.current().run_in_executor(None, self.write):
+                print(f'shared tables updated in {self.out_dir}')
+        except Exception as e:
+            # a refresh still being written; try again next time
+            print(f'could not update shared tables: {e}')
+        finally:
+            self.busy = False
+
+
+def make_proxy(workers):
+    return tornado.web.Application([
+        (r'/_stcore/stream', StreamProxy, {'workers': workers}),
+        (r'/.*', ProxyHandler, {'workers': workers}),
+    ], websocket_max_message_size=MAX_MESSAGE_SIZE, websocket_ping_interval=20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', 2)))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8501)))
+    parser.add_argument('--address', default='0.0.0.0')
+    parser.add_argument('--base-port', type=int, default=8600, help='first worker port')
+    parser.add_argument('--shared-dir', default=os.path.join(tempfile.gettempdir(), 'bps-shared-tables'),
+                        help='where the memory-mapped tables are written')
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    shared = SharedTables(args.shared_dir)
+    shared.write()
+    print(f'shared {len(shared.paths)} tables in {args.shared_dir}')
+
+    workers = Workers(args.workers, args.base_port, dict(os.environ, SHARED_TABLES_DIR=args.shared_dir))
+    workers.start_all()
+    try:
+        wait_until_healthy(workers.ports)
+        make_proxy(workers).listen(args.port, args.address)
+        print(f'{args.workers} workers on ports {workers.ports[0]}-{workers.ports[-1]}, '
+              f'serving on http://{args.address}:{args.port}')
+        tornado.ioloop.PeriodicCallback(workers.restart_exited, 5000).start()
+        tornado.ioloop.PeriodicCallback(shared.refresh, SHARED_CHECK_MS).start()
+        # Heroku stops a dyno with SIGTERM; unwind through the finally below
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        tornado.ioloop.IOLoop.current().start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        workers.stop_all()
+
+
+if __name__ == '__main__':
+    main()